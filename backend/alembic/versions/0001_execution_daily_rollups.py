@@ -0,0 +1,50 @@
+"""add execution_daily_rollups
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'execution_daily_rollups',
+        sa.Column('project_id', sa.String(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('pending_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('running_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cancelled_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_sum', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('duration_min', sa.Integer(), nullable=True),
+        sa.Column('duration_max', sa.Integer(), nullable=True),
+        sa.Column('duration_bucket_0', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_bucket_1', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_bucket_2', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_bucket_3', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_bucket_4', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_bucket_5', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('execution_daily_rollups')
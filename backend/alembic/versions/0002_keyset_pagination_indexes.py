@@ -0,0 +1,53 @@
+"""add keyset pagination indexes, make created_at not null
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns) matching the (created_at, id) list orderings
+INDEXES = [
+    ('ix_projects_created_at_id', 'projects', ['created_at', 'id']),
+    ('ix_test_cases_created_at_id', 'test_cases', ['created_at', 'id']),
+    ('ix_test_cases_project_id_created_at_id', 'test_cases', ['project_id', 'created_at', 'id']),
+    ('ix_test_executions_created_at_id', 'test_executions', ['created_at', 'id']),
+    ('ix_test_executions_test_case_id_created_at_id', 'test_executions', ['test_case_id', 'created_at', 'id']),
+    ('ix_teams_created_at_id', 'teams', ['created_at', 'id']),
+    ('ix_activity_logs_created_at_id', 'activity_logs', ['created_at', 'id']),
+]
+
+# Tables paged by (created_at, id): a NULL created_at cannot be encoded in a
+# cursor and sorts apart from every other row. Comments are paged within a
+# test case, through the index created in 0003
+PAGED_TABLES = list(dict.fromkeys(table for _, table, _ in INDEXES)) + ['comments']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in PAGED_TABLES:
+        op.execute(f'UPDATE {table} SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL')
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    for table in reversed(PAGED_TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
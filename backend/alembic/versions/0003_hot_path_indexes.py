@@ -0,0 +1,47 @@
+"""add indexes for hot query predicates
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns, partial index predicate) matching the route
+# filters; app.db.query_plans checks the hot paths actually use them
+INDEXES = [
+    ('ix_projects_created_by_created_at_id', 'projects', ['created_by', 'created_at', 'id'], None),
+    ('ix_projects_team_id', 'projects', ['team_id'], 'team_id IS NOT NULL'),
+    ('ix_test_cases_project_id_status_test_type', 'test_cases',
+     ['project_id', 'status', 'test_type', 'created_at', 'id'], None),
+    ('ix_test_cases_created_by', 'test_cases', ['created_by'], None),
+    ('ix_test_executions_environment_id', 'test_executions', ['environment_id'], 'environment_id IS NOT NULL'),
+    ('ix_comments_test_case_id_created_at', 'comments', ['test_case_id', 'created_at', 'id'], None),
+    ('ix_team_members_user_id_team_id', 'team_members', ['user_id', 'team_id'], None),
+    ('ix_team_members_team_id_user_id', 'team_members', ['team_id', 'user_id'], None),
+    ('ix_environments_project_id', 'environments', ['project_id'], None),
+    ('ix_attachments_entity_type_entity_id', 'attachments', ['entity_type', 'entity_id'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns, where in INDEXES:
+        predicate = sa.text(where) if where else None
+        op.create_index(name, table, columns, postgresql_where=predicate, sqlite_where=predicate)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,100 @@
+"""convert string keys to native uuid
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Primary and foreign key columns stored as UUIDString (see app.db.types);
+# activity_logs.target_id stays text as it may name non-entity targets
+UUID_COLUMNS = {
+    'users': ['id'],
+    'projects': ['id', 'created_by', 'team_id'],
+    'test_steps': ['id', 'test_case_id'],
+    'test_cases': ['id', 'project_id', 'created_by', 'assigned_to'],
+    'test_plans': ['id', 'project_id', 'created_by'],
+    'test_executions': ['id', 'test_case_id', 'test_plan_id', 'executed_by', 'environment_id'],
+    'execution_daily_rollups': ['project_id'],
+    'comments': ['id', 'test_case_id', 'user_id', 'parent_comment_id'],
+    'teams': ['id', 'created_by'],
+    'team_members': ['id', 'team_id', 'user_id'],
+    'environments': ['id', 'project_id'],
+    'attachments': ['id', 'entity_id', 'uploaded_by'],
+    'test_plan_test_cases': ['id', 'test_plan_id', 'test_case_id', 'created_by'],
+    'activity_logs': ['id', 'user_id'],
+}
+
+UUID_PATTERN = '^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$'
+
+
+def _foreign_keys(bind):
+    """Foreign keys between the converted tables, which have to be dropped
+    while the referencing and referenced columns change type"""
+    inspector = sa.inspect(bind)
+    foreign_keys = []
+    for table in UUID_COLUMNS:
+        for foreign_key in inspector.get_foreign_keys(table):
+            if foreign_key['referred_table'] in UUID_COLUMNS:
+                foreign_keys.append((table, foreign_key))
+    return foreign_keys
+
+
+def _convert(to_type: str, cast: str) -> None:
+    bind = op.get_bind()
+    foreign_keys = _foreign_keys(bind)
+    for table, foreign_key in foreign_keys:
+        op.drop_constraint(foreign_key['name'], table, type_='foreignkey')
+
+    for table, columns in UUID_COLUMNS.items():
+        alterations = ', '.join(
+            f'ALTER COLUMN {column} TYPE {to_type} USING {column}::{cast}' for column in columns
+        )
+        # One statement per table: the table and its indexes are rewritten once
+        op.execute(f'ALTER TABLE {table} {alterations}')
+
+    for table, foreign_key in foreign_keys:
+        op.create_foreign_key(
+            foreign_key['name'], table, foreign_key['referred_table'],
+            foreign_key['constrained_columns'], foreign_key['referred_columns'],
+            ondelete=foreign_key.get('options', {}).get('ondelete')
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # Other databases keep text keys (UUIDString stores them as text)
+        return
+
+    malformed = []
+    for table, columns in UUID_COLUMNS.items():
+        for column in columns:
+            count = bind.execute(sa.text(
+                f'SELECT count(*) FROM {table} WHERE {column} IS NOT NULL AND {column} !~ :pattern'
+            ), {'pattern': UUID_PATTERN}).scalar()
+            if count:
+                malformed.append(f'{table}.{column} ({count} rows)')
+    if malformed:
+        raise RuntimeError(f'Cannot convert keys to uuid, values are not UUIDs in: {", ".join(malformed)}')
+
+    _convert('uuid', 'uuid')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _convert('varchar', 'text')
@@ -0,0 +1,96 @@
+"""
+Loader strategies for test case reads.
+
+List and detail endpoints describe *what* they need (a response view and an
+optional ``fields=`` projection) and get back the ORM options that load
+exactly that:
+
+* steps are fetched with ``selectinload`` -- one extra ``IN`` query per page
+  instead of a join that repeats every test case row once per step;
+* the ``summary`` view and ``fields=`` projections use ``load_only`` so the
+  ``test_data``/``automation_config`` JSON blobs are never read for lists;
+* everything not requested is ``raiseload``-ed, so an accidental lazy load
+  fails loudly instead of silently issuing one query per row.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import load_only, raiseload, selectinload
+
+from app import models
+from app.schemas.test_case import TestCaseResponse, TestCaseSummary, TestStep
+
+FULL_VIEW = "full"
+SUMMARY_VIEW = "summary"
+
+STEPS_FIELD = "test_steps"
+
+# Always loaded with a projection: identity and the keyset pagination key
+_KEY_COLUMNS = ("id", "created_at")
+
+TEST_CASE_SUMMARY_COLUMNS = tuple(TestCaseSummary.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma separated ``fields=`` parameter for test cases.
+
+    Returns:
+        The requested field names in order, or None when no projection was asked for
+
+    Raises:
+        HTTPException: 400 if a field is not a test case column or ``test_steps``
+    """
+    if not fields:
+        return None
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    allowed = set(models.TestCase.__table__.columns.keys()) | {STEPS_FIELD}
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown test case fields: {', '.join(unknown)}"
+        )
+    return requested or None
+
+
+def test_case_loader_options(view: str = FULL_VIEW, fields: Optional[Sequence[str]] = None) -> list:
+    """Build the loader options for a test case query"""
+    if fields:
+        columns = [f for f in fields if f != STEPS_FIELD]
+        with_steps = STEPS_FIELD in fields
+    elif view == SUMMARY_VIEW:
+        columns = list(TEST_CASE_SUMMARY_COLUMNS)
+        with_steps = False
+    else:
+        return [selectinload(models.TestCase.steps), raiseload("*")]
+
+    names = list(dict.fromkeys([*_KEY_COLUMNS, *columns]))
+    options = [load_only(*(getattr(models.TestCase, name) for name in names))]
+    if with_steps:
+        options.append(selectinload(models.TestCase.steps))
+    options.append(raiseload("*"))
+    return options
+
+
+def serialize_test_cases(
+    test_cases: Sequence[Any],
+    view: str = FULL_VIEW,
+    fields: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """Serialize test cases loaded with test_case_loader_options"""
+    if fields:
+        return [_project(test_case, fields) for test_case in test_cases]
+    schema = TestCaseSummary if view == SUMMARY_VIEW else TestCaseResponse
+    return [schema.model_validate(test_case).model_dump(mode="json") for test_case in test_cases]
+
+
+def _project(test_case: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    item = {}
+    for name in fields:
+        if name == STEPS_FIELD:
+            item[name] = [TestStep.model_validate(step) for step in test_case.steps]
+        else:
+            item[name] = getattr(test_case, name)
+    return jsonable_encoder(item)
@@ -0,0 +1,76 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Lists are ordered by ``(created_at DESC, id DESC)``. A page is requested
+either with the classic ``skip``/``limit`` pair or with the opaque ``cursor``
+returned in the ``X-Next-Cursor`` header of the previous page. Cursor pages
+seek directly to the last seen ``(created_at, id)`` through the matching
+composite index, so every page costs the same regardless of depth.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def paginate(query, model, limit: int, cursor: Optional[str] = None, skip: int = 0):
+    """
+    Apply keyset ordering and paging to a select() statement or ORM query.
+
+    Args:
+        query: SQLAlchemy ``Select`` or ``Query`` over ``model``
+        model: Mapped class with ``created_at`` and ``id`` columns
+        limit: Page size
+        cursor: Cursor of the previous page; takes precedence over ``skip``
+        skip: Offset for non-cursor requests
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int) -> Optional[str]:
+    """
+    Expose the cursor of the next page in the response headers.
+
+    No cursor is emitted once a page comes back short, i.e. on the last page.
+    """
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    cursor = encode_cursor(last.created_at, last.id)
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    return cursor
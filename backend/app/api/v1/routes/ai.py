@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone
 
 from app.db.session import get_db
+from app.db.repository import Repository
 from app.models.db_models import TestCase as DBTestCase, User
 from app.schemas.ai import (
     AITestGenerationRequest,
@@ -24,7 +25,7 @@ router = APIRouter(prefix="/ai", tags=["ai"])
 async def ai_generate_tests(
     request: AITestGenerationRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -79,19 +80,17 @@ async def ai_generate_tests(
 async def ai_debug_test(
     request: AIDebugRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Debug a failing test case using AI
     """
     # Verify test case exists and user has access
-    test_case = db.query(DBTestCase).filter(
-        (DBTestCase.id == request.test_case_id) &
-        (DBTestCase.created_by == current_user.id)
-    ).first()
-    
-    if not test_case:
+    if not await Repository(db, DBTestCase).exists(
+        DBTestCase.id == request.test_case_id,
+        DBTestCase.created_by == current_user.id
+    ):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Test case not found or access denied"
@@ -123,7 +122,7 @@ async def ai_debug_test(
 async def ai_prioritize_tests(
     request: AIPrioritizationRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -159,7 +158,7 @@ async def ai_prioritize_tests(
 @router.get("/analysis/{analysis_id}", response_model=AIAnalysisResult)
 async def get_analysis_result(
     analysis_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -6,12 +6,13 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import from app modules
 from app import schemas
 from app.models import db_models as models
 from app.db.session import get_db
+from app.db.repository import Repository
 from app.auth.security import get_current_user
 from app.core.config import settings
 
@@ -21,6 +22,13 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Models attachments can belong to, by entity_type
+ENTITY_MODELS = {
+    "test_case": models.TestCase,
+    "test_execution": models.TestExecution,
+    "test_plan": models.TestPlan,
+}
+
 def get_upload_dir() -> str:
     """Get the upload directory, create if it doesn't exist"""
     upload_dir = os.path.join(settings.BASE_DIR, "uploads")
@@ -33,7 +41,7 @@ async def upload_attachment(
     entity_id: str = Form(...),
     description: Optional[str] = Form(None),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -47,14 +55,8 @@ async def upload_attachment(
         )
     
     # Check if entity exists and user has access
-    if entity_type == "test_case":
-        entity = db.query(models.TestCase).filter(models.TestCase.id == entity_id).first()
-    elif entity_type == "test_execution":
-        entity = db.query(models.TestExecution).filter(models.TestExecution.id == entity_id).first()
-    elif entity_type == "test_plan":
-        entity = db.query(models.TestPlan).filter(models.TestPlan.id == entity_id).first()
-    
-    if not entity:
+    model = ENTITY_MODELS[entity_type]
+    if not await Repository(db, model).exists(model.id == entity_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"{entity_type.replace('_', ' ').title()} not found"
@@ -97,17 +99,13 @@ async def upload_attachment(
         created_at=datetime.utcnow()
     )
     
-    db.add(db_attachment)
-    db.commit()
-    db.refresh(db_attachment)
-    
-    return db_attachment
+    return await Repository(db, models.Attachment).add(db_attachment)
 
 @router.get("/{entity_type}/{entity_id}", response_model=List[schemas.Attachment])
 async def list_attachments(
     entity_type: str,
     entity_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -121,39 +119,29 @@ async def list_attachments(
         )
     
     # Check if user has access to the entity
-    if entity_type == "test_case":
-        entity = db.query(models.TestCase).filter(models.TestCase.id == entity_id).first()
-    elif entity_type == "test_execution":
-        entity = db.query(models.TestExecution).filter(models.TestExecution.id == entity_id).first()
-    elif entity_type == "test_plan":
-        entity = db.query(models.TestPlan).filter(models.TestPlan.id == entity_id).first()
-    
-    if not entity:
+    model = ENTITY_MODELS[entity_type]
+    if not await Repository(db, model).exists(model.id == entity_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"{entity_type.replace('_', ' ').title()} not found"
         )
     
     # Get attachments
-    attachments = db.query(models.Attachment).filter(
+    return await Repository(db, models.Attachment).list(
         models.Attachment.entity_type == entity_type,
         models.Attachment.entity_id == entity_id
-    ).all()
-    
-    return attachments
+    )
 
 @router.get("/download/{attachment_id}")
 async def download_attachment(
     attachment_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Download an attachment
     """
-    attachment = db.query(models.Attachment).filter(
-        models.Attachment.id == attachment_id
-    ).first()
+    attachment = await Repository(db, models.Attachment).get(attachment_id)
     
     if not attachment:
         raise HTTPException(
@@ -179,16 +167,17 @@ async def download_attachment(
 @router.delete("/{attachment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_attachment(
     attachment_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Delete an attachment
     """
-    attachment = db.query(models.Attachment).filter(
+    attachments = Repository(db, models.Attachment)
+    attachment = await attachments.first(
         models.Attachment.id == attachment_id,
         models.Attachment.uploaded_by == current_user["id"]  # Only allow uploader to delete
-    ).first()
+    )
     
     if not attachment:
         raise HTTPException(
@@ -205,7 +194,6 @@ async def delete_attachment(
         print(f"Error deleting file: {str(e)}")
     
     # Delete attachment record
-    db.delete(attachment)
-    db.commit()
+    await attachments.delete(attachment)
     
     return None
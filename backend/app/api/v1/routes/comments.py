@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import uuid
 from datetime import datetime
 
+from app.api.pagination import set_next_cursor
 from app.db.session import get_db
+from app.db.repository import Repository
 from app.models.db_models import Comment
 from app.models.db_models import TestCase as DBTestCase
 from app.models.db_models import User
@@ -14,17 +16,16 @@ from app.core.security import get_current_user
 router = APIRouter(prefix="/comments", tags=["comments"])
 
 @router.post("/", response_model=CommentInDB, status_code=status.HTTP_201_CREATED)
-def create_comment(
+async def create_comment(
     comment_in: CommentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Create a new comment on a test case
     """
     # Verify test case exists
-    test_case = db.query(TestCase).filter(TestCase.id == comment_in.test_case_id).first()
-    if not test_case:
+    if not await Repository(db, DBTestCase).exists(DBTestCase.id == comment_in.test_case_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Test case with id {comment_in.test_case_id} not found"
@@ -39,49 +40,48 @@ def create_comment(
         updated_at=datetime.utcnow()
     )
     
-    db.add(comment)
-    db.commit()
-    db.refresh(comment)
-    
-    return comment
+    return await Repository(db, Comment).add(comment)
 
 @router.get("/test-case/{test_case_id}", response_model=List[CommentInDB])
-def get_comments_for_test_case(
+async def get_comments_for_test_case(
     test_case_id: str,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all comments for a test case
+    Get all comments for a test case, newest first
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
     """
     # Verify test case exists
-    test_case = db.query(TestCase).filter(TestCase.id == test_case_id).first()
-    if not test_case:
+    if not await Repository(db, DBTestCase).exists(DBTestCase.id == test_case_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Test case with id {test_case_id} not found"
         )
     
-    comments = db.query(Comment).filter(
-        Comment.test_case_id == test_case_id
-    ).order_by(
-        Comment.created_at.desc()
-    ).offset(skip).limit(limit).all()
-    
+    comments = await Repository(db, Comment).page(
+        Comment.test_case_id == test_case_id, limit=limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, comments, limit)
+
     return comments
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_comment(
+async def delete_comment(
     comment_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete a comment (only allowed by comment author or admin)
     """
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comments = Repository(db, Comment)
+    comment = await comments.get(comment_id)
     if not comment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -95,7 +95,6 @@ def delete_comment(
             detail="Not authorized to delete this comment"
         )
     
-    db.delete(comment)
-    db.commit()
+    await comments.delete(comment)
     
     return None
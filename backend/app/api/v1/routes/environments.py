@@ -3,12 +3,13 @@ from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Import from app modules
 from app import schemas
 from app.models import db_models as models
 from app.db.session import get_db
+from app.db.repository import Repository
 from app.auth.security import get_current_user
 
 router = APIRouter(
@@ -20,30 +21,25 @@ router = APIRouter(
 @router.post("/", response_model=schemas.Environment, status_code=status.HTTP_201_CREATED)
 async def create_environment(
     environment: schemas.EnvironmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Create a new environment
     """
     # Check if project exists and user has access
-    project = db.query(models.Project).filter(
-        models.Project.id == environment.project_id
-    ).first()
-    
-    if not project:
+    if not await Repository(db, models.Project).exists(models.Project.id == environment.project_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Project with id {environment.project_id} not found"
         )
     
     # Check if environment with same name already exists in project
-    existing_env = db.query(models.Environment).filter(
+    environments = Repository(db, models.Environment)
+    if await environments.exists(
         models.Environment.project_id == environment.project_id,
         models.Environment.name == environment.name
-    ).first()
-    
-    if existing_env:
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Environment with name '{environment.name}' already exists in this project"
@@ -62,56 +58,43 @@ async def create_environment(
         updated_at=datetime.utcnow()
     )
     
-    db.add(db_environment)
-    db.commit()
-    db.refresh(db_environment)
-    
-    return db_environment
+    return await environments.add(db_environment)
 
 @router.get("/project/{project_id}", response_model=List[schemas.Environment])
 async def list_environments(
     project_id: str,
     active_only: bool = True,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     List all environments for a project
     """
     # Check if project exists and user has access
-    project = db.query(models.Project).filter(
-        models.Project.id == project_id
-    ).first()
-    
-    if not project:
+    if not await Repository(db, models.Project).exists(models.Project.id == project_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Project with id {project_id} not found"
         )
     
     # Get environments
-    query = db.query(models.Environment).filter(
-        models.Environment.project_id == project_id
-    )
-    
+    filters = [models.Environment.project_id == project_id]
+
     if active_only:
-        query = query.filter(models.Environment.is_active == True)
-    
-    environments = query.all()
-    return environments
+        filters.append(models.Environment.is_active == True)
+
+    return await Repository(db, models.Environment).list(*filters)
 
 @router.get("/{environment_id}", response_model=schemas.Environment)
 async def get_environment(
     environment_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Get environment by ID
     """
-    environment = db.query(models.Environment).filter(
-        models.Environment.id == environment_id
-    ).first()
+    environment = await Repository(db, models.Environment).get(environment_id)
     
     if not environment:
         raise HTTPException(
@@ -125,15 +108,14 @@ async def get_environment(
 async def update_environment(
     environment_id: str,
     environment: schemas.EnvironmentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Update an environment
     """
-    db_environment = db.query(models.Environment).filter(
-        models.Environment.id == environment_id
-    ).first()
+    environments = Repository(db, models.Environment)
+    db_environment = await environments.get(environment_id)
     
     if not db_environment:
         raise HTTPException(
@@ -144,13 +126,11 @@ async def update_environment(
     # Update fields if provided
     if environment.name is not None:
         # Check if environment with same name already exists in project
-        existing_env = db.query(models.Environment).filter(
+        if await environments.exists(
             models.Environment.project_id == db_environment.project_id,
             models.Environment.name == environment.name,
             models.Environment.id != environment_id
-        ).first()
-        
-        if existing_env:
+        ):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Environment with name '{environment.name}' already exists in this project"
@@ -171,24 +151,20 @@ async def update_environment(
         db_environment.variables = environment.variables
     
     db_environment.updated_at = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(db_environment)
-    
-    return db_environment
+
+    return await environments.save(db_environment)
 
 @router.delete("/{environment_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_environment(
     environment_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Delete an environment
     """
-    environment = db.query(models.Environment).filter(
-        models.Environment.id == environment_id
-    ).first()
+    environments = Repository(db, models.Environment)
+    environment = await environments.get(environment_id)
     
     if not environment:
         raise HTTPException(
@@ -197,17 +173,14 @@ async def delete_environment(
         )
     
     # Check if environment is being used in any test executions
-    execution_count = db.query(models.TestExecution).filter(
+    if await Repository(db, models.TestExecution).exists(
         models.TestExecution.environment_id == environment_id
-    ).count()
-    
-    if execution_count > 0:
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete environment that is being used in test executions"
         )
     
-    db.delete(environment)
-    db.commit()
+    await environments.delete(environment)
     
     return None
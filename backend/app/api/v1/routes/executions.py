@@ -1,38 +1,61 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import uuid
 from datetime import datetime
 
 from app.db.session import get_db
+from app.db.repository import Repository
 from app.models.db_models import TestExecution, ExecutionStatus
 from app.models.db_models import TestCase as DBTestCase
 from app.models.db_models import User
 from app.schemas.execution import TestExecutionCreate, TestExecutionInDB
 from app.core.security import get_current_user
+from app.api.pagination import set_next_cursor
 
 router = APIRouter(prefix="/executions", tags=["executions"])
 
+
+async def _get_own_test_case_or_404(db: AsyncSession, test_case_id: str, user_id) -> DBTestCase:
+    test_case = await Repository(db, DBTestCase).first(
+        DBTestCase.id == test_case_id,
+        DBTestCase.created_by == user_id
+    )
+    if not test_case:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test case not found or access denied"
+        )
+    return test_case
+
+
+async def _get_own_execution_or_404(db: AsyncSession, execution_id: str, user_id) -> TestExecution:
+    executions = Repository(db, TestExecution)
+    execution = await executions.first(
+        TestExecution.id == execution_id,
+        TestExecution.test_case_id.in_(
+            select(DBTestCase.id).where(DBTestCase.created_by == user_id)
+        )
+    )
+    if not execution:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test execution not found or access denied"
+        )
+    return execution
+
 @router.post("/", response_model=TestExecutionInDB, status_code=status.HTTP_201_CREATED)
-def create_test_execution(
+async def create_test_execution(
     execution_in: TestExecutionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Create a new test execution record
     """
     # Verify test case exists and user has access
-    test_case = db.query(TestCase).filter(
-        (TestCase.id == execution_in.test_case_id) &
-        (TestCase.created_by == current_user.id)
-    ).first()
-    
-    if not test_case:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test case not found or access denied"
-        )
+    test_case = await _get_own_test_case_or_404(db, execution_in.test_case_id, current_user.id)
     
     execution = TestExecution(
         id=str(uuid.uuid4()),
@@ -48,92 +71,58 @@ def create_test_execution(
     test_case.status = ExecutionStatus.IN_PROGRESS
     test_case.updated_at = datetime.utcnow()
     
-    db.add(execution)
-    db.add(test_case)
-    db.commit()
-    db.refresh(execution)
-    
-    return execution
+    return await Repository(db, TestExecution).add(execution)
 
 @router.get("/{execution_id}", response_model=TestExecutionInDB)
-def get_test_execution(
+async def get_test_execution(
     execution_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get a test execution by ID
     """
-    execution = db.query(TestExecution).join(
-        TestCase,
-        TestExecution.test_case_id == TestCase.id
-    ).filter(
-        (TestExecution.id == execution_id) &
-        (TestCase.created_by == current_user.id)
-    ).first()
-    
-    if not execution:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test execution not found or access denied"
-        )
+    execution = await _get_own_execution_or_404(db, execution_id, current_user.id)
     
     return execution
 
 @router.get("/test-case/{test_case_id}", response_model=List[TestExecutionInDB])
-def get_test_case_executions(
+async def get_test_case_executions(
     test_case_id: str,
+    response: Response,
     limit: int = 100,
     skip: int = 0,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all executions for a test case
+    Get all executions for a test case, newest first
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
     """
     # Verify test case exists and user has access
-    test_case = db.query(TestCase).filter(
-        (TestCase.id == test_case_id) &
-        (TestCase.created_by == current_user.id)
-    ).first()
-    
-    if not test_case:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test case not found or access denied"
-        )
-    
-    executions = db.query(TestExecution).filter(
-        TestExecution.test_case_id == test_case_id
-    ).order_by(
-        TestExecution.started_at.desc()
-    ).offset(skip).limit(limit).all()
+    await _get_own_test_case_or_404(db, test_case_id, current_user.id)
+
+    executions = await Repository(db, TestExecution).page(
+        TestExecution.test_case_id == test_case_id,
+        limit=limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, executions, limit)
     
     return executions
 
 @router.put("/{execution_id}/status/{status}", response_model=TestExecutionInDB)
-def update_execution_status(
+async def update_execution_status(
     execution_id: str,
     status: ExecutionStatus,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Update the status of a test execution
     """
-    execution = db.query(TestExecution).join(
-        TestCase,
-        TestExecution.test_case_id == TestCase.id
-    ).filter(
-        (TestExecution.id == execution_id) &
-        (TestCase.created_by == current_user.id)
-    ).first()
-    
-    if not execution:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test execution not found or access denied"
-        )
+    execution = await _get_own_execution_or_404(db, execution_id, current_user.id)
     
     # Update execution status
     execution.status = status
@@ -144,17 +133,10 @@ def update_execution_status(
         execution.completed_at = datetime.utcnow()
         
         # Update test case status
-        test_case = db.query(TestCase).filter(
-            TestCase.id == execution.test_case_id
-        ).first()
-        
+        test_case = await Repository(db, DBTestCase).get(execution.test_case_id)
+
         if test_case:
             test_case.status = status
             test_case.updated_at = datetime.utcnow()
-            db.add(test_case)
-    
-    db.add(execution)
-    db.commit()
-    db.refresh(execution)
-    
-    return execution
+
+    return await Repository(db, TestExecution).save(execution)
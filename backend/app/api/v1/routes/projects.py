@@ -1,34 +1,55 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
+from app.db.repository import Repository
 from app.models.db_models import Project
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectInDB
 from app.core.security import get_current_user
+from app.api.pagination import set_next_cursor
 from app.models.db_models import User
 
 router = APIRouter()
 
+
+async def _get_own_project_or_404(db: AsyncSession, project_id: int, user_id) -> Project:
+    project = await Repository(db, Project).first(
+        Project.id == project_id,
+        Project.created_by == user_id
+    )
+    if not project:
+        raise HTTPException(
+            status_code=404,
+            detail="Project not found or access denied"
+        )
+    return project
+
 @router.get("/", response_model=List[ProjectInDB])
-def read_projects(
-    skip: int = 0, 
+async def read_projects(
+    response: Response,
+    skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Retrieve projects. Only returns projects the user has access to.
+
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
     """
-    projects = db.query(Project).filter(
-        Project.created_by == current_user.id
-    ).offset(skip).limit(limit).all()
+    projects = await Repository(db, Project).page(
+        Project.created_by == current_user.id,
+        limit=limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, projects, limit)
     return projects
 
 @router.post("/", response_model=ProjectInDB, status_code=status.HTTP_201_CREATED)
-def create_project(
+async def create_project(
     project_in: ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -39,81 +60,46 @@ def create_project(
         created_by=current_user.id,
         is_active=True
     )
-    db.add(project)
-    db.commit()
-    db.refresh(project)
-    return project
+    return await Repository(db, Project).add(project)
 
 @router.get("/{project_id}", response_model=ProjectInDB)
-def read_project(
+async def read_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get project by ID.
     """
-    project = db.query(Project).filter(
-        (Project.id == project_id) & 
-        (Project.created_by == current_user.id)
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=404,
-            detail="Project not found or access denied"
-        )
-    return project
+    return await _get_own_project_or_404(db, project_id, current_user.id)
 
 @router.put("/{project_id}", response_model=ProjectInDB)
-def update_project(
+async def update_project(
     project_id: int,
     project_in: ProjectUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Update a project.
     """
-    project = db.query(Project).filter(
-        (Project.id == project_id) & 
-        (Project.created_by == current_user.id)
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=404,
-            detail="Project not found or access denied"
-        )
-    
+    project = await _get_own_project_or_404(db, project_id, current_user.id)
+
     update_data = project_in.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(project, field, value)
-    
-    db.commit()
-    db.refresh(project)
-    return project
+
+    return await Repository(db, Project).save(project)
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project(
+async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete a project.
     """
-    project = db.query(Project).filter(
-        (Project.id == project_id) & 
-        (Project.created_by == current_user.id)
-    ).first()
-    
-    if not project:
-        raise HTTPException(
-            status_code=404,
-            detail="Project not found or access denied"
-        )
-    
-    db.delete(project)
-    db.commit()
+    project = await _get_own_project_or_404(db, project_id, current_user.id)
+    await Repository(db, Project).delete(project)
     return None
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 import uuid
 
 from app.db import get_db
+from app.db.repository import Repository
+from app.models import db_models as models
 from app.auth.security import get_current_user
+from app.api.pagination import set_next_cursor
 from app.schemas.websocket import Team, TeamCreate, TeamMember, TeamMemberCreate, TeamDetail
 
 # Create a simple namespace for schemas to maintain compatibility
@@ -28,18 +32,15 @@ router = APIRouter(
 @router.post("/", response_model=schemas.Team, status_code=status.HTTP_201_CREATED)
 async def create_team(
     team: schemas.TeamCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Create a new team
     """
     # Check if team name already exists
-    db_team = db.query(models.Team).filter(
-        models.Team.name == team.name
-    ).first()
-    
-    if db_team:
+    teams = Repository(db, models.Team)
+    if await teams.exists(models.Team.name == team.name):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Team with this name already exists"
@@ -55,10 +56,6 @@ async def create_team(
         updated_at=datetime.utcnow()
     )
     
-    db.add(db_team)
-    db.commit()
-    db.refresh(db_team)
-    
     # Add creator as team owner
     db_member = models.TeamMember(
         id=str(uuid.uuid4()),
@@ -69,55 +66,58 @@ async def create_team(
     )
     
     db.add(db_member)
-    db.commit()
-    
-    return db_team
+
+    return await teams.add(db_team)
 
 @router.get("/", response_model=List[schemas.Team])
 async def list_teams(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     List all teams
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
     """
     # Get teams where user is a member
-    teams = db.query(models.Team).join(
+    statement = select(models.Team).join(
         models.TeamMember,
         models.Team.id == models.TeamMember.team_id
-    ).filter(
+    ).where(
         models.TeamMember.user_id == current_user["id"]
-    ).offset(skip).limit(limit).all()
+    )
+    teams = await Repository(db, models.Team).page(
+        statement=statement, limit=limit, cursor=cursor, skip=skip
+    )
+    set_next_cursor(response, teams, limit)
     
     return teams
 
 @router.get("/{team_id}", response_model=schemas.TeamDetail)
 async def get_team(
     team_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Get team details by ID
     """
     # Check if user is a member of the team
-    team_member = db.query(models.TeamMember).filter(
+    if not await Repository(db, models.TeamMember).exists(
         models.TeamMember.team_id == team_id,
         models.TeamMember.user_id == current_user["id"]
-    ).first()
-    
-    if not team_member:
+    ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not a member of this team"
         )
     
     # Get team with members
-    team = db.query(models.Team).filter(
-        models.Team.id == team_id
-    ).first()
+    team = await Repository(db, models.Team).get(team_id)
     
     if not team:
         raise HTTPException(
@@ -126,16 +126,18 @@ async def get_team(
         )
     
     # Get team members
-    members = db.query(
-        models.User,
-        models.TeamMember.role,
-        models.TeamMember.joined_at
-    ).join(
-        models.TeamMember,
-        models.User.id == models.TeamMember.user_id
-    ).filter(
-        models.TeamMember.team_id == team_id
-    ).all()
+    members = (await db.execute(
+        select(
+            models.User,
+            models.TeamMember.role,
+            models.TeamMember.joined_at
+        ).join(
+            models.TeamMember,
+            models.User.id == models.TeamMember.user_id
+        ).where(
+            models.TeamMember.team_id == team_id
+        )
+    )).all()
     
     # Format response
     member_list = [
@@ -162,48 +164,43 @@ async def get_team(
 async def add_team_member(
     team_id: str,
     member: schemas.TeamMemberCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Add a member to a team
     """
     # Check if user has permission to add members (must be team admin or owner)
-    team_member = db.query(models.TeamMember).filter(
+    team_members = Repository(db, models.TeamMember)
+    if not await team_members.exists(
         models.TeamMember.team_id == team_id,
         models.TeamMember.user_id == current_user["id"],
         models.TeamMember.role.in_(["admin", "owner"])
-    ).first()
-    
-    if not team_member:
+    ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You don't have permission to add members to this team"
         )
     
     # Check if team exists
-    team = db.query(models.Team).filter(models.Team.id == team_id).first()
-    if not team:
+    if not await Repository(db, models.Team).exists(models.Team.id == team_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Team not found"
         )
     
     # Check if user exists
-    user = db.query(models.User).filter(models.User.id == member.user_id).first()
-    if not user:
+    if not await Repository(db, models.User).exists(models.User.id == member.user_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
     # Check if user is already a member of the team
-    existing_member = db.query(models.TeamMember).filter(
+    if await team_members.exists(
         models.TeamMember.team_id == team_id,
         models.TeamMember.user_id == member.user_id
-    ).first()
-    
-    if existing_member:
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already a member of this team"
@@ -218,8 +215,6 @@ async def add_team_member(
         joined_at=datetime.utcnow()
     )
     
-    db.add(db_member)
-    db.commit()
-    db.refresh(db_member)
+    await team_members.add(db_member)
     
     return {"message": "Member added to team successfully"}
@@ -1,26 +1,56 @@
-import traceback
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import joinedload
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
 import uuid
 
-from app.db import get_db
+from app.db import get_db, get_read_db
+from app.db.session import AsyncSessionLocal
+from app.core.config import settings
 from app import models
 from app.auth.security import get_current_user
+from app.api.pagination import paginate, set_next_cursor
+from app.api.loaders import (
+    FULL_VIEW, parse_fields, serialize_test_cases, test_case_loader_options
+)
+from app.services import test_case_io
+from app.services.rollups import record_executions_deleted
 from app.schemas.test_case import (
     TestType, Status, Priority, TestStep, TestStepCreate,
-    TestCaseCreate, TestCaseUpdate, TestCaseResponse
+    TestCaseCreate, TestCaseUpdate, TestCaseResponse, TestCaseListItem
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="",  # Prefix is handled in main.py
     tags=["test-cases"],
     responses={404: {"description": "Not found"}},
 )
 
+async def _load_test_case(db: AsyncSession, test_case_id: str):
+    """Load a test case with its steps for a detail response"""
+    result = await db.execute(
+        select(models.TestCase)
+        .options(*test_case_loader_options())
+        .where(models.TestCase.id == test_case_id)
+    )
+    return result.scalars().first()
+
+async def _get_project_or_404(db: AsyncSession, project_id: str):
+    result = await db.execute(
+        select(models.Project.id).where(models.Project.id == project_id)
+    )
+    if result.scalar() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Project with id {project_id} not found"
+        )
+
 @router.post("/", response_model=TestCaseResponse, status_code=status.HTTP_201_CREATED)
 async def create_test_case(
     test_case: TestCaseCreate,
@@ -64,32 +94,46 @@ async def create_test_case(
     
     db.add(db_test_case)
     await db.commit()
-    await db.refresh(db_test_case)
     
     # TODO: Add activity log
     # TODO: Broadcast WebSocket update
     
-    return db_test_case
+    return await _load_test_case(db, db_test_case.id)
 
-@router.get("/", response_model=List[TestCaseResponse])
+@router.get("/", response_model=List[TestCaseListItem], response_model_exclude_unset=True)
 async def list_test_cases(
+    response: Response,
     project_id: Optional[str] = None,
     test_type: Optional[TestType] = None,
     status: Optional[Status] = None,
     limit: int = 100,
     skip: int = 0,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    view: Literal["full", "summary"] = FULL_VIEW,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     List test cases with optional filtering
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
+    
+    - `view=full` (default) returns test cases with their steps
+    - `view=summary` omits steps and the test_data/automation_config blobs
+    - `fields=id,title,...` returns only the listed columns (plus `test_steps`
+      if requested) and takes precedence over `view`
     """
     try:
-        # Log the incoming request
-        print(f"Fetching test cases with filters - project_id: {project_id}, test_type: {test_type}, status: {status}")
+        logger.debug(
+            "Fetching test cases with filters - project_id: %s, test_type: %s, status: %s",
+            project_id, test_type, status
+        )
+        
+        field_list = parse_fields(fields)
         
         # Start building the query
-        stmt = select(models.TestCase).options(joinedload(models.TestCase.test_steps))
+        stmt = select(models.TestCase).options(*test_case_loader_options(view, field_list))
         
         # Apply filters
         if project_id:
@@ -100,32 +144,26 @@ async def list_test_cases(
             stmt = stmt.where(models.TestCase.status == status)
         
         # Apply pagination
-        stmt = stmt.offset(skip).limit(limit)
+        stmt = paginate(stmt, models.TestCase, limit, cursor, skip)
         
         # Execute the query
         result = await db.execute(stmt)
-        test_cases = result.unique().scalars().all()
-        
-        # Log the number of test cases found
-        print(f"Found {len(test_cases)} test cases")
+        test_cases = result.scalars().all()
         
-        # Convert to list to force evaluation and catch any serialization errors
-        test_cases_list = list(test_cases)
+        logger.debug("Found %d test cases", len(test_cases))
         
-        # Log the first test case (if any) for debugging
-        if test_cases_list:
-            print(f"First test case: {test_cases_list[0].__dict__}")
+        set_next_cursor(response, test_cases, limit)
         
-        return test_cases_list
+        return serialize_test_cases(test_cases, view, field_list)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        # Log the full error with traceback
-        print(f"Error in list_test_cases: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.error(f"Error in list_test_cases: {str(e)}", exc_info=True)
         
-        # Return a more detailed error response
+        # Return a more detailed error response (the status parameter shadows fastapi.status here)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=500,
             detail={
                 "message": "Failed to fetch test cases",
                 "error": str(e),
@@ -133,6 +171,62 @@ async def list_test_cases(
             }
         )
 
+@router.post("/import", response_model=Dict[str, Any])
+async def import_test_cases(
+    request: Request,
+    project_id: str,
+    format: Literal["ndjson", "csv"] = test_case_io.NDJSON,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Bulk import test cases into a project from a streamed request body
+    
+    - `format=ndjson`: one TestCaseCreate object per line
+    - `format=csv`: header row with TestCaseCreate fields, `test_steps` as a JSON array
+    
+    Valid records are inserted in batches; invalid ones are reported by line.
+    """
+    await _get_project_or_404(db, project_id)
+    
+    parser = test_case_io.parse_csv if format == test_case_io.CSV else test_case_io.parse_ndjson
+    return await test_case_io.import_test_cases(
+        db,
+        parser(request.stream()),
+        project_id,
+        current_user["id"],
+        batch_size=settings.TEST_CASE_IMPORT_BATCH_SIZE
+    )
+
+@router.get("/export")
+async def export_test_cases(
+    project_id: str,
+    format: Literal["ndjson", "csv"] = test_case_io.NDJSON,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Stream every test case of a project, with steps, as NDJSON or CSV
+    
+    The output can be fed back into POST /import.
+    """
+    await _get_project_or_404(db, project_id)
+    
+    async def body():
+        # The request session is closed before the body is streamed
+        async with AsyncSessionLocal() as session:
+            async for chunk in test_case_io.export_test_cases(
+                session, project_id, format, settings.TEST_CASE_EXPORT_BATCH_SIZE
+            ):
+                yield chunk
+    
+    media_type = "text/csv" if format == test_case_io.CSV else "application/x-ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="test-cases-{project_id}.{format}"'}
+    )
+
 @router.get("/{test_case_id}", response_model=TestCaseResponse)
 async def get_test_case(
     test_case_id: str,
@@ -142,12 +236,7 @@ async def get_test_case(
     """
     Get a test case by ID
     """
-    stmt = select(models.TestCase).options(
-        joinedload(models.TestCase.test_steps)
-    ).where(models.TestCase.id == test_case_id)
-    
-    result = await db.execute(stmt)
-    test_case = result.unique().scalars().first()
+    test_case = await _load_test_case(db, test_case_id)
     
     if not test_case:
         raise HTTPException(
@@ -188,9 +277,8 @@ async def update_test_case(
     
     db.add(db_test_case)
     await db.commit()
-    await db.refresh(db_test_case)
     
-    return db_test_case
+    return await _load_test_case(db, test_case_id)
 
 @router.delete("/{test_case_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_test_case(
@@ -212,6 +300,10 @@ async def delete_test_case(
             detail=f"Test case with id {test_case_id} not found"
         )
     
+    # Its executions go with it, out of the project's daily rollups first
+    executions_of_case = models.TestExecution.test_case_id == test_case_id
+    await record_executions_deleted(db, executions_of_case)
+    await db.execute(delete(models.TestExecution).where(executions_of_case))
     await db.delete(db_test_case)
     await db.commit()
     
@@ -2,14 +2,20 @@ from .security import (
     get_current_user,
     get_password_hash,
     verify_password,
+    get_password_hash_async,
+    verify_password_async,
     create_access_token,
-    AuthService
+    AuthService,
+    principal_cache
 )
 
 __all__ = [
     'get_current_user',
     'get_password_hash',
     'verify_password',
+    'get_password_hash_async',
+    'verify_password_async',
     'create_access_token',
-    'AuthService'
+    'AuthService',
+    'principal_cache'
 ]
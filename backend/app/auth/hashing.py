@@ -0,0 +1,93 @@
+"""
+Bounded worker pool for password hashing.
+
+bcrypt is deliberately slow (~250 ms per call at the default cost), so it
+must never run on the event loop. Calls are executed on a dedicated,
+size-limited thread pool (the bcrypt backend releases the GIL), and the
+number of calls admitted at once is capped so that a login storm queues
+here, or is rejected, instead of piling up unbounded work.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashPoolBusy(Exception):
+    """Raised when a hashing call could not be admitted within the queue timeout"""
+
+
+class PasswordHashPool:
+    def __init__(self, max_workers: int = 4, max_pending: int = 64, queue_timeout: float = 5.0):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hash"
+            )
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """
+        Run a hashing function on the pool.
+
+        At most ``max_pending`` calls are admitted at once (running or queued
+        for a worker); further callers wait up to ``queue_timeout`` seconds for
+        a slot.
+
+        Raises:
+            PasswordHashPoolBusy: If no slot became available in time
+        """
+        self._ensure_started()
+        queued_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning("Password hash pool saturated, rejecting request")
+            raise PasswordHashPoolBusy("Password hashing capacity exhausted")
+
+        self._in_flight += 1
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.total_run_seconds += time.perf_counter() - started_at
+            self.completed += 1
+            self._in_flight -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": (self.total_wait_seconds / self.completed * 1000) if self.completed else 0.0,
+            "avg_run_ms": (self.total_run_seconds / self.completed * 1000) if self.completed else 0.0,
+        }
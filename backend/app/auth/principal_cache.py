@@ -0,0 +1,179 @@
+"""
+TTL/LRU cache of authenticated principals keyed by access token.
+
+A token is only cached after it has been decoded and its user loaded, so a
+hit skips both JWT verification and the ``users`` lookup. Entries expire
+after the configured TTL or at the token's own ``exp`` claim, whichever
+comes first, and every entry of a user is dropped when that user changes.
+
+Each worker process holds its own cache. With a backplane (see
+``app.websocket.backplane``) an invalidation published by one worker is
+applied by all the others; without one, the other workers may keep serving
+a changed user's principal for up to ``ttl_seconds``.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.websocket.backplane import Backplane, Envelope
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 60, backplane: Optional[Backplane] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # Pub/sub channel to the caches of other workers (None: this worker only)
+        self.backplane = backplane
+        self.node_id = uuid.uuid4().hex
+        self._publishing: Set[asyncio.Task] = set()
+        # token -> (expires_at, principal), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # user_id -> tokens cached for that user, for invalidation
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.invalidations_published = 0
+        self.invalidations_received = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl_seconds > 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return the cached principal for a token, or None on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return principal
+
+    def set(self, token: str, principal: Dict[str, Any], token_expires_at: Optional[float] = None) -> None:
+        """
+        Cache a principal for a token.
+
+        Args:
+            token: The raw access token
+            principal: User info returned by get_current_user
+            token_expires_at: The token's ``exp`` claim as a UNIX timestamp
+        """
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (time.monotonic() + ttl, principal)
+            self._tokens_by_user.setdefault(principal["id"], set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: str, publish: bool = False) -> None:
+        """
+        Drop every cached token of a user
+
+        Args:
+            publish: Also have the other workers drop them, through the
+                backplane (call once the user's change is committed)
+        """
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, set()):
+                self._entries.pop(token, None)
+                self.invalidations += 1
+        if publish and self.backplane is not None:
+            self._publish({"origin": self.node_id, "user_id": user_id})
+
+    async def start(self) -> None:
+        """Subscribe to the backplane, if any"""
+        if self.backplane is not None:
+            await self.backplane.start(self._on_backplane_message)
+
+    async def stop(self) -> None:
+        if self.backplane is not None:
+            await asyncio.gather(*self._publishing, return_exceptions=True)
+            await self.backplane.stop()
+
+    def _publish(self, envelope: Envelope) -> None:
+        # Invalidations come from synchronous ORM events: publish in the background
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning(f"No event loop to publish the invalidation of user {envelope['user_id']}")
+            return
+        task = loop.create_task(self.backplane.publish(envelope))
+        self._publishing.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task) -> None:
+        self._publishing.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error(f"Error publishing principal invalidation: {str(task.exception())}")
+        else:
+            self.invalidations_published += 1
+
+    async def _on_backplane_message(self, envelope: Envelope) -> None:
+        if envelope.get("origin") == self.node_id:
+            return
+        self.invalidations_received += 1
+        self.invalidate_user(envelope["user_id"])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "invalidations_published": self.invalidations_published,
+            "invalidations_received": self.invalidations_received,
+        }
+
+    def _remove(self, token: str) -> None:
+        # Caller must hold the lock
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[1]["id"]
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
@@ -1,17 +1,17 @@
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, HTTPException, status, Request, WebSocket
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer
-from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 import os
 import logging
 import traceback
 import re
-from sqlalchemy import select
+from sqlalchemy import select, event
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from sqlalchemy.exc import SQLAlchemyError
 from app.db import get_db
 from app.models import User
@@ -25,16 +25,43 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")  # Change this in p
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
 # Import SQLAlchemy models
 from app.models import db_models as models
-from app.db.session import get_db
+from app.db.session import AsyncSessionLocal, get_db
+from app.core.config import settings
+from app.core.metrics import register_metrics_source
+from app.auth.principal_cache import PrincipalCache
+from app.auth.hashing import PasswordHashPool, PasswordHashPoolBusy
+from app.websocket.backplane import create_backplane
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt runs here instead of on the event loop, see app/auth/hashing.py
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS
+)
+register_metrics_source("password_hash_pool", password_hash_pool.stats)
 
 security = HTTPBearer()
 
+# Cache of verified tokens -> principals, see get_current_user; invalidations
+# reach the other workers through the same backplane as WebSocket events
+principal_cache = PrincipalCache(
+    max_size=settings.AUTH_CACHE_MAX_SIZE,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    backplane=create_backplane(settings.WS_BACKPLANE, settings.REDIS_URL, channel="principal_invalidations")
+)
+register_metrics_source("auth_principal_cache", principal_cache.stats)
+
 # Email validation regex
 EMAIL_REGEX = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]{2,}$'
 
@@ -81,6 +108,64 @@ def get_password_hash(password: str) -> str:
         logger.debug(traceback.format_exc())
         raise
 
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    if not plain_password or not hashed_password:
+        logger.warning("Empty password or hash provided for verification")
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def _run_on_hash_pool(func, *args):
+    try:
+        return await password_hash_pool.run(func, *args)
+    except PasswordHashPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service is busy, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the password hash pool.
+    
+    Args:
+        plain_password: The plain text password to verify
+        hashed_password: The hashed password to verify against
+        
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the password matches, and a
+        replacement hash when the stored one uses outdated cost parameters
+        
+    Raises:
+        HTTPException: 503 if the hash pool is saturated
+    """
+    try:
+        return await _run_on_hash_pool(_verify_and_update, plain_password, hashed_password)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error verifying password: {str(e)}")
+        logger.debug(traceback.format_exc())
+        return False, None
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the password hash pool.
+    
+    Args:
+        password: The plain text password to hash
+        
+    Returns:
+        str: The hashed password
+        
+    Raises:
+        ValueError: If password is empty or None
+        HTTPException: 503 if the hash pool is saturated
+    """
+    if not password:
+        raise ValueError("Password cannot be empty")
+    return await _run_on_hash_pool(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -120,6 +205,9 @@ async def get_current_user(
     """
     Get the current authenticated user from the JWT token.
     
+    Tokens that were already verified are answered from principal_cache
+    without decoding the JWT or querying the database.
+    
     Args:
         request: The FastAPI request object
         token: The JWT token from the Authorization header
@@ -137,24 +225,20 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # Hot path: token already verified and its user loaded
+    cached_user = principal_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    
     try:
-        # Log the request for debugging
-        logger.info(f"\n{'='*80}")
-        logger.info(f"Authenticating request to {request.url}")
-        logger.info(f"Token: {token[:20]}...")
-        
         # Decode the JWT token
         try:
-            logger.info("Decoding JWT token...")
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            logger.info(f"Decoded payload: {payload}")
             
             user_id: str = payload.get("sub")
             if not user_id:
                 logger.warning("No user_id (sub) in token payload")
                 raise credentials_exception
-                
-            logger.info(f"Looking up user with ID: {user_id}")
             
             # Get user from database using async query
             result = await db.execute(
@@ -162,12 +246,11 @@ async def get_current_user(
             )
             user = result.scalars().first()
             
-            if not user:
-                logger.warning(f"User not found for ID: {user_id}")
+            if not user or user.is_active is False:
+                logger.warning("User not found or inactive for ID: %s", user_id)
                 raise credentials_exception
                 
-            # Log successful authentication
-            logger.info(f"Successfully authenticated user: {user.email} (ID: {user.id})")
+            logger.debug("Authenticated user %s on %s", user.id, request.url.path)
             
             # Return user info in the expected format
             user_info = {
@@ -179,18 +262,15 @@ async def get_current_user(
                 "updated_at": user.updated_at.isoformat() if user.updated_at else None
             }
             
-            logger.info(f"Returning user info: {user_info}")
+            principal_cache.set(token, user_info, payload.get("exp"))
             return user_info
             
         except JWTError as je:
-            logger.error(f"JWT validation error: {str(je)}")
-            logger.error(f"Token: {token}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.warning(f"JWT validation error: {str(je)}")
             raise credentials_exception
             
     except HTTPException:
         # Re-raise HTTP exceptions
-        logger.error(f"HTTP Exception during authentication: {traceback.format_exc()}")
         raise
         
     except Exception as e:
@@ -201,6 +281,48 @@ async def get_current_user(
             detail=f"An error occurred during authentication: {str(e)}"
         )
 
+
+async def authenticate_websocket(websocket: WebSocket) -> Optional[Dict[str, Any]]:
+    """
+    The user of a WebSocket handshake, or None if it is not authenticated.
+
+    Browsers cannot set headers on WebSocket handshakes, so the access token
+    is read from the ``token`` query parameter, or else from a bearer
+    ``Authorization`` header. Verified like get_current_user (and answered
+    from principal_cache when the token is cached).
+    """
+    token = websocket.query_params.get("token")
+    if not token:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    if not token:
+        return None
+    async with AsyncSessionLocal() as db:
+        try:
+            return await get_current_user(websocket, token, db)
+        except HTTPException:
+            return None
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_principal(mapper, connection, target):
+    """Drop cached principals of a user whenever the user row changes or is deleted"""
+    principal_cache.invalidate_user(str(target.id))
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(str(target.id))
+
+@event.listens_for(Session, "after_commit")
+def _publish_principal_invalidations(session):
+    """Once the change is committed, drop the user's principals on every worker"""
+    for user_id in session.info.pop("changed_user_ids", ()):
+        principal_cache.invalidate_user(user_id, publish=True)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidations(session):
+    session.info.pop("changed_user_ids", None)
+
 class AuthService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -315,7 +437,7 @@ class AuthService:
             
             # Hash password
             logger.debug("[AUTH_SERVICE] Hashing password")
-            hashed_password = get_password_hash(user_data['password'])
+            hashed_password = await get_password_hash_async(user_data['password'])
             logger.debug("[AUTH_SERVICE] Password hashed successfully")
             
             # Create user object
@@ -353,7 +475,7 @@ class AuthService:
             logger.warning(f"[AUTH_SERVICE] Validation error: {str(he.detail)}")
             raise
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"[AUTH_SERVICE] Error creating user: {str(e)}")
             logger.error(f"[AUTH_SERVICE] Error type: {type(e).__name__}")
             logger.error(f"[AUTH_SERVICE] Traceback: {traceback.format_exc()}")
@@ -379,7 +501,7 @@ class AuthService:
             return None
             
         try:
-            user = self.db.query(models.User).filter(models.User.id == user_id).first()
+            user = await self.db.get(models.User, user_id)
             
             if user:
                 user_dict = {
@@ -471,7 +593,8 @@ class AuthService:
             
             # Verify password
             logger.debug("[AUTH_SERVICE] Verifying password")
-            if not verify_password(password, user.hashed_password):
+            is_valid, new_hash = await verify_password_async(password, user.hashed_password)
+            if not is_valid:
                 logger.warning(f"[AUTH_SERVICE] Authentication failed: Incorrect password for email: {email}")
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -480,6 +603,12 @@ class AuthService:
                 )
                 
             logger.debug("[AUTH_SERVICE] Password verified successfully")
+            
+            # Upgrade hashes created with outdated cost parameters
+            if new_hash:
+                logger.info(f"[AUTH_SERVICE] Rehashing password for user ID: {user.id}")
+                user.hashed_password = new_hash
+                await self.db.commit()
                 
             # Convert to dict and remove sensitive data
             user_dict = {
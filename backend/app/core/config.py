@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 from pydantic import field_validator, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
@@ -79,6 +79,83 @@ class Settings(BaseSettings):
     # Security
     SECURITY_PASSWORD_SALT: str = "your-password-salt-here"
     
+    # Password hashing: bcrypt cost and the worker pool it runs on.
+    # Hashes with a different cost are transparently rehashed on login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    
+    # Authenticated principal cache (set either to 0 to disable). A user's
+    # changes drop their entries on every worker through WS_BACKPLANE; with
+    # no backplane, other workers may serve them until the TTL runs out.
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 10000
+    
+    # Bulk test case import/export (rows per INSERT batch / per cursor fetch)
+    TEST_CASE_IMPORT_BATCH_SIZE: int = 500
+    TEST_CASE_EXPORT_BATCH_SIZE: int = 1000
+    
+    # WebSockets: per-send deadline before a slow connection is evicted
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    # Per-connection outbound queue; overflow policy is drop_oldest, coalesce or disconnect
+    WS_OUTBOUND_QUEUE_SIZE: int = 256
+    WS_OVERFLOW_POLICY: str = "drop_oldest"
+    # Admission control: connections per user and per worker (0: unlimited)
+    WS_MAX_CONNECTIONS_PER_USER: int = 20
+    WS_MAX_CONNECTIONS_PER_WORKER: int = 10000
+    # Pub/sub backplane relaying events between workers: none, memory or redis
+    WS_BACKPLANE: str = "none"
+    REDIS_URL: Optional[str] = None
+    # Coalescing window of test_execution_update events per room type (0: send each
+    # update as it happens) and the batch size that flushes a window early
+    WS_EXECUTION_UPDATE_WINDOWS_MS: Dict[str, int] = {"project": 100, "testcase": 250}
+    WS_EXECUTION_UPDATE_MAX_BATCH: int = 200
+    # Recent events kept per room for clients resuming after a reconnect (0 disables)
+    WS_ROOM_LOG_SIZE: int = 200
+    WS_ROOM_LOG_MAX_ROOMS: int = 10000
+    # Cached project -> subscribed users index used to scope dashboard events;
+    # membership changes drop entries on every worker through WS_BACKPLANE
+    PROJECT_SUBSCRIBER_CACHE_TTL_SECONDS: int = 300
+    PROJECT_SUBSCRIBER_CACHE_MAX_SIZE: int = 10000
+    
+    # Database query instrumentation: per-request query count/time and histograms,
+    # slow query log threshold (0 disables), per-request figures in response
+    # headers (debugging only) and SQLAlchemy's statement echo
+    DB_QUERY_STATS: bool = True
+    DB_SLOW_QUERY_MS: float = 500.0
+    DB_QUERY_HEADERS: bool = False
+    SQL_ECHO: bool = False
+
+    # Read replicas (comma-separated URLs, none by default) serving read-only
+    # endpoints: selection (round_robin or least_connections), replicas lagging
+    # more than the maximum are skipped in favour of the primary, and a client
+    # reads from the primary for a while after its own writes (a signed
+    # read_after cookie, so it holds across worker processes)
+    DATABASE_REPLICA_URLS: Union[str, List[str]] = []
+    DB_REPLICA_SELECTION: str = "round_robin"
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    @field_validator("DATABASE_REPLICA_URLS", mode="before")
+    @classmethod
+    def parse_replica_urls(cls, v: Union[str, List[str]]) -> List[str]:
+        if isinstance(v, str):
+            return [url.strip() for url in v.split(",") if url.strip()]
+        return v
+
+    # Execution engine
+    EXECUTION_WORKERS: int = 8
+    EXECUTION_PER_ENVIRONMENT_CONCURRENCY: int = 4
+    EXECUTION_REQUEST_TIMEOUT_SECONDS: float = 30.0
+    # Pooled HTTP client per environment used by API test steps
+    EXECUTION_HTTP_MAX_CONNECTIONS: int = 20
+    EXECUTION_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    EXECUTION_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    EXECUTION_HTTP_IDLE_CLIENT_SECONDS: float = 300.0
+    EXECUTION_HTTP2: bool = True
+    
     # Testing
     TESTING: bool = False
 
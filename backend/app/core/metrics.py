@@ -0,0 +1,30 @@
+"""
+In-process metrics registry.
+
+Components register a zero-argument callable returning a dict of their
+current counters/gauges; ``collect_metrics`` snapshots all of them for the
+``/api/metrics`` endpoint.
+"""
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics_source(name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+    """Register (or replace) the collector reported under ``name``"""
+    _sources[name] = collector
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """Snapshot every registered metrics source"""
+    snapshot = {}
+    for name, collector in list(_sources.items()):
+        try:
+            snapshot[name] = collector()
+        except Exception as e:
+            logger.error(f"Error collecting metrics for {name}: {str(e)}")
+            snapshot[name] = {"error": str(e)}
+    return snapshot
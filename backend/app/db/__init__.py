@@ -1,7 +1,8 @@
-from .session import SessionLocal, engine, get_db
+from .session import SessionLocal, engine, get_db, get_read_db
 
 __all__ = [
     'SessionLocal',
     'engine',
-    'get_db'
+    'get_db',
+    'get_read_db'
 ]
@@ -0,0 +1,186 @@
+"""
+Query instrumentation hooked on engine events.
+
+Every statement executed through an instrumented engine is timed between
+``before_cursor_execute`` and ``after_cursor_execute`` (two clock reads, no
+logging on the normal path; ``handle_error`` ends the timing of a statement
+that failed) and recorded:
+
+* on the ``RequestQueries`` of the current request, if any, set by
+  ``QueryInstrumentation.track`` (the HTTP middleware does this), so the
+  request's query count and total DB time can be logged or returned in
+  response headers;
+* in process-wide histograms of statement duration and of per-request
+  query count / DB time, exposed on the metrics endpoint;
+* in the slow query log when it exceeds the threshold, keyed by a
+  normalized SQL fingerprint (literals and bind values stripped, ``IN``
+  lists collapsed) so the same query shape is aggregated whatever its
+  parameters.
+"""
+import logging
+import re
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import register_metrics_source
+
+slow_query_logger = logging.getLogger("app.db.slow_queries")
+
+# Upper bounds of the histogram buckets; bucket i counts values <= BOUNDS[i],
+# the last bucket is open-ended
+STATEMENT_MS_BOUNDS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+REQUEST_MS_BOUNDS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+REQUEST_QUERIES_BOUNDS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Slow statements kept on a request (for headers/logging), distinct slow
+# fingerprints counted, and the ones reported in the metrics
+MAX_SLOW_PER_REQUEST = 10
+MAX_SLOW_FINGERPRINTS = 1000
+TOP_SLOW_FINGERPRINTS = 20
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\(\w+\)s|\$\d+|(?<!:):\w+|\?|%s")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+# SQLAlchemy's expanding IN renders as a bind per element: (__[POSTCOMPILE_x])
+_POSTCOMPILE = re.compile(r"\(?__\[POSTCOMPILE_\w+\]\)?")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a SQL statement so queries differing only in values compare equal"""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _POSTCOMPILE.sub("(?)", sql)
+    sql = _PARAMETER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class Histogram:
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {"count": self.count, "sum": round(self.sum, 3), "buckets": buckets}
+
+
+@dataclass
+class RequestQueries:
+    """Queries executed while handling one request"""
+    count: int = 0
+    total_ms: float = 0.0
+    # (fingerprint, duration in ms) of the slow statements
+    slow: List[Tuple[str, float]] = field(default_factory=list)
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+class QueryInstrumentation:
+    """
+    Args:
+        slow_query_ms: Statements slower than this are logged and counted
+            per fingerprint (0 disables the slow query log)
+    """
+
+    def __init__(self, slow_query_ms: float = 200):
+        self.slow_query_ms = slow_query_ms
+        self.statement_ms = Histogram(STATEMENT_MS_BOUNDS)
+        self.request_ms = Histogram(REQUEST_MS_BOUNDS)
+        self.request_queries = Histogram(REQUEST_QUERIES_BOUNDS)
+        self.slow_fingerprints: Counter = Counter()
+        self.statements = 0
+        self.slow_statements = 0
+        self.failed_statements = 0
+
+    def install(self, engine: Engine) -> None:
+        """Time every statement executed on a (sync) engine; pass ``async_engine.sync_engine``"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append((context, time.perf_counter()))
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        _, started = conn.info["query_started_at"].pop()
+        self.record(statement, (time.perf_counter() - started) * 1000)
+
+    def _handle_error(self, exception_context):
+        # No after_cursor_execute follows a failed statement: drop its start
+        # time, unless it failed before reaching the cursor (nothing was pushed)
+        conn = exception_context.connection
+        started_at = conn.info.get("query_started_at") if conn is not None else None
+        if started_at and started_at[-1][0] is exception_context.execution_context:
+            started_at.pop()
+            self.failed_statements += 1
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.statements += 1
+        self.statement_ms.observe(duration_ms)
+
+        queries = _current.get()
+        if queries is not None:
+            queries.count += 1
+            queries.total_ms += duration_ms
+
+        if self.slow_query_ms and duration_ms >= self.slow_query_ms:
+            self.slow_statements += 1
+            key = fingerprint(statement)
+            if key in self.slow_fingerprints or len(self.slow_fingerprints) < MAX_SLOW_FINGERPRINTS:
+                self.slow_fingerprints[key] += 1
+            if queries is not None and len(queries.slow) < MAX_SLOW_PER_REQUEST:
+                queries.slow.append((key, duration_ms))
+            slow_query_logger.warning(
+                "Slow query (%.1f ms): %s", duration_ms, key,
+                extra={"duration_ms": duration_ms, "fingerprint": key}
+            )
+
+    @contextmanager
+    def track(self) -> Iterator[RequestQueries]:
+        """Collect the queries run in this context (and tasks started from it)"""
+        queries = RequestQueries()
+        token = _current.set(queries)
+        try:
+            yield queries
+        finally:
+            _current.reset(token)
+            self.request_queries.observe(queries.count)
+            self.request_ms.observe(queries.total_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        return {
+            "statements": self.statements,
+            "slow_statements": self.slow_statements,
+            "failed_statements": self.failed_statements,
+            "slow_query_ms": self.slow_query_ms,
+            "statement_ms": self.statement_ms.snapshot(),
+            "request_ms": self.request_ms.snapshot(),
+            "request_queries": self.request_queries.snapshot(),
+            "slow_fingerprints": dict(self.slow_fingerprints.most_common(TOP_SLOW_FINGERPRINTS)),
+        }
+
+
+query_instrumentation = QueryInstrumentation(slow_query_ms=settings.DB_SLOW_QUERY_MS)
+register_metrics_source("db_queries", query_instrumentation.stats)
@@ -0,0 +1,246 @@
+"""
+Query plan checks for the hot paths.
+
+``HOT_PATHS`` rebuilds the statements the busiest endpoints issue, with the
+same helpers they use (``paginate``, ``accessible_project_ids``), and
+``sequential_scans`` runs ``EXPLAIN`` on each of them to report the tables
+read in full. On PostgreSQL sequential scans are disabled for the
+``EXPLAIN``, so a ``Seq Scan`` left in the plan means no index can serve the
+predicate whatever the table sizes; on SQLite a ``SCAN <table>`` that uses
+no index is reported.
+
+When an endpoint query changes shape, update its entry here: the check is
+run by the test suite and by ``scripts/check_query_plans.py`` against a
+seeded (or real) database.
+"""
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.sql import Executable
+
+from app.api.pagination import paginate
+from app.db.base import Base
+from app.models.db_models import (
+    ActivityLog, Attachment, Comment, Environment, ExecutionDailyRollup, ExecutionStatus,
+    Priority, Project, Status, Team, TeamMember, TestCase, TestExecution, TestType, User
+)
+from app.services.dashboard import accessible_project_ids
+
+# Ids of seeded rows the hot path statements filter on
+Keys = Dict[str, str]
+
+HOT_PATHS: Dict[str, Callable[[Keys], Executable]] = {
+    "projects.list": lambda keys: paginate(
+        select(Project).where(Project.created_by == keys["user_id"]), Project, 100
+    ),
+    "projects.get": lambda keys: select(Project).where(
+        Project.id == keys["project_id"],
+        Project.id.in_(accessible_project_ids(keys["user_id"]))
+    ).limit(1),
+    "projects.test_case_count": lambda keys: select(func.count()).select_from(TestCase).where(
+        TestCase.project_id == keys["project_id"]
+    ),
+    "projects.environment_count": lambda keys: select(func.count()).select_from(Environment).where(
+        Environment.project_id == keys["project_id"]
+    ),
+    "projects.last_execution": lambda keys: select(func.max(TestExecution.started_at))
+        .join(TestCase, TestExecution.test_case_id == TestCase.id)
+        .where(TestCase.project_id == keys["project_id"]),
+    "test_cases.list": lambda keys: paginate(
+        select(TestCase).where(TestCase.project_id == keys["project_id"]), TestCase, 100
+    ),
+    "test_cases.list_by_status": lambda keys: paginate(
+        select(TestCase).where(
+            TestCase.project_id == keys["project_id"],
+            TestCase.status == Status.ACTIVE
+        ),
+        TestCase, 100
+    ),
+    "test_cases.list_by_status_and_type": lambda keys: paginate(
+        select(TestCase).where(
+            TestCase.project_id == keys["project_id"],
+            TestCase.test_type == TestType.API,
+            TestCase.status == Status.ACTIVE
+        ),
+        TestCase, 100
+    ),
+    "test_executions.list": lambda keys: paginate(
+        select(TestExecution).where(TestExecution.test_case_id == keys["test_case_id"]), TestExecution, 100
+    ),
+    "test_executions.get_own": lambda keys: select(TestExecution).where(
+        TestExecution.id == keys["execution_id"],
+        TestExecution.test_case_id.in_(select(TestCase.id).where(TestCase.created_by == keys["user_id"]))
+    ).limit(1),
+    "comments.list": lambda keys: paginate(
+        select(Comment).where(Comment.test_case_id == keys["test_case_id"]), Comment, 100
+    ),
+    "attachments.list": lambda keys: select(Attachment).where(
+        Attachment.entity_type == "test_case",
+        Attachment.entity_id == keys["test_case_id"]
+    ),
+    "teams.list": lambda keys: paginate(
+        select(Team).join(TeamMember, Team.id == TeamMember.team_id).where(TeamMember.user_id == keys["user_id"]),
+        Team, 100
+    ),
+    "teams.membership": lambda keys: select(TeamMember.id).where(
+        TeamMember.team_id == keys["team_id"],
+        TeamMember.user_id == keys["user_id"]
+    ).limit(1),
+    "teams.members": lambda keys: select(User, TeamMember.role, TeamMember.joined_at)
+        .join(TeamMember, User.id == TeamMember.user_id)
+        .where(TeamMember.team_id == keys["team_id"]),
+    "environments.in_use": lambda keys: select(TestExecution.id).where(
+        TestExecution.environment_id == keys["environment_id"]
+    ).limit(1),
+    "dashboard.test_case_count": lambda keys: select(func.count(TestCase.id)).where(
+        TestCase.project_id.in_(accessible_project_ids(keys["user_id"]).scalar_subquery())
+    ),
+    "dashboard.rollups": lambda keys: select(func.sum(ExecutionDailyRollup.completed_count)).where(
+        ExecutionDailyRollup.project_id.in_(accessible_project_ids(keys["user_id"]).scalar_subquery())
+    ),
+    "dashboard.activity": lambda keys: paginate(select(ActivityLog), ActivityLog, 50),
+}
+
+# A full table read in SQLite's EXPLAIN QUERY PLAN ("SCAN t" / "SCAN t AS a",
+# as opposed to "SCAN t USING INDEX ..." or "SEARCH ...")
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+def _walk_postgres_plan(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _walk_postgres_plan(child)
+
+
+async def sequential_scans(conn: AsyncConnection, statement: Executable) -> List[str]:
+    """Tables the statement reads in full, according to the database's plan"""
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+
+    if conn.dialect.name == "postgresql":
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return [
+            node["Relation Name"]
+            for node in _walk_postgres_plan(plan[0]["Plan"])
+            if node["Node Type"] == "Seq Scan"
+        ]
+
+    tables = []
+    for row in await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"):
+        match = _SQLITE_SCAN.match(row[-1])
+        if match and match.group(1) in Base.metadata.tables:
+            tables.append(match.group(1))
+    return tables
+
+
+async def check_hot_paths(conn: AsyncConnection, keys: Keys) -> Dict[str, List[str]]:
+    """
+    Explain every hot path.
+
+    Returns:
+        Dict[str, List[str]]: Hot paths doing sequential scans, with the
+        tables they scan (empty when every path is served by indexes)
+    """
+    failures = {}
+    for name, build in HOT_PATHS.items():
+        tables = await sequential_scans(conn, build(keys))
+        # Ends the transaction, and the SET LOCAL with it
+        await conn.rollback()
+        if tables:
+            failures[name] = tables
+    return failures
+
+
+async def seed(db: AsyncSession, projects: int = 2, test_cases: int = 20, executions: int = 5) -> Keys:
+    """
+    Fill an empty database with related rows for every hot path table.
+
+    Args:
+        db: Async database session
+        projects: Projects created (half of them owned by a team)
+        test_cases: Test cases per project
+        executions: Executions per test case
+
+    Returns:
+        Keys: Ids the hot path statements filter on
+    """
+    now = datetime.utcnow()
+    owner = User(email="plans-owner@example.com", full_name="Owner", hashed_password="x")
+    member = User(email="plans-member@example.com", full_name="Member", hashed_password="x")
+    db.add_all([owner, member])
+    await db.flush()
+
+    team = Team(name="plans-team", created_by=owner.id)
+    db.add(team)
+    await db.flush()
+    db.add_all([
+        TeamMember(team_id=team.id, user_id=owner.id, role="owner"),
+        TeamMember(team_id=team.id, user_id=member.id),
+    ])
+
+    statuses, types, execution_statuses = list(Status), list(TestType), list(ExecutionStatus)
+    keys: Keys = {"user_id": owner.id, "team_id": team.id}
+    for project_index in range(projects):
+        project = Project(
+            name=f"plans-project-{project_index}",
+            created_by=owner.id,
+            team_id=team.id if project_index % 2 else None,
+            created_at=now - timedelta(days=project_index)
+        )
+        db.add(project)
+        await db.flush()
+        environment = Environment(name="staging", base_url="http://localhost", project_id=project.id)
+        db.add(environment)
+        await db.flush()
+        keys.setdefault("project_id", project.id)
+        keys.setdefault("environment_id", environment.id)
+
+        cases = [
+            TestCase(
+                title=f"case-{project_index}-{index}",
+                project_id=project.id,
+                created_by=owner.id,
+                status=statuses[index % len(statuses)],
+                test_type=types[index % len(types)],
+                priority=Priority.MEDIUM,
+                created_at=now - timedelta(minutes=index)
+            )
+            for index in range(test_cases)
+        ]
+        db.add_all(cases)
+        await db.flush()
+        keys.setdefault("test_case_id", cases[0].id)
+
+        for case in cases:
+            runs = [
+                TestExecution(
+                    test_case_id=case.id,
+                    executed_by=owner.id,
+                    environment_id=environment.id if index % 2 else None,
+                    status=execution_statuses[index % len(execution_statuses)],
+                    started_at=now - timedelta(minutes=index),
+                    created_at=now - timedelta(minutes=index)
+                )
+                for index in range(executions)
+            ]
+            db.add_all(runs)
+            db.add(Comment(test_case_id=case.id, user_id=owner.id, user_name="Owner", content="Looks good"))
+            db.add(Attachment(
+                file_name="log.txt", file_path="uploads/log.txt", file_size=1, file_type="txt",
+                entity_type="test_case", entity_id=case.id, uploaded_by=owner.id
+            ))
+            db.add(ActivityLog(
+                user_id=owner.id, user_name="Owner", action="create",
+                target_type="test_case", target_id=case.id, target_name=case.title
+            ))
+            await db.flush()
+            keys.setdefault("execution_id", runs[0].id)
+
+    await db.commit()
+    return keys
@@ -0,0 +1,221 @@
+"""
+Routing of read-only sessions to read replicas.
+
+``ReplicaRouter`` hands out sessions for read-only endpoints (see
+``session.get_read_db``). Each one is bound to a replica picked round-robin
+or by fewest sessions in use, among the replicas whose last lag check
+succeeded and was within ``max_lag_seconds``; with none available (or none
+configured) the primary is used. A client that wrote through the primary is
+pinned to the primary for ``sticky_seconds`` so it reads its own writes
+even while replicas catch up: it is handed a signed token carrying that
+deadline (see ``read_after_token``), so the pin holds whichever worker
+process or instance serves its next read.
+"""
+import asyncio
+import hashlib
+import hmac
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = "round_robin"
+LEAST_CONNECTIONS = "least_connections"
+
+# Seconds since the last replayed transaction, 0 when fully caught up (or
+# when the server is not a standby at all)
+POSTGRES_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        self.in_use = 0
+        self.sessions = 0
+        # Unknown until the first lag check
+        self.lag_seconds: Optional[float] = None
+        self.healthy = True
+
+    async def measure_lag(self) -> float:
+        async with self.engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                return 0.0
+            return float(await conn.scalar(POSTGRES_LAG_QUERY) or 0)
+
+
+class ReplicaRouter:
+    """
+    Args:
+        primary_session_factory: Returns a session on the primary
+        replicas: Replica engines
+        selection: ``round_robin`` or ``least_connections``
+        max_lag_seconds: Replicas lagging more than this are skipped
+        lag_check_seconds: Interval between lag checks
+        sticky_seconds: Reads of a client stay on the primary this long
+            after its last write (0 disables)
+        secret_key: Key signing the read-after tokens
+    """
+
+    def __init__(
+        self,
+        primary_session_factory: Callable[[], AsyncSession],
+        replicas: Sequence[AsyncEngine] = (),
+        selection: str = ROUND_ROBIN,
+        max_lag_seconds: float = 5.0,
+        lag_check_seconds: float = 5.0,
+        sticky_seconds: float = 5.0,
+        secret_key: str = ""
+    ):
+        if selection not in (ROUND_ROBIN, LEAST_CONNECTIONS):
+            raise ValueError(f"Unknown replica selection: {selection}")
+        self.primary_session_factory = primary_session_factory
+        self.replicas: List[Replica] = [
+            Replica(f"replica-{index}", engine) for index, engine in enumerate(replicas)
+        ]
+        self.selection = selection
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_seconds = lag_check_seconds
+        self.sticky_seconds = sticky_seconds
+        self._secret_key = secret_key.encode()
+        self._next = itertools.count()
+        self._lag_task: Optional[asyncio.Task] = None
+
+        self.primary_reads = 0
+        self.sticky_reads = 0
+        self.fallbacks = 0
+
+    def available(self) -> List[Replica]:
+        return [
+            replica for replica in self.replicas
+            if replica.healthy and (replica.lag_seconds or 0) <= self.max_lag_seconds
+        ]
+
+    def choose(self) -> Optional[Replica]:
+        """A replica for the next read, or None to read from the primary"""
+        candidates = self.available()
+        if not candidates:
+            if self.replicas:
+                self.fallbacks += 1
+            return None
+        if self.selection == LEAST_CONNECTIONS:
+            return min(candidates, key=lambda replica: replica.in_use)
+        return candidates[next(self._next) % len(candidates)]
+
+    def read_after_token(self, client_key: Optional[str]) -> Optional[str]:
+        """
+        Token to hand a client that just wrote: while it presents it, its
+        reads stay on the primary for the stickiness window. It holds the
+        wall-clock deadline and a signature over it and the client key, so
+        it needs no state shared between processes. None when reads need
+        no pinning.
+        """
+        if not client_key or self.sticky_seconds <= 0 or not self.replicas:
+            return None
+        deadline = f"{time.time() + self.sticky_seconds:.3f}"
+        return f"{deadline}:{self._sign(client_key, deadline)}"
+
+    def is_sticky(self, client_key: Optional[str], token: Optional[str]) -> bool:
+        """Whether ``token`` was issued to this client and has not expired"""
+        if not client_key or not token:
+            return False
+        deadline, _, signature = token.partition(":")
+        try:
+            if float(deadline) <= time.time():
+                return False
+        except ValueError:
+            return False
+        return hmac.compare_digest(signature, self._sign(client_key, deadline))
+
+    def _sign(self, client_key: str, deadline: str) -> str:
+        message = f"{client_key}:{deadline}".encode()
+        return hmac.new(self._secret_key, message, hashlib.sha256).hexdigest()[:32]
+
+    @asynccontextmanager
+    async def session(self, client_key: Optional[str] = None,
+                      read_after: Optional[str] = None) -> AsyncIterator[AsyncSession]:
+        """
+        A session for read-only work, on a replica when possible
+
+        Args:
+            client_key: Identifies the client (see ``session.client_key``)
+            read_after: Token the client got with its last write, if any
+        """
+        replica = None
+        if self.is_sticky(client_key, read_after):
+            self.sticky_reads += 1
+        else:
+            replica = self.choose()
+
+        if replica is None:
+            self.primary_reads += 1
+            async with self.primary_session_factory() as session:
+                yield session
+            return
+
+        replica.in_use += 1
+        replica.sessions += 1
+        try:
+            async with replica.session_factory() as session:
+                yield session
+        finally:
+            replica.in_use -= 1
+
+    async def check_lag(self) -> None:
+        for replica in self.replicas:
+            try:
+                replica.lag_seconds = await replica.measure_lag()
+                replica.healthy = True
+            except Exception as e:
+                if replica.healthy:
+                    logger.warning(f"Read replica {replica.name} unavailable: {str(e)}")
+                replica.healthy = False
+
+    async def _check_lag_forever(self) -> None:
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(self.lag_check_seconds)
+
+    async def start(self) -> None:
+        if self.replicas and self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._check_lag_forever(), name="replica-lag-check")
+            logger.info(f"Routing reads to {len(self.replicas)} replica(s) ({self.selection})")
+
+    async def stop(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            await asyncio.gather(self._lag_task, return_exceptions=True)
+            self._lag_task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        return {
+            "selection": self.selection,
+            "primary_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "fallbacks": self.fallbacks,
+            "replicas": {
+                replica.name: {
+                    "healthy": replica.healthy,
+                    "lag_seconds": replica.lag_seconds,
+                    "in_use": replica.in_use,
+                    "sessions": replica.sessions,
+                }
+                for replica in self.replicas
+            },
+        }
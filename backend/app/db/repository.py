@@ -0,0 +1,75 @@
+"""
+Async data access shared by the API routes.
+
+``Repository`` wraps an ``AsyncSession`` with the handful of operations the
+routes need (lookup by id or filters, existence checks, counts, keyset
+pages, add/save/delete), all issued as SQLAlchemy 2.0 ``select()``
+statements and awaited, so no handler ever blocks the event loop on
+database I/O. Anything more specific (joins, aggregates) is written as a
+``select()`` and run through ``scalars``/``execute`` on the same session.
+"""
+from typing import Any, Generic, List, Optional, Sequence, Type, TypeVar
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.pagination import paginate
+from app.db.types import UUIDString, is_uuid
+
+ModelT = TypeVar("ModelT")
+
+
+class Repository(Generic[ModelT]):
+    def __init__(self, db: AsyncSession, model: Type[ModelT]):
+        self.db = db
+        self.model = model
+
+    def select(self, *where) -> Select:
+        return select(self.model).where(*where)
+
+    async def get(self, id: Any) -> Optional[ModelT]:
+        """Row by primary key (served from the identity map when already loaded)"""
+        primary_key = self.model.__mapper__.primary_key[0]
+        # The lookup binds the key as a value of the column, which rejects malformed UUIDs
+        if isinstance(primary_key.type, UUIDString) and id is not None and not is_uuid(id):
+            return None
+        return await self.db.get(self.model, id)
+
+    async def first(self, *where) -> Optional[ModelT]:
+        return (await self.db.scalars(self.select(*where).limit(1))).first()
+
+    async def exists(self, *where) -> bool:
+        primary_key = self.model.__mapper__.primary_key[0]
+        return (await self.db.scalar(select(primary_key).where(*where).limit(1))) is not None
+
+    async def count(self, *where) -> int:
+        return await self.db.scalar(select(func.count()).select_from(self.model).where(*where))
+
+    async def list(self, *where, order_by: Sequence = ()) -> List[ModelT]:
+        return list((await self.db.scalars(self.select(*where).order_by(*order_by))).all())
+
+    async def page(self, *where, limit: int, cursor: Optional[str] = None, skip: int = 0,
+                   statement: Optional[Select] = None) -> List[ModelT]:
+        """
+        A keyset page (see ``app.api.pagination``).
+
+        Args:
+            statement: Base statement to page instead of ``select(model).where(*where)``
+        """
+        statement = statement if statement is not None else self.select(*where)
+        return list((await self.db.scalars(paginate(statement, self.model, limit, cursor, skip))).all())
+
+    async def add(self, instance: ModelT) -> ModelT:
+        """Insert a row, commit and reload its server-side defaults"""
+        self.db.add(instance)
+        return await self.save(instance)
+
+    async def save(self, instance: ModelT) -> ModelT:
+        """Commit pending changes and refresh the instance"""
+        await self.db.commit()
+        await self.db.refresh(instance)
+        return instance
+
+    async def delete(self, instance: ModelT) -> None:
+        await self.db.delete(instance)
+        await self.db.commit()
@@ -1,16 +1,24 @@
 import os
+import math
+import hashlib
 import logging
 import traceback
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 from contextlib import contextmanager
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, scoped_session
+from fastapi import Response
+from fastapi.requests import HTTPConnection
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker, scoped_session
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from dotenv import load_dotenv
 
 # Import Base from base.py to avoid circular imports
 from .base import Base
+from .instrumentation import query_instrumentation
+from .replicas import ReplicaRouter
+from app.core.config import settings
+from app.core.metrics import register_metrics_source
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -38,13 +46,13 @@ if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
         DATABASE_URL, 
         connect_args={"check_same_thread": False},  # Needed for SQLite
-        echo=True
+        echo=settings.SQL_ECHO
     )
 else:
     # PostgreSQL configuration
     engine = create_engine(
         str(DATABASE_URL).replace("postgresql://", "postgresql+psycopg2://"),
-        echo=True,  # Enable SQL query logging for debugging
+        echo=settings.SQL_ECHO,  # Log every statement (debugging only, see SQL_ECHO)
         pool_pre_ping=True,  # Enable connection health checks
         pool_size=5,
         max_overflow=10,
@@ -58,29 +66,37 @@ else:
         }
     )
 
-# Create async engine for FastAPI with asyncpg
-# Convert the connection string to use asyncpg
-connection_string = str(DATABASE_URL).replace("postgresql://", "postgresql+asyncpg://")
+def async_connection_string(url: str) -> str:
+    """
+    Convert a database URL for the async engine (asyncpg for PostgreSQL)
+    """
+    if url.startswith("sqlite"):
+        # sqlite:// and sqlite+aiosqlite:// both run on aiosqlite
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
 
-# Add statement_cache_size=0 to the connection string for pgbouncer compatibility
-# This is required when using pgbouncer in transaction or statement pooling mode
-if '?' in connection_string:
-    connection_string += '&statement_cache_size=0'
-else:
-    connection_string += '?statement_cache_size=0'
+    # Convert the connection string to use asyncpg
+    connection_string = str(url).replace("postgresql://", "postgresql+asyncpg://")
 
-# Add TCP keepalive parameters to maintain stable database connections
-# These settings help detect and recover from network issues
-if '?' in connection_string:
-    connection_string += '&'
-else:
-    connection_string += '?'
-connection_string += 'keepalives=1&keepalives_idle=30&keepalives_interval=10&keepalives_count=5'
+    # Add statement_cache_size=0 to the connection string for pgbouncer compatibility
+    # This is required when using pgbouncer in transaction or statement pooling mode
+    if '?' in connection_string:
+        connection_string += '&statement_cache_size=0'
+    else:
+        connection_string += '?statement_cache_size=0'
+
+    # Add TCP keepalive parameters to maintain stable database connections
+    # These settings help detect and recover from network issues
+    connection_string += '&keepalives=1&keepalives_idle=30&keepalives_interval=10&keepalives_count=5'
+    return connection_string
+
+# Create async engine for FastAPI with asyncpg
+connection_string = async_connection_string(DATABASE_URL)
 
 # Configure the async SQLAlchemy engine
 # 
 # Important configuration notes:
-# - echo=True: Enables SQL query logging for debugging (disable in production)
+# - echo: Logs every statement (SQL_ECHO, debugging only); query counts, timings
+#   and slow statements are recorded by app.db.instrumentation instead
 # - pool_pre_ping: Verifies connections before using them to handle connection timeouts
 # - pool_size/max_overflow: Controls the connection pool size
 # - pool_recycle: Recycles connections to prevent stale connections
@@ -91,7 +107,7 @@ connection_string += 'keepalives=1&keepalives_idle=30&keepalives_interval=10&kee
 # - This disables prepared statement caching which can cause issues with pgbouncer
 async_engine = create_async_engine(
     connection_string,
-    echo=True,  # Enable SQL query logging for debugging
+    echo=settings.SQL_ECHO,  # Log every statement (debugging only)
     pool_pre_ping=True,  # Enable connection health checks
     pool_size=5,  # Number of connections to keep open in the pool
     max_overflow=10,  # Maximum number of connections that can be created beyond pool_size
@@ -99,6 +115,28 @@ async_engine = create_async_engine(
     pool_timeout=30   # Wait 30 seconds before giving up on getting a connection
 )
 
+# Optional read replicas, sized like the primary pool
+replica_engines = [
+    create_async_engine(
+        async_connection_string(url),
+        echo=settings.SQL_ECHO,
+        pool_pre_ping=True,
+        **({} if url.startswith("sqlite") else {
+            "pool_size": 5,
+            "max_overflow": 10,
+            "pool_recycle": 300,
+            "pool_timeout": 30,
+        })
+    )
+    for url in settings.DATABASE_REPLICA_URLS
+]
+
+if settings.DB_QUERY_STATS:
+    query_instrumentation.install(engine)
+    query_instrumentation.install(async_engine.sync_engine)
+    for replica_engine in replica_engines:
+        query_instrumentation.install(replica_engine.sync_engine)
+
 # Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 AsyncSessionLocal = async_sessionmaker(
@@ -112,12 +150,74 @@ AsyncSessionLocal = async_sessionmaker(
 # Scoped session for thread safety
 ScopedSession = scoped_session(SessionLocal)
 
+replica_router = ReplicaRouter(
+    AsyncSessionLocal,
+    replica_engines,
+    selection=settings.DB_REPLICA_SELECTION,
+    max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    lag_check_seconds=settings.DB_REPLICA_LAG_CHECK_SECONDS,
+    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+    secret_key=settings.SECRET_KEY
+)
+register_metrics_source("db_replicas", replica_router.stats)
+
+# Cookie holding the client's read-after token (see ReplicaRouter.read_after_token)
+READ_AFTER_COOKIE = "read_after"
+
+# Mark sessions that wrote, so their client's next reads go to the primary
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session, flush_context):
+    _mark_write(session)
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write(orm_execute_state.session)
+
+def _mark_write(session):
+    if session.info.get("wrote"):
+        return
+    session.info["wrote"] = True
+    on_write = session.info.get("on_write")
+    if on_write is not None:
+        on_write()
+
+def _set_read_after_cookie(connection: HTTPConnection, response: Response) -> None:
+    token = replica_router.read_after_token(client_key(connection))
+    if token:
+        response.set_cookie(
+            READ_AFTER_COOKIE, token,
+            max_age=math.ceil(replica_router.sticky_seconds), httponly=True, samesite="lax"
+        )
+
+def client_key(connection: Optional[HTTPConnection]) -> Optional[str]:
+    """
+    Identify the client for read-your-writes: its credentials, else its address
+    """
+    if connection is None:
+        return None
+    authorization = connection.headers.get("authorization")
+    if authorization:
+        return hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()
+    return connection.client.host if connection.client else None
+
 # Dependency for getting async database session
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+async def get_db(
+    connection: HTTPConnection = None,
+    response: Response = None
+) -> AsyncGenerator[AsyncSession, None]:
     """
     Async database session dependency for FastAPI
+
+    A request that writes gets a signed read_after cookie keeping the
+    client's reads on the primary for DB_READ_YOUR_WRITES_SECONDS, whichever
+    worker serves them. It is set at the first flush or DML statement: the
+    response is sent before this dependency's final commit, so routes
+    commit (or flush) their writes themselves.
     """
     async with AsyncSessionLocal() as session:
+        if connection is not None and response is not None:
+            session.info["on_write"] = lambda: _set_read_after_cookie(connection, response)
         try:
             yield session
             await session.commit()
@@ -128,6 +228,18 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+# Dependency for read-only endpoints: a replica session when one is available
+async def get_read_db(connection: HTTPConnection = None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Read-only async database session dependency for FastAPI
+
+    Served by a read replica (see app.db.replicas) unless none is configured or
+    healthy, or the client wrote recently; nothing is committed.
+    """
+    read_after = connection.cookies.get(READ_AFTER_COOKIE) if connection is not None else None
+    async with replica_router.session(client_key(connection), read_after) as session:
+        yield session
+
 # Sync session for migrations and scripts
 @contextmanager
 def get_sync_db():
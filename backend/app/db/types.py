@@ -0,0 +1,67 @@
+"""
+Column types shared by the models.
+"""
+import uuid
+from typing import Any, Optional
+
+from sqlalchemy import String
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.types import TypeDecorator
+
+# Bound in place of strings that are not UUIDs when comparing: no row has
+# this id, so a lookup by a malformed id finds nothing (as it did with text
+# keys) instead of failing the cast on the server
+NIL_UUID = str(uuid.UUID(int=0))
+
+
+def is_uuid(value: Any) -> bool:
+    if isinstance(value, uuid.UUID):
+        return True
+    try:
+        uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+class UUIDString(TypeDecorator):
+    """
+    A UUID key handled as its string form by the application.
+
+    Stored as a native 16-byte ``UUID`` on PostgreSQL and as text on other
+    databases; values are bound and returned as ``str`` either way. On
+    PostgreSQL, writing a value that is not a UUID raises ``ValueError``,
+    while comparing a column with one (``==``, ``in_``) matches nothing.
+    """
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(String())
+
+    def coerce_compared_value(self, op, value):
+        # Type of the literal in ``column <op> value``; INSERT and UPDATE
+        # values are bound with the column's own type
+        return UUIDComparand()
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[str]:
+        if value is None or dialect.name != "postgresql":
+            return value
+        if not is_uuid(value):
+            raise ValueError(f"Not a UUID: {value!r}")
+        return str(value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)))
+
+    def process_result_value(self, value: Any, dialect) -> Optional[str]:
+        return None if value is None else str(value)
+
+
+class UUIDComparand(UUIDString):
+    """``UUIDString`` for values compared with a column: malformed ones bind as ``NIL_UUID``"""
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[str]:
+        if value is not None and dialect.name == "postgresql" and not is_uuid(value):
+            return NIL_UUID
+        return super().process_bind_param(value, dialect)
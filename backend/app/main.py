@@ -5,13 +5,12 @@ import json
 import traceback
 import uuid  # For generating unique request IDs
 import asyncio
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Optional, Set, Union
 from contextlib import asynccontextmanager
 from pathlib import Path
 from sqlalchemy import text, create_engine
 from sqlalchemy.engine import Engine
-from sqlalchemy.orm import Session
 from fastapi import FastAPI, APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, Request, status, BackgroundTasks, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -94,10 +93,8 @@ logger.info("=" * 80)
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
-# Enable SQLAlchemy logging
-logging.getLogger('sqlalchemy.engine').setLevel(logging.DEBUG)
-logging.getLogger('sqlalchemy.pool').setLevel(logging.DEBUG)
-logging.getLogger('sqlalchemy.orm').setLevel(logging.INFO)
+# SQL statements are logged only with SQL_ECHO (see app.db.instrumentation
+# for query counts, timings and the slow query log)
 
 
 # Add the parent directory to the Python path
@@ -176,12 +173,12 @@ from app.api.v1.routes import (
 )
 
 # Import schemas
-from app.schemas.user import UserCreate, UserLogin
+from app.schemas.user import UserCreate, UserLogin, UserRole
 from app.schemas.project import ProjectCreate, Project as ProjectResponse, ProjectUpdate  
 from app.schemas.test_case import TestCaseResponse, TestCaseCreate, TestCaseUpdate
 from app.schemas.comment import CommentCreate, Comment as CommentResponse, CommentInDB
 from app.schemas.ai import AITestGenerationRequest, AIDebugRequest, AIPrioritizationRequest, AIAnalysisResult, AIAnalysisStatus
-from app.schemas.execution import TestExecutionCreate, TestExecutionResponse, ExecutionStatus
+from app.schemas.execution import TestExecutionCreate, TestExecutionResponse, TestExecutionSummary, ExecutionStatus, BulkTestExecutionCreate, BulkTestExecutionResult, TestExecutionRunRequest
 from app.schemas.dashboard import DashboardStats, ActivityFeed
 
 # FastAPI imports
@@ -192,14 +189,22 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.encoders import jsonable_encoder
 
 # SQLAlchemy imports
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
 from sqlalchemy.exc import SQLAlchemyError
 
 # Application imports
-from app.db.session import SessionLocal, init_db, engine, get_db
-from app.auth.security import get_current_user, create_access_token, get_password_hash, verify_password, oauth2_scheme, AuthService
+from app.db.session import SessionLocal, AsyncSessionLocal, init_db, engine, get_db, get_read_db, replica_router
+from app.db.repository import Repository
+from app.db.instrumentation import query_instrumentation
+from app.auth.security import get_current_user, create_access_token, get_password_hash, verify_password, oauth2_scheme, AuthService, password_hash_pool, principal_cache, authenticate_websocket
 from app.websocket.manager import WebSocketManager, websocket_manager
 from app.api.v1.routes import test_cases, teams, environments, attachments
+from app.api.pagination import set_next_cursor
+from app.core.metrics import collect_metrics, register_metrics_source
+from app.services.project_subscribers import project_subscribers
+from app.core.config import settings
+from app.services.execution_engine import ExecutionEngine
+from app.services.http_clients import EnvironmentClientRegistry
 
 # Pydantic imports
 from pydantic import BaseModel, Field, validator, EmailStr
@@ -224,6 +229,7 @@ from app.models import *
 # Service imports
 from app.auth import AuthService, get_current_user, get_password_hash, verify_password, create_access_token
 from app.websocket.manager import WebSocketManager, websocket_manager
+from app.websocket.frames import JSON as JSON_ENCODING, SUBPROTOCOL_PREFIX, negotiate_encoding
 from app.ai_service import AIService
 
 
@@ -238,6 +244,26 @@ load_dotenv()
 # Initialize services
 ai_service = AIService()
 
+# Runs queued executions; every status change is pushed to the project room
+execution_http_clients = EnvironmentClientRegistry(
+    max_connections=settings.EXECUTION_HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.EXECUTION_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.EXECUTION_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    idle_timeout=settings.EXECUTION_HTTP_IDLE_CLIENT_SECONDS,
+    timeout=settings.EXECUTION_REQUEST_TIMEOUT_SECONDS,
+    http2=settings.EXECUTION_HTTP2
+)
+execution_engine = ExecutionEngine(
+    AsyncSessionLocal,
+    max_workers=settings.EXECUTION_WORKERS,
+    per_environment_limit=settings.EXECUTION_PER_ENVIRONMENT_CONCURRENCY,
+    on_update=websocket_manager.broadcast_test_execution_update,
+    clients=execution_http_clients
+)
+register_metrics_source("execution_engine", execution_engine.stats)
+register_metrics_source("execution_http_clients", execution_http_clients.stats)
+register_metrics_source("websocket", websocket_manager.stats)
+
 # WebSocket manager is already initialized in websocket_manager.py
 # and imported as websocket_manager
 @asynccontextmanager
@@ -248,7 +274,8 @@ async def lifespan(app: FastAPI):
         # Import all models to ensure they are registered with SQLAlchemy
         from app.models.db_models import (
             User, Project, TestCase, TestStep, TestPlan, TestExecution,
-            Comment, Team, TeamMember, Environment, Attachment, TestPlanTestCase, ActivityLog
+            Comment, Team, TeamMember, Environment, Attachment, TestPlanTestCase, ActivityLog,
+            ExecutionDailyRollup
         )
         
         # Create tables in the correct order to avoid foreign key issues
@@ -265,7 +292,8 @@ async def lifespan(app: FastAPI):
             Comment.__table__,
             TeamMember.__table__,
             Attachment.__table__,
-            ActivityLog.__table__
+            ActivityLog.__table__,
+            ExecutionDailyRollup.__table__  # Depends on Project
         ]
         
         # Use the sync engine for table operations
@@ -316,8 +344,20 @@ async def lifespan(app: FastAPI):
         logger.error(traceback.format_exc())
         sys.exit(1)
     
+    await execution_engine.start()
+    await websocket_manager.start()
+    await replica_router.start()
+    await principal_cache.start()
+    await project_subscribers.start()
+    
     yield
     logger.info("Application shutdown")
+    await execution_engine.stop()
+    await websocket_manager.shutdown()
+    await replica_router.stop()
+    await principal_cache.stop()
+    await project_subscribers.stop()
+    password_hash_pool.shutdown()
 
 # Configure CORS with specific allowed origins
 origins = [
@@ -375,7 +415,23 @@ async def add_cors_headers(request: Request, call_next):
         response.headers['Access-Control-Allow-Credentials'] = 'true'
         response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS, PATCH'
         response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-Requested-With, X-CSRF-Token, Accept, Origin, Accept-Encoding, Accept-Language, Cache-Control, Connection, DNT, Pragma, Referer, User-Agent'
-        response.headers['Access-Control-Expose-Headers'] = 'Content-Length, X-Total-Count, Content-Range'
+        response.headers['Access-Control-Expose-Headers'] = 'Content-Length, X-Total-Count, Content-Range, X-Next-Cursor'
+    return response
+
+
+# Record the queries each request runs; with DB_QUERY_HEADERS the figures are
+# also returned to the client (Server-Timing shows up in browser dev tools)
+@app.middleware("http")
+async def track_db_queries(request: Request, call_next):
+    if not settings.DB_QUERY_STATS:
+        return await call_next(request)
+    with query_instrumentation.track() as queries:
+        response = await call_next(request)
+    if settings.DB_QUERY_HEADERS:
+        response.headers['X-DB-Query-Count'] = str(queries.count)
+        response.headers['X-DB-Time-Ms'] = f"{queries.total_ms:.2f}"
+        response.headers['X-DB-Slow-Queries'] = str(len(queries.slow))
+        response.headers['Server-Timing'] = f"db;dur={queries.total_ms:.2f};desc=\"{queries.count} queries\""
     return response
 
 
@@ -426,20 +482,48 @@ async def global_exception_handler(request: Request, exc: Exception):
 # WebSocket endpoint
 @app.websocket("/api/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
+    # Connections (and their per-user limit) belong to the authenticated
+    # user: the path only names it and must match the access token
+    principal = await authenticate_websocket(websocket)
+    if principal is None or principal["id"] != user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    user_id = principal["id"]
+    
+    # Clients may offer e.g. "intellitest.msgpack" to get binary frames; JSON otherwise
+    encoding = negotiate_encoding(websocket.scope.get("subprotocols", []))
+    connected = await websocket_manager.connect(
+        websocket,
+        user_id,
+        encoding=encoding or JSON_ENCODING,
+        subprotocol=f"{SUBPROTOCOL_PREFIX}{encoding}" if encoding else None
+    )
+    if not connected:
+        return
     try:
-        await websocket_manager.connect(websocket, user_id)
         while True:
             data = await websocket.receive_text()
             # Handle incoming WebSocket messages
             try:
                 message = json.loads(data)
                 if message.get("type") == "join_room":
-                    await websocket_manager.join_room(user_id, message.get("room_id"))
+                    await websocket_manager.join_room(user_id, message.get("room_id"), websocket)
                 elif message.get("type") == "leave_room":
-                    await websocket_manager.leave_room(user_id, message.get("room_id"))
+                    await websocket_manager.leave_room(user_id, message.get("room_id"), websocket)
+                elif message.get("type") == "resume":
+                    await websocket_manager.resume(
+                        user_id,
+                        message.get("room_id"),
+                        message.get("last_seq"),
+                        message.get("epoch"),
+                        websocket
+                    )
             except Exception as e:
                 logger.error(f"WebSocket message handling error: {e}")
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Whatever ended the loop, release the connection's admission slots
         websocket_manager.disconnect(websocket)
 
 # Authentication endpoints
@@ -552,7 +636,7 @@ async def register(
 async def login(
     request: Request,
     user_data: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Authenticate user and return JWT token
@@ -580,6 +664,8 @@ async def login(
         try:
             user = await auth_service.authenticate_user(user_data.email, user_data.password)
             logger.info(f"User authentication result: {bool(user)}")
+        except HTTPException:
+            raise
         except Exception as auth_error:
             logger.error(f"Error in authenticate_user: {str(auth_error)}", exc_info=True)
             raise HTTPException(
@@ -636,7 +722,7 @@ async def login(
 @api_router.get("/auth/me", response_model=dict)
 async def get_current_user_info(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current authenticated user's information
@@ -681,7 +767,7 @@ async def get_current_user_info(
 async def create_project(
     project_data: ProjectCreate, 
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new project
@@ -695,8 +781,7 @@ async def create_project(
     try:
         # Check if team exists if team_id is provided
         if project_data.team_id:
-            team = db.query(Team).filter(Team.id == project_data.team_id).first()
-            if not team:
+            if not await Repository(db, Team).exists(Team.id == project_data.team_id):
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Team with ID {project_data.team_id} not found"
@@ -710,12 +795,10 @@ async def create_project(
             updated_at=datetime.utcnow()
         )
         
-        db.add(db_project)
-        db.commit()
-        db.refresh(db_project)
+        await Repository(db, Project).add(db_project)
         
         # Create activity log
-        create_activity_log(
+        await create_activity_log(
             db=db,
             user_id=current_user["id"],
             user_name=current_user["full_name"],
@@ -723,14 +806,15 @@ async def create_project(
             target_type="project",
             target_id=db_project.id,
             target_name=db_project.name,
-            description=f"Created project: {db_project.name}"
+            description=f"Created project: {db_project.name}",
+            project_id=db_project.id
         )
         
         # Convert to Pydantic model for response
         return Project.model_validate(db_project)
         
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating project: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -739,26 +823,30 @@ async def create_project(
 
 @api_router.get("/projects", response_model=List[ProjectResponse])
 async def get_projects(
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
     """
-    Get a list of projects accessible by the current user
+    Get a list of projects accessible by the current user, newest first
     
     Parameters:
     - skip: Number of projects to skip (for pagination)
     - limit: Maximum number of projects to return (max 100)
+    - cursor: Value of the X-Next-Cursor header of the previous page
     """
     try:
+        limit = min(limit, 100)
+        
         # Get projects where user is the creator or a team member
-        projects = db.query(Project).filter(
-            (Project.created_by == current_user["id"]) |
-            (Project.team_id.in_(
-                db.query(TeamMember.team_id).filter(TeamMember.user_id == current_user["id"])
-            ))
-        ).offset(skip).limit(min(limit, 100)).all()
+        projects = await Repository(db, Project).page(
+            Project.id.in_(accessible_project_ids(current_user["id"])),
+            limit=limit, cursor=cursor, skip=skip
+        )
+        set_next_cursor(response, projects, limit)
         
         return [Project.model_validate(project) for project in projects]
         
@@ -773,7 +861,7 @@ async def get_projects(
 async def get_project(
     project_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific project by ID
@@ -783,13 +871,10 @@ async def get_project(
     """
     try:
         # Get project with access control
-        project = db.query(Project).filter(
-            (Project.id == project_id) &
-            ((Project.created_by == current_user["id"]) |
-             (Project.team_id.in_(
-                 db.query(TeamMember.team_id).filter(TeamMember.user_id == current_user["id"])
-             )))
-        ).first()
+        project = await Repository(db, Project).first(
+            Project.id == project_id,
+            Project.id.in_(accessible_project_ids(current_user["id"]))
+        )
         
         if not project:
             raise HTTPException(
@@ -798,18 +883,20 @@ async def get_project(
             )
             
         # Get additional statistics for the project
-        test_case_count = db.query(TestCase).filter(TestCase.project_id == project_id).count()
-        environment_count = db.query(Environment).filter(Environment.project_id == project_id).count()
-        
+        test_case_count = await Repository(db, TestCase).count(TestCase.project_id == project_id)
+        environment_count = await Repository(db, Environment).count(Environment.project_id == project_id)
+
         # Get last execution time
-        last_execution = db.query(TestExecution).filter(
-            TestExecution.test_case.has(project_id=project_id)
-        ).order_by(TestExecution.started_at.desc()).first()
-        
+        last_execution = await db.scalar(
+            select(func.max(TestExecution.started_at))
+            .join(TestCase, TestExecution.test_case_id == TestCase.id)
+            .where(TestCase.project_id == project_id)
+        )
+
         project_dict = project.__dict__
         project_dict["test_case_count"] = test_case_count
         project_dict["environment_count"] = environment_count
-        project_dict["last_execution"] = last_execution.started_at if last_execution else None
+        project_dict["last_execution"] = last_execution
         
         return Project.model_validate(project_dict)
         
@@ -825,7 +912,7 @@ async def update_project(
     project_id: str,
     project_data: ProjectUpdate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update an existing project
@@ -836,10 +923,11 @@ async def update_project(
     """
     try:
         # Get project with access control
-        project = db.query(Project).filter(
-            (Project.id == project_id) &
-            (Project.created_by == current_user["id"])  # Only project creator can update
-        ).first()
+        projects = Repository(db, Project)
+        project = await projects.first(
+            Project.id == project_id,
+            Project.created_by == current_user["id"]  # Only project creator can update
+        )
         
         if not project:
             raise HTTPException(
@@ -849,8 +937,7 @@ async def update_project(
             
         # Check if team exists if team_id is being updated
         if project_data.team_id is not None and project_data.team_id != project.team_id:
-            team = db.query(Team).filter(Team.id == project_data.team_id).first()
-            if not team:
+            if not await Repository(db, Team).exists(Team.id == project_data.team_id):
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Team with ID {project_data.team_id} not found"
@@ -862,12 +949,11 @@ async def update_project(
             setattr(project, field, value)
             
         project.updated_at = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(project)
+
+        await projects.save(project)
         
         # Create activity log
-        create_activity_log(
+        await create_activity_log(
             db=db,
             user_id=current_user["id"],
             user_name=current_user["full_name"],
@@ -875,13 +961,14 @@ async def update_project(
             target_type="project",
             target_id=project.id,
             target_name=project.name,
-            description=f"Updated project: {project.name}"
+            description=f"Updated project: {project.name}",
+            project_id=project.id
         )
         
         return Project.model_validate(project)
         
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating project: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -892,7 +979,7 @@ async def update_project(
 async def delete_project(
     project_id: str,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a project
@@ -902,10 +989,11 @@ async def delete_project(
     """
     try:
         # Get project with access control
-        project = db.query(Project).filter(
-            (Project.id == project_id) &
-            (Project.created_by == current_user["id"])  # Only project creator can delete
-        ).first()
+        projects = Repository(db, Project)
+        project = await projects.first(
+            Project.id == project_id,
+            Project.created_by == current_user["id"]  # Only project creator can delete
+        )
         
         if not project:
             raise HTTPException(
@@ -914,7 +1002,7 @@ async def delete_project(
             )
             
         # Create activity log before deletion
-        create_activity_log(
+        await create_activity_log(
             db=db,
             user_id=current_user["id"],
             user_name=current_user["full_name"],
@@ -922,17 +1010,17 @@ async def delete_project(
             target_type="project",
             target_id=project.id,
             target_name=project.name,
-            description=f"Deleted project: {project.name}"
+            description=f"Deleted project: {project.name}",
+            project_id=project.id
         )
         
         # Delete the project
-        db.delete(project)
-        db.commit()
+        await projects.delete(project)
         
         return Response(status_code=status.HTTP_204_NO_CONTENT)
         
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting project: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -941,28 +1029,32 @@ async def delete_project(
 
 # Comments endpoints
 @api_router.post("/comments", response_model=CommentResponse)
-async def create_comment(comment_data: CommentCreate, current_user: dict = Depends(get_current_user)):
+async def create_comment(
+    comment_data: CommentCreate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
     """Create a new comment"""
-    db = get_db()
-    
     db_comment = DBComment(
         **comment_data.dict(),
         user_id=current_user["id"],
         user_name=current_user["full_name"]
     )
-    
-    db.add(db_comment)
-    db.commit()
-    db.refresh(db_comment)
+
+    await Repository(db, DBComment).add(db_comment)
     
     # Convert to Pydantic model for response
     comment = CommentResponse.model_validate(db_comment)
     
-    # Create activity log
-    create_activity_log(
+    # Create activity log, pushed to the subscribers of the test case's project
+    test_case = (await db.execute(
+        select(DBTestCase.project_id, DBTestCase.title).where(DBTestCase.id == comment.test_case_id)
+    )).first()
+    await create_activity_log(
         db, current_user["id"], current_user["full_name"],
-        "commented", "test_case", comment.test_case_id, "",
-        f"Added comment on test case"
+        "commented", "test_case", comment.test_case_id, test_case.title if test_case else "",
+        f"Added comment on test case",
+        project_id=test_case.project_id if test_case else None
     )
     
     # Broadcast comment update (if websocket_manager is available)
@@ -975,12 +1067,13 @@ async def create_comment(comment_data: CommentCreate, current_user: dict = Depen
 async def get_comments(
     test_case_id: str, 
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get comments for a test case"""
-    comments = db.query(DBComment).filter(
-        DBComment.test_case_id == test_case_id
-    ).order_by(DBComment.created_at.asc()).all()
+    comments = await Repository(db, DBComment).list(
+        DBComment.test_case_id == test_case_id,
+        order_by=[DBComment.created_at.asc()]
+    )
     
     return [CommentResponse.model_validate(comment) for comment in comments]
 
@@ -988,14 +1081,15 @@ async def get_comments(
 async def resolve_comment(
     comment_id: str, 
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Resolve a comment"""
     # Get the comment
-    db_comment = db.query(DBComment).filter(
+    comments = Repository(db, DBComment)
+    db_comment = await comments.first(
         DBComment.id == comment_id,
         DBComment.user_id == current_user["id"]
-    ).first()
+    )
     
     if not db_comment:
         raise HTTPException(
@@ -1006,8 +1100,7 @@ async def resolve_comment(
     # Update the comment
     db_comment.resolved = True
     db_comment.resolved_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_comment)
+    await comments.save(db_comment)
     
     # Convert to Pydantic model for response
     comment = CommentResponse.model_validate(db_comment)
@@ -1023,7 +1116,7 @@ async def resolve_comment(
 async def ai_generate_tests(
     request: AITestGenerationRequest,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Generate test cases using AI"""
     try:
@@ -1052,14 +1145,12 @@ async def ai_generate_tests(
 async def ai_debug_test(
     request: AIDebugRequest,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Debug test failure using AI"""
     try:
         # Get the test execution
-        execution = db.query(TestExecution).filter(
-            TestExecution.id == request.execution_id
-        ).first()
+        execution = await Repository(db, TestExecution).get(request.execution_id)
         
         if not execution:
             raise HTTPException(
@@ -1068,9 +1159,7 @@ async def ai_debug_test(
             )
         
         # Get the test case
-        test_case = db.query(DBTestCase).filter(
-            DBTestCase.id == execution.test_case_id
-        ).first()
+        test_case = await Repository(db, DBTestCase).get(execution.test_case_id)
         
         if not test_case:
             raise HTTPException(
@@ -1087,7 +1176,7 @@ async def ai_debug_test(
         
         # Update execution with analysis result
         execution.ai_analysis = result.model_dump()
-        db.commit()
+        await db.commit()
         
         return result
         
@@ -1104,14 +1193,14 @@ async def ai_debug_test(
 async def ai_prioritize_tests(
     request: AIPrioritizationRequest,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Prioritize test cases using AI"""
     try:
         # Get test cases from database
-        test_cases = db.query(DBTestCase).filter(
+        test_cases = await Repository(db, DBTestCase).list(
             DBTestCase.id.in_(request.test_case_ids)
-        ).all()
+        )
         
         if not test_cases:
             raise HTTPException(
@@ -1137,58 +1226,168 @@ async def ai_prioritize_tests(
         )
 
 # Import TestExecution model from db_models
-from app.models.db_models import TestExecution as DBTestExecution
+from app.models.db_models import TestExecution as DBTestExecution, Project, TestCase as DBTestCase
+from app.services.dashboard import accessible_project_ids
+from app.services.rollups import record_execution_created, compute_execution_summary
+from app.services.executions import create_bulk_executions, test_plan_case_ids, transition_execution
+from sqlalchemy import select
 
 # Test Execution endpoints
 @api_router.post("/executions", response_model=TestExecutionResponse)
 async def create_test_execution(
     execution_data: TestExecutionCreate,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new test execution"""
     try:
+        # Resolve the project the execution is rolled up under
+        project_id = await db.scalar(
+            select(DBTestCase.project_id).where(DBTestCase.id == execution_data.test_case_id)
+        )
+        if not project_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Test case not found"
+            )
+        
         # Create new test execution
         db_execution = DBTestExecution(
-            **execution_data.dict(),
-            executed_by=current_user["id"]
+            **execution_data.dict(exclude={"notes", "actual_result"}),
+            executed_by=current_user["id"],
+            status=ExecutionStatus.PENDING,
+            created_at=datetime.utcnow()
         )
         
         db.add(db_execution)
-        db.commit()
-        db.refresh(db_execution)
+        await record_execution_created(db, project_id, db_execution.created_at, db_execution.status)
+        await db.commit()
+        await db.refresh(db_execution)
         
         # Convert to Pydantic model for response
         execution = TestExecutionResponse.model_validate(db_execution)
         
         # Broadcast execution update if websocket manager is available
         if 'websocket_manager' in globals():
-            await websocket_manager.broadcast_test_execution_update(execution.dict())
+            await websocket_manager.broadcast_test_execution_update(
+                {**execution.dict(), "project_id": project_id}
+            )
         
         return execution
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating test execution: {str(e)}")
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create test execution: {str(e)}"
         )
 
+@api_router.post("/executions/bulk", response_model=BulkTestExecutionResult, status_code=status.HTTP_201_CREATED)
+async def create_bulk_test_executions(
+    bulk_data: BulkTestExecutionCreate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create pending executions for up to 1000 test cases in one request
+    
+    Test cases that do not exist or are listed twice are reported in `errors`;
+    the others are created. Each affected project room receives a single
+    `test_execution_bulk_update` message.
+    """
+    try:
+        result, by_project = await create_bulk_executions(db, bulk_data, current_user["id"])
+        await db.commit()
+        
+        for project_id, executions in by_project.items():
+            await websocket_manager.broadcast_bulk_test_execution_update(project_id, executions)
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating bulk test executions: {str(e)}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create test executions: {str(e)}"
+        )
+
+@api_router.post("/executions/run", response_model=BulkTestExecutionResult, status_code=status.HTTP_202_ACCEPTED)
+async def run_test_executions(
+    run_request: TestExecutionRunRequest,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Run test cases, or a whole test plan, against an environment
+    
+    Creates a pending execution per test case and queues it on the execution
+    engine. Progress is streamed as `test_execution_update` messages to the
+    project room and persisted on the executions.
+    """
+    try:
+        test_case_ids = list(run_request.test_case_ids)
+        if run_request.test_plan_id:
+            test_case_ids.extend(await test_plan_case_ids(db, run_request.test_plan_id))
+        if not test_case_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Test plan not found or has no test cases"
+            )
+        
+        # Built without validation: a test plan may hold more test cases than
+        # the 1000 a bulk request body is allowed to list
+        bulk_data = BulkTestExecutionCreate.model_construct(
+            test_case_ids=test_case_ids,
+            environment_id=run_request.environment_id
+        )
+        result, by_project = await create_bulk_executions(
+            db, bulk_data, current_user["id"], test_plan_id=run_request.test_plan_id, engine_queued=True
+        )
+        await db.commit()
+        
+        for project_id, executions in by_project.items():
+            await websocket_manager.broadcast_bulk_test_execution_update(project_id, executions)
+        await execution_engine.submit(result.execution_ids)
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error scheduling test executions: {str(e)}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to schedule test executions: {str(e)}"
+        )
+
 @api_router.get("/executions", response_model=List[TestExecutionResponse])
 async def get_test_executions(
+    response: Response,
     test_case_id: Optional[str] = None,
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get test executions"""
+    """
+    Get test executions, newest first
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
+    """
     try:
-        query = db.query(DBTestExecution)
-        
+        filters = []
         if test_case_id:
-            query = query.filter(DBTestExecution.test_case_id == test_case_id)
-        
+            filters.append(DBTestExecution.test_case_id == test_case_id)
+
         # Get most recent 100 executions
-        executions = query.order_by(DBTestExecution.created_at.desc()).limit(100).all()
+        executions = await Repository(db, DBTestExecution).page(*filters, limit=100, cursor=cursor)
+        set_next_cursor(response, executions, 100)
         
         # Convert to Pydantic models for response
         return [
@@ -1196,6 +1395,8 @@ async def get_test_executions(
             for execution in executions
         ]
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching test executions: {str(e)}")
         raise HTTPException(
@@ -1203,37 +1404,72 @@ async def get_test_executions(
             detail=f"Failed to fetch test executions: {str(e)}"
         )
 
+@api_router.get("/executions/summary", response_model=TestExecutionSummary)
+async def get_execution_summary(
+    project_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get execution statistics from the daily rollups
+    
+    Parameters:
+    - project_id: Restrict the summary to one project (default: all accessible projects)
+    - date_from: First execution day to include
+    - date_to: Last execution day to include
+    """
+    try:
+        project_ids = accessible_project_ids(current_user["id"])
+        if project_id:
+            project_ids = project_ids.where(Project.id == project_id)
+        
+        return await compute_execution_summary(
+            db, project_ids.scalar_subquery(), date_from, date_to
+        )
+        
+    except Exception as e:
+        logger.error(f"Error getting execution summary: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve execution summary"
+        )
+
 @api_router.put("/executions/{execution_id}/status", response_model=TestExecutionResponse)
 async def update_execution_status(
     execution_id: str,
     status: ExecutionStatus,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update execution status"""
     try:
-        # Find the execution
-        execution = db.query(DBTestExecution).filter(
-            DBTestExecution.id == execution_id
-        ).first()
+        # Find the execution together with its project
+        result = await db.execute(
+            select(DBTestExecution, DBTestCase.project_id)
+            .join(DBTestCase, DBTestExecution.test_case_id == DBTestCase.id)
+            .where(DBTestExecution.id == execution_id)
+        )
+        row = result.first()
         
-        if not execution:
+        if not row:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
+                status_code=404,
                 detail="Test execution not found"
             )
+        execution, project_id = row
         
-        # Update status and timestamps
-        execution.status = status
-        execution.updated_at = datetime.utcnow()
-        
-        if status == ExecutionStatus.RUNNING:
-            execution.started_at = datetime.utcnow()
-        elif status in [ExecutionStatus.COMPLETED, ExecutionStatus.FAILED]:
-            execution.completed_at = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(execution)
+        # Update status, timestamps and rollups unless the status changed
+        # since it was read (e.g. the execution engine finished it meanwhile)
+        if not await transition_execution(db, execution, project_id, status):
+            await db.rollback()
+            raise HTTPException(
+                status_code=409,
+                detail="Test execution status changed concurrently, retry with its current status"
+            )
+        await db.commit()
+        await db.refresh(execution)
         
         # Convert to Pydantic model for response
         execution_response = TestExecutionResponse.model_validate(execution)
@@ -1241,7 +1477,7 @@ async def update_execution_status(
         # Broadcast execution update if websocket manager is available
         if 'websocket_manager' in globals():
             await websocket_manager.broadcast_test_execution_update(
-                execution_response.dict()
+                {**execution_response.dict(), "project_id": project_id}
             )
         
         return execution_response
@@ -1250,67 +1486,36 @@ async def update_execution_status(
         raise
     except Exception as e:
         logger.error(f"Error updating execution status: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=500,
             detail=f"Failed to update execution status: {str(e)}"
         )
 
 # Import models for dashboard
 from app.models.db_models import Project, TestCase as DBTestCase, TestExecution, ActivityLog
-from sqlalchemy import or_, and_, func
+from app.services.dashboard import compute_dashboard_stats
+from sqlalchemy import or_, and_, func, select
 
 # Dashboard endpoints
 @api_router.get("/dashboard/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get dashboard statistics"""
     try:
-        # Get user's projects
-        projects = db.query(Project).filter(
-            or_(
-                Project.created_by == current_user["id"],
-                Project.team_members.any(current_user["id"])
-            )
-        ).all()
-        
-        project_ids = [str(project.id) for project in projects]
-        
-        if not project_ids:
-            return DashboardStats()
-        
-        # Get statistics
-        total_test_cases = db.query(DBTestCase).filter(
-            DBTestCase.project_id.in_(project_ids)
-        ).count()
-        
-        # Get executions for pass rate calculation
-        executions = db.query(TestExecution).filter(
-            TestExecution.test_case.has(DBTestCase.project_id.in_(project_ids))
-        ).all()
-        
-        total_executions = len(executions)
-        passed_executions = len([e for e in executions if e.status == "completed"])
-        pass_rate = (passed_executions / total_executions * 100) if total_executions > 0 else 0
-        
-        # Calculate average execution time
-        completed_executions = [e for e in executions if e.duration is not None]
-        avg_execution_time = sum(e.duration or 0 for e in completed_executions) / len(completed_executions) if completed_executions else 0
-        
-        # Get active test runs
-        active_runs = db.query(TestExecution).filter(
-            TestExecution.status == "running"
-        ).count()
+        # Aggregate execution and test case statistics in the database
+        stats = await compute_dashboard_stats(db, current_user["id"])
         
         # Get recent activity
-        recent_activity = db.query(ActivityLog).order_by(
-            ActivityLog.created_at.desc()
-        ).limit(10).all()
+        result = await db.execute(
+            select(ActivityLog).order_by(ActivityLog.created_at.desc()).limit(10)
+        )
+        recent_activity = result.scalars().all()
         
         # Convert SQLAlchemy models to Pydantic models
-        activity_feeds = [
+        stats.recent_activity = [
             ActivityFeed(
                 id=str(activity.id),
                 user_id=activity.user_id,
@@ -1325,14 +1530,7 @@ async def get_dashboard_stats(
             for activity in recent_activity
         ]
         
-        return DashboardStats(
-            total_test_cases=total_test_cases,
-            total_executions=total_executions,
-            pass_rate=pass_rate,
-            average_execution_time=avg_execution_time,
-            active_test_runs=active_runs,
-            recent_activity=activity_feeds
-        )
+        return stats
         
     except Exception as e:
         logger.error(f"Error getting dashboard stats: {str(e)}")
@@ -1343,15 +1541,20 @@ async def get_dashboard_stats(
 
 @api_router.get("/dashboard/activity", response_model=List[ActivityFeed])
 async def get_activity_feed(
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    limit: int = 50
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = 50,
+    cursor: Optional[str] = None
 ):
-    """Get activity feed"""
+    """
+    Get activity feed, newest first
+    
+    Pass the X-Next-Cursor header of a page as `cursor` to fetch the next one.
+    """
     try:
-        activities = db.query(ActivityLog).order_by(
-            ActivityLog.created_at.desc()
-        ).limit(limit).all()
+        activities = await Repository(db, ActivityLog).page(limit=limit, cursor=cursor)
+        set_next_cursor(response, activities, limit)
         
         return [
             ActivityFeed(
@@ -1367,6 +1570,8 @@ async def get_activity_feed(
             )
             for activity in activities
         ]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting activity feed: {str(e)}")
         raise HTTPException(
@@ -1375,25 +1580,56 @@ async def get_activity_feed(
         )
 
 # Utility functions
-async def create_activity_log(db, user_id: str, user_name: str, action: str, target_type: str, target_id: str, target_name: str, description: str):
-    """Create activity log entry"""
-    activity = ActivityFeed(
+async def create_activity_log(db, user_id: str, user_name: str, action: str, target_type: str, target_id: str, target_name: str, description: str, project_id: Optional[str] = None):
+    """
+    Create activity log entry and push it to the dashboards of the users who
+    can see the affected project (only the acting user when there is none)
+    """
+    activity = ActivityLog(
         user_id=user_id,
         user_name=user_name,
         action=action,
         target_type=target_type,
         target_id=target_id,
         target_name=target_name,
-        description=description
+        details={"description": description, "project_id": project_id},
+        created_at=datetime.utcnow()
     )
     
-    await db.activity_feed.insert_one(activity.dict())
+    try:
+        db.add(activity)
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Error saving activity log: {str(e)}")
+    
+    subscribers = await project_subscribers.get(project_id) if project_id else {user_id}
     
     # Broadcast dashboard update
     await websocket_manager.broadcast_dashboard_update({
         "type": "activity_update",
-        "activity": activity.dict()
-    })
+        "activity": {
+            "user_id": user_id,
+            "user_name": user_name,
+            "action": action,
+            "target_type": target_type,
+            "target_id": target_id,
+            "target_name": target_name,
+            "description": description,
+            "project_id": project_id,
+            "created_at": activity.created_at.isoformat()
+        }
+    }, user_ids=subscribers)
+
+# Metrics endpoint
+@api_router.get("/metrics")
+async def get_metrics(current_user: dict = Depends(get_current_user)):
+    """In-process metrics (cache hit rates, pool and connection gauges) of this worker; admins only"""
+    if current_user["role"] != UserRole.ADMIN.value:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Metrics are only available to administrators"
+        )
+    return collect_metrics()
 
 # Health check endpoint
 @api_router.get("/health")
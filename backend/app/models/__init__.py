@@ -6,7 +6,8 @@ Base = declarative_base()
 from .db_models import (
     User, Project, TestStep, TestCase, TestPlan,
     TestExecution, Comment, Team, TeamMember,
-    Environment, Attachment, TestPlanTestCase
+    Environment, Attachment, TestPlanTestCase,
+    ExecutionDailyRollup
 )
 
 # Import WebSocket related models from schemas
@@ -26,6 +27,7 @@ __all__ = [
     'Environment',
     'Attachment',
     'TestPlanTestCase',
+    'ExecutionDailyRollup',
     'WebSocketMessage',
     'NotificationMessage'
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, JSON, Enum as SQLEnum, Text, Table, UniqueConstraint
+from sqlalchemy import Column, String, Integer, BigInteger, Boolean, Date, DateTime, ForeignKey, JSON, Enum as SQLEnum, Text, Table, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -11,6 +11,7 @@ import uuid
 
 # Import Base from app.db.base to avoid circular imports
 from app.db.base import Base
+from app.db.types import UUIDString
 
 # Enums
 class TestType(str, Enum):
@@ -52,7 +53,7 @@ class CommentType(str, Enum):
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String, unique=True, index=True, nullable=False)
     full_name = Column(String, nullable=False)
     hashed_password = Column(String, nullable=False)
@@ -75,13 +76,13 @@ class User(Base):
 class Project(Base):
     __tablename__ = "projects"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    created_by = Column(String, ForeignKey("users.id"), nullable=False)
-    team_id = Column(String, ForeignKey("teams.id"), nullable=True)
+    created_by = Column(UUIDString, ForeignKey("users.id"), nullable=False)
+    team_id = Column(UUIDString, ForeignKey("teams.id"), nullable=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination key
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -90,13 +91,25 @@ class Project(Base):
     test_cases = relationship("TestCase", back_populates="project")
     test_plans = relationship("TestPlan", back_populates="project")
     environments = relationship("Environment", back_populates="project")
+    
+    # Keyset pagination order, overall and of a user's own projects; team
+    # lookup for project visibility (only team projects are indexed)
+    __table_args__ = (
+        Index('ix_projects_created_at_id', 'created_at', 'id'),
+        Index('ix_projects_created_by_created_at_id', 'created_by', 'created_at', 'id'),
+        Index(
+            'ix_projects_team_id', 'team_id',
+            postgresql_where=text('team_id IS NOT NULL'),
+            sqlite_where=text('team_id IS NOT NULL')
+        ),
+    )
 
 # Test Step Model (for TestCase)
 class TestStep(Base):
     __tablename__ = "test_steps"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    test_case_id = Column(String, ForeignKey("test_cases.id", ondelete="CASCADE"), nullable=False)
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
+    test_case_id = Column(UUIDString, ForeignKey("test_cases.id", ondelete="CASCADE"), nullable=False)
     step_number = Column(Integer, nullable=False)
     description = Column(Text, nullable=False)
     expected_result = Column(Text, nullable=False)
@@ -110,23 +123,23 @@ class TestStep(Base):
 class TestCase(Base):
     __tablename__ = "test_cases"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(UUIDString, ForeignKey("projects.id"), nullable=False)
     test_type = Column(SQLEnum(TestType), nullable=False)
     priority = Column(SQLEnum(Priority), nullable=False)
     status = Column(SQLEnum(Status), nullable=False, default=Status.DRAFT)
     expected_result = Column(Text, nullable=True)
-    created_by = Column(String, ForeignKey("users.id"), nullable=False)
-    assigned_to = Column(String, ForeignKey("users.id"), nullable=True)
+    created_by = Column(UUIDString, ForeignKey("users.id"), nullable=False)
+    assigned_to = Column(UUIDString, ForeignKey("users.id"), nullable=True)
     tags = Column(JSON, default=list)
     ai_generated = Column(Boolean, default=False)
     self_healing_enabled = Column(Boolean, default=False)
     prerequisites = Column(Text, nullable=True)
     test_data = Column(JSON, nullable=True)
     automation_config = Column(JSON, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination key
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -138,16 +151,28 @@ class TestCase(Base):
     comments = relationship("Comment", back_populates="test_case")
     test_plans = relationship("TestPlan", secondary="test_plan_test_cases", back_populates="test_cases")
     test_plan_test_cases = relationship("TestPlanTestCase", back_populates="test_case", cascade="all, delete-orphan")
+    
+    # Keyset pagination order, overall, within a project and within a
+    # project filtered by status (and type); ownership checks by creator
+    __table_args__ = (
+        Index('ix_test_cases_created_at_id', 'created_at', 'id'),
+        Index('ix_test_cases_project_id_created_at_id', 'project_id', 'created_at', 'id'),
+        Index(
+            'ix_test_cases_project_id_status_test_type',
+            'project_id', 'status', 'test_type', 'created_at', 'id'
+        ),
+        Index('ix_test_cases_created_by', 'created_by'),
+    )
 
 # Test Plan Model
 class TestPlan(Base):
     __tablename__ = "test_plans"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
-    created_by = Column(String, ForeignKey("users.id"), nullable=False)
+    project_id = Column(UUIDString, ForeignKey("projects.id"), nullable=False)
+    created_by = Column(UUIDString, ForeignKey("users.id"), nullable=False)
     status = Column(SQLEnum(Status), default=Status.DRAFT)
     scheduled_start = Column(DateTime, nullable=True)
     scheduled_end = Column(DateTime, nullable=True)
@@ -166,11 +191,11 @@ class TestPlan(Base):
 class TestExecution(Base):
     __tablename__ = "test_executions"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    test_case_id = Column(String, ForeignKey("test_cases.id"), nullable=False)
-    test_plan_id = Column(String, ForeignKey("test_plans.id"), nullable=True)
-    executed_by = Column(String, ForeignKey("users.id"), nullable=False)
-    environment_id = Column(String, ForeignKey("environments.id"), nullable=True)
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
+    test_case_id = Column(UUIDString, ForeignKey("test_cases.id"), nullable=False)
+    test_plan_id = Column(UUIDString, ForeignKey("test_plans.id"), nullable=True)
+    executed_by = Column(UUIDString, ForeignKey("users.id"), nullable=False)
+    environment_id = Column(UUIDString, ForeignKey("environments.id"), nullable=True)
     status = Column(SQLEnum(ExecutionStatus), default=ExecutionStatus.PENDING)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
@@ -180,7 +205,9 @@ class TestExecution(Base):
     screenshots = Column(JSON, default=list)
     error_message = Column(Text, nullable=True)
     ai_analysis = Column(JSON, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # Set when queued on the execution engine, which recovers only these
+    engine_queued_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination key
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -188,20 +215,65 @@ class TestExecution(Base):
     test_plan = relationship("TestPlan", back_populates="test_executions")
     executor = relationship("User", back_populates="test_executions")
     environment = relationship("Environment", back_populates="test_executions")
+    
+    # Keyset pagination order, overall and within a test case; environment
+    # usage checks (only executions with an environment are indexed)
+    __table_args__ = (
+        Index('ix_test_executions_created_at_id', 'created_at', 'id'),
+        Index('ix_test_executions_test_case_id_created_at_id', 'test_case_id', 'created_at', 'id'),
+        Index(
+            'ix_test_executions_environment_id', 'environment_id',
+            postgresql_where=text('environment_id IS NOT NULL'),
+            sqlite_where=text('environment_id IS NOT NULL')
+        ),
+    )
+
+# Execution Daily Rollup Model
+# Upper bounds (in seconds) of the execution duration histogram buckets.
+# Bucket i counts durations <= DURATION_BUCKET_BOUNDS[i]; the last bucket is open-ended.
+DURATION_BUCKET_BOUNDS = (1, 5, 15, 60, 300)
+
+class ExecutionDailyRollup(Base):
+    """Per-project, per-day execution counters maintained incrementally for dashboards"""
+    __tablename__ = "execution_daily_rollups"
+    
+    project_id = Column(UUIDString, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)  # Day the execution was created
+    
+    # Executions currently in each ExecutionStatus
+    pending_count = Column(Integer, nullable=False, default=0)
+    running_count = Column(Integer, nullable=False, default=0)
+    completed_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    cancelled_count = Column(Integer, nullable=False, default=0)
+    
+    # Duration statistics of finished executions (in seconds)
+    duration_count = Column(Integer, nullable=False, default=0)
+    duration_sum = Column(BigInteger, nullable=False, default=0)
+    duration_min = Column(Integer, nullable=True)
+    duration_max = Column(Integer, nullable=True)
+    duration_bucket_0 = Column(Integer, nullable=False, default=0)  # <= 1s
+    duration_bucket_1 = Column(Integer, nullable=False, default=0)  # <= 5s
+    duration_bucket_2 = Column(Integer, nullable=False, default=0)  # <= 15s
+    duration_bucket_3 = Column(Integer, nullable=False, default=0)  # <= 60s
+    duration_bucket_4 = Column(Integer, nullable=False, default=0)  # <= 300s
+    duration_bucket_5 = Column(Integer, nullable=False, default=0)  # > 300s
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 # Comment Model
 class Comment(Base):
     __tablename__ = "comments"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    test_case_id = Column(String, ForeignKey("test_cases.id"), nullable=False)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
+    test_case_id = Column(UUIDString, ForeignKey("test_cases.id"), nullable=False)
+    user_id = Column(UUIDString, ForeignKey("users.id"), nullable=False)
     user_name = Column(String, nullable=False)
     comment_type = Column(SQLEnum(CommentType), default=CommentType.GENERAL)
     content = Column(Text, nullable=False)
-    parent_comment_id = Column(String, ForeignKey("comments.id"), nullable=True)
+    parent_comment_id = Column(UUIDString, ForeignKey("comments.id"), nullable=True)
     resolved = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination key
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
@@ -209,48 +281,64 @@ class Comment(Base):
     user = relationship("User", back_populates="comments")
     parent_comment = relationship("Comment", remote_side=[id], back_populates="replies")
     replies = relationship("Comment", back_populates="parent_comment", cascade="all, delete-orphan")
+    
+    # Keyset pagination order of a test case's comments
+    __table_args__ = (
+        Index('ix_comments_test_case_id_created_at', 'test_case_id', 'created_at', 'id'),
+    )
 
 
 # Team Model
 class Team(Base):
     __tablename__ = "teams"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False, unique=True)
     description = Column(Text, nullable=True)
-    created_by = Column(String, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_by = Column(UUIDString, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination key
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     members = relationship("TeamMember", back_populates="team")
     projects = relationship("Project", back_populates="team")
+    
+    # Keyset pagination order
+    __table_args__ = (
+        Index('ix_teams_created_at_id', 'created_at', 'id'),
+    )
 
 
 # Team Member Model (for many-to-many relationship between User and Team)
 class TeamMember(Base):
     __tablename__ = "team_members"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    team_id = Column(String, ForeignKey("teams.id"), nullable=False)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
+    team_id = Column(UUIDString, ForeignKey("teams.id"), nullable=False)
+    user_id = Column(UUIDString, ForeignKey("users.id"), nullable=False)
     role = Column(String, default="member")  # member, admin, owner
     joined_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     team = relationship("Team", back_populates="members")
     user = relationship("User", back_populates="team_memberships")
+    
+    # Teams of a user and members of a team
+    __table_args__ = (
+        Index('ix_team_members_user_id_team_id', 'user_id', 'team_id'),
+        Index('ix_team_members_team_id_user_id', 'team_id', 'user_id'),
+    )
 
 
 # Environment Model
 class Environment(Base):
     __tablename__ = "environments"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     base_url = Column(String, nullable=False)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(UUIDString, ForeignKey("projects.id"), nullable=False)
     is_active = Column(Boolean, default=True)
     variables = Column(JSON, default=dict)  # Environment variables
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -259,25 +347,35 @@ class Environment(Base):
     # Relationships
     project = relationship("Project", back_populates="environments")
     test_executions = relationship("TestExecution", back_populates="environment")
+    
+    # Environments of a project
+    __table_args__ = (
+        Index('ix_environments_project_id', 'project_id'),
+    )
 
 
 # Attachment Model
 class Attachment(Base):
     __tablename__ = "attachments"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
     file_name = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
     file_size = Column(Integer, nullable=False)  # in bytes
     file_type = Column(String, nullable=False)
     entity_type = Column(String, nullable=False)  # 'test_case', 'test_execution', etc.
-    entity_id = Column(String, nullable=False)    # ID of the related entity
-    uploaded_by = Column(String, ForeignKey("users.id"), nullable=False)
+    entity_id = Column(UUIDString, nullable=False)    # ID of the related entity
+    uploaded_by = Column(UUIDString, ForeignKey("users.id"), nullable=False)
     description = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     uploader = relationship("User", back_populates="uploaded_attachments")
+    
+    # Attachments of an entity
+    __table_args__ = (
+        Index('ix_attachments_entity_type_entity_id', 'entity_type', 'entity_id'),
+    )
 
 
 # Test Plan Test Case Association Model
@@ -285,15 +383,15 @@ class TestPlanTestCase(Base):
     """Association table for many-to-many relationship between TestPlan and TestCase with additional attributes"""
     __tablename__ = 'test_plan_test_cases'
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    test_plan_id = Column(String, ForeignKey('test_plans.id', ondelete='CASCADE'), nullable=False)
-    test_case_id = Column(String, ForeignKey('test_cases.id', ondelete='CASCADE'), nullable=False)
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
+    test_plan_id = Column(UUIDString, ForeignKey('test_plans.id', ondelete='CASCADE'), nullable=False)
+    test_case_id = Column(UUIDString, ForeignKey('test_cases.id', ondelete='CASCADE'), nullable=False)
     
     # Optional fields for the association
     order = Column(Integer, default=0)  # Order of test case in the test plan
     is_mandatory = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    created_by = Column(String, ForeignKey('users.id'))
+    created_by = Column(UUIDString, ForeignKey('users.id'))
     
     # Relationships
     test_plan = relationship("TestPlan", back_populates="test_plan_test_cases")
@@ -310,8 +408,8 @@ class ActivityLog(Base):
     """Model for tracking user activities in the system"""
     __tablename__ = "activity_logs"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    id = Column(UUIDString, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(UUIDString, ForeignKey("users.id"), nullable=False)
     user_name = Column(String, nullable=False)
     action = Column(String, nullable=False)  # e.g., 'create', 'update', 'delete', 'login', etc.
     target_type = Column(String, nullable=False)  # e.g., 'test_case', 'project', 'test_execution', etc.
@@ -320,7 +418,12 @@ class ActivityLog(Base):
     details = Column(JSON, nullable=True)  # Additional details about the activity
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # keyset pagination key
     
     # Relationships
     user = relationship("User", back_populates="activity_logs")
+    
+    # Keyset pagination order
+    __table_args__ = (
+        Index('ix_activity_logs_created_at_id', 'created_at', 'id'),
+    )
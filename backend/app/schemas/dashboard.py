@@ -61,6 +61,7 @@ class ExecutionStats(BaseModel):
     blocked: int = 0
     not_executed: int = 0
     pass_rate: float = Field(default=0.0, ge=0.0, le=100.0)
+    by_status: Dict[str, int] = {}
     trend: List[Dict[str, Any]] = []  # Historical trend data
 
 class ProjectStats(BaseModel):
@@ -75,6 +76,8 @@ class DashboardStats(BaseModel):
     total_executions: int = 0
     pass_rate: float = Field(default=0.0, ge=0.0, le=100.0)
     average_execution_time: float = 0.0  # in seconds
+    p50_execution_time: Optional[float] = None  # in seconds
+    p95_execution_time: Optional[float] = None  # in seconds
     active_test_runs: int = 0
     recent_activity: List[ActivityFeed] = []
     
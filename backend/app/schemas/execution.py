@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from enum import Enum
@@ -101,13 +101,29 @@ class TestExecutionSummary(BaseModel):
 
 class BulkTestExecutionCreate(BaseModel):
     """Schema for creating multiple test executions"""
-    test_case_ids: List[str] = Field(..., min_items=1, max_items=100)
+    test_case_ids: List[str] = Field(..., min_length=1, max_length=1000)
     environment_id: Optional[str] = None
-    notes: Optional[str] = Field(None, max_length=2000)
+
+class BulkTestExecutionError(BaseModel):
+    """A test case id from a bulk request that did not get an execution"""
+    test_case_id: str
+    error: str
     
 class BulkTestExecutionResult(BaseModel):
     """Result schema for bulk test execution creation"""
     created_count: int
     execution_ids: List[str]
     failed_count: int = 0
-    errors: List[str] = []
+    errors: List[BulkTestExecutionError] = []
+
+class TestExecutionRunRequest(BaseModel):
+    """Schema for running test cases, or every test case of a test plan"""
+    environment_id: str
+    test_case_ids: List[str] = Field(default=[], max_length=1000)
+    test_plan_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if not self.test_case_ids and not self.test_plan_id:
+            raise ValueError("Either test_case_ids or test_plan_id is required")
+        return self
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import AliasChoices, BaseModel, Field, ConfigDict
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Optional, List, Union
 from enum import Enum
 
 # Simplified enums for debugging
@@ -29,8 +29,8 @@ class TestStepCreate(TestStepBase):
 class TestStep(TestStepBase):
     id: str
     test_case_id: str
-    created_at: datetime
-    updated_at: datetime
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -60,6 +60,44 @@ class TestCaseResponse(TestCaseBase):
     created_by: str
     created_at: datetime
     updated_at: datetime
-    test_steps: List[TestStep] = []
+    # Read from the ORM ``steps`` relationship
+    test_steps: List[TestStep] = Field(default=[], validation_alias=AliasChoices("test_steps", "steps"))
     
     model_config = ConfigDict(from_attributes=True)
+
+# Lightweight list item: no steps and no test_data/automation_config blobs
+class TestCaseSummary(TestCaseBase):
+    id: str
+    project_id: str
+    created_by: str
+    assigned_to: Optional[str] = None
+    tags: Optional[List[str]] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+# List item of a fields= projection: only the requested fields are set
+class TestCaseFields(BaseModel):
+    id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    project_id: Optional[str] = None
+    test_type: Optional[TestType] = None
+    priority: Optional[Priority] = None
+    status: Optional[Status] = None
+    expected_result: Optional[str] = None
+    created_by: Optional[str] = None
+    assigned_to: Optional[str] = None
+    tags: Optional[List[str]] = None
+    ai_generated: Optional[bool] = None
+    self_healing_enabled: Optional[bool] = None
+    prerequisites: Optional[str] = None
+    test_data: Optional[Any] = None
+    automation_config: Optional[Any] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    test_steps: Optional[List[TestStep]] = None
+
+# Item of the test case list: full, summary or projection depending on the query
+TestCaseListItem = Union[TestCaseResponse, TestCaseSummary, TestCaseFields]
@@ -287,6 +287,9 @@ class WebSocketMessage(BaseModel):
     type: str
     data: Dict[str, Any]
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    # Set on room events only: the room and the event's sequence number
+    room_id: Optional[str] = None
+    seq: Optional[int] = None
 
 class NotificationMessage(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
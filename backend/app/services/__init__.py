@@ -0,0 +1,3 @@
+# Service layer: query and domain logic shared by the API routes
+
+__all__ = ["dashboard"]
@@ -0,0 +1,115 @@
+"""
+Dashboard statistics computed in the database.
+
+All figures are produced by a handful of aggregate queries over the
+execution rollups and ``test_cases`` so that no execution rows are ever
+materialised as ORM objects, regardless of how many a tenant has.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import func, select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.db_models import (
+    ExecutionDailyRollup,
+    ExecutionStatus,
+    Project,
+    TeamMember,
+    TestCase,
+)
+from app.schemas.dashboard import DashboardStats, ExecutionStats
+from app.services.rollups import sum_rollups
+
+logger = logging.getLogger(__name__)
+
+# Executions in any status for a rollup row
+_rollup_total = (
+    ExecutionDailyRollup.pending_count
+    + ExecutionDailyRollup.running_count
+    + ExecutionDailyRollup.completed_count
+    + ExecutionDailyRollup.failed_count
+    + ExecutionDailyRollup.cancelled_count
+)
+
+
+def accessible_project_ids(user_id: str):
+    """
+    Build a subquery selecting the ids of projects visible to a user.
+
+    A project is visible when the user created it or belongs to the team
+    that owns it.
+    """
+    team_ids = select(TeamMember.team_id).where(TeamMember.user_id == user_id)
+    return select(Project.id).where(
+        or_(
+            Project.created_by == user_id,
+            Project.team_id.in_(team_ids)
+        )
+    )
+
+
+async def compute_dashboard_stats(db: AsyncSession, user_id: str) -> DashboardStats:
+    """
+    Compute dashboard statistics for a user.
+
+    Execution figures are summed from the per-project/per-day rollups, so the
+    cost is O(projects x days) rather than O(executions).
+
+    Args:
+        db: Async database session
+        user_id: ID of the user the dashboard is for
+
+    Returns:
+        DashboardStats: Totals, per-status counts, pass rate, duration
+        average/percentiles and active runs across the user's projects
+    """
+    project_ids = accessible_project_ids(user_id).scalar_subquery()
+
+    total_test_cases = await db.scalar(
+        select(func.count(TestCase.id)).where(TestCase.project_id.in_(project_ids))
+    )
+
+    today = datetime.utcnow().date()
+    start_of_week = today - timedelta(days=today.weekday())
+    start_of_month = today.replace(day=1)
+
+    totals = await sum_rollups(db, project_ids)
+    window = (
+        select(
+            func.coalesce(func.sum(_rollup_total).filter(ExecutionDailyRollup.day >= today), 0).label("today"),
+            func.coalesce(func.sum(_rollup_total).filter(ExecutionDailyRollup.day >= start_of_week), 0).label("this_week"),
+            func.coalesce(func.sum(_rollup_total).filter(ExecutionDailyRollup.day >= start_of_month), 0).label("this_month"),
+        )
+        .where(ExecutionDailyRollup.project_id.in_(project_ids))
+        .where(ExecutionDailyRollup.day >= min(start_of_week, start_of_month))
+    )
+    recent = (await db.execute(window)).mappings().one()
+
+    by_status: Dict[str, int] = totals.by_status
+    total_executions = totals.total
+    passed = by_status[ExecutionStatus.COMPLETED.value]
+    pass_rate = (passed / total_executions * 100) if total_executions > 0 else 0.0
+
+    return DashboardStats(
+        total_test_cases=total_test_cases or 0,
+        total_executions=total_executions,
+        pass_rate=pass_rate,
+        average_execution_time=totals.average_duration or 0.0,
+        p50_execution_time=totals.duration_percentile(0.5),
+        p95_execution_time=totals.duration_percentile(0.95),
+        active_test_runs=by_status[ExecutionStatus.RUNNING.value],
+        execution_stats=ExecutionStats(
+            total=total_executions,
+            passed=passed,
+            failed=by_status[ExecutionStatus.FAILED.value],
+            blocked=by_status[ExecutionStatus.CANCELLED.value],
+            not_executed=by_status[ExecutionStatus.PENDING.value],
+            pass_rate=pass_rate,
+            by_status=by_status
+        ),
+        executions_today=int(recent["today"]),
+        executions_this_week=int(recent["this_week"]),
+        executions_this_month=int(recent["this_month"])
+    )
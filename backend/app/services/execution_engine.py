@@ -0,0 +1,438 @@
+"""
+Asynchronous test execution engine.
+
+Executions are created ``PENDING`` (see ``create_bulk_executions``) and
+queued here. A fixed pool of asyncio workers picks them up; every
+environment additionally has its own concurrency limit so one slow target
+cannot take all workers. Each run is persisted as it progresses --
+``PENDING -> RUNNING -> COMPLETED/FAILED`` -- with the daily rollups kept in
+step and every transition handed to an ``on_update`` callback (the
+WebSocket broadcast in the app). Executions queued on the engine (marked
+with ``engine_queued_at`` when created) and still ``PENDING`` when it
+starts, e.g. because of a restart, are queued again; executions registered
+without the engine, by CI or by hand, are never picked up.
+
+Only ``api`` test cases are executable. Their HTTP calls come from
+``automation_config["requests"]`` when present, otherwise from the steps
+themselves: a step description of the form ``METHOD /path [json body]`` and
+an expected result of the form ``STATUS [text expected in the body]``.
+``{{name}}`` placeholders are replaced with the environment's variables.
+Other test types are marked ``CANCELLED`` with result ``blocked``.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.db_models import Environment, ExecutionStatus, TestCase, TestExecution, TestType
+from app.services.executions import transition_execution
+from app.services.http_clients import EnvironmentClientRegistry
+
+logger = logging.getLogger(__name__)
+
+_STEP_PATTERN = re.compile(r"^\s*(GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS)\s+(\S+)(?:\s+(.+))?$", re.S | re.I)
+_EXPECT_PATTERN = re.compile(r"^\s*(\d{3})\b\s*(.*)$", re.S)
+_VARIABLE_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class StepDefinitionError(ValueError):
+    """Raised when a test case step cannot be turned into an HTTP request"""
+
+
+@dataclass
+class HttpStep:
+    method: str
+    path: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Any = None
+    expect_status: Optional[int] = None
+    expect_body_contains: Optional[str] = None
+
+
+@dataclass
+class StepOutcome:
+    passed: bool
+    detail: str
+    elapsed_ms: float
+
+
+def substitute(value: Any, variables: Dict[str, Any]) -> Any:
+    """Replace ``{{name}}`` placeholders in strings, recursively through lists and dicts"""
+    if isinstance(value, str):
+        return _VARIABLE_PATTERN.sub(
+            lambda match: str(variables.get(match.group(1), match.group(0))), value
+        )
+    if isinstance(value, list):
+        return [substitute(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: substitute(item, variables) for key, item in value.items()}
+    return value
+
+
+def http_steps_for(test_case: TestCase) -> List[HttpStep]:
+    """
+    Build the HTTP calls of an ``api`` test case.
+
+    Raises:
+        StepDefinitionError: If a request or step is malformed
+    """
+    requests = (test_case.automation_config or {}).get("requests")
+    if requests:
+        steps = []
+        for index, spec in enumerate(requests, start=1):
+            if not isinstance(spec, dict) or "method" not in spec or "path" not in spec:
+                raise StepDefinitionError(f"Request {index} needs a method and a path")
+            steps.append(HttpStep(
+                method=spec["method"].upper(),
+                path=spec["path"],
+                headers=spec.get("headers") or {},
+                body=spec.get("json"),
+                expect_status=spec.get("expect_status"),
+                expect_body_contains=spec.get("expect_body_contains"),
+            ))
+        return steps
+
+    steps = []
+    for step in sorted(test_case.steps, key=lambda s: s.step_number):
+        match = _STEP_PATTERN.match(step.description or "")
+        if not match:
+            raise StepDefinitionError(
+                f"Step {step.step_number}: expected 'METHOD /path [json body]', got {step.description!r}"
+            )
+        method, path, raw_body = match.groups()
+        body = None
+        if raw_body:
+            try:
+                body = json.loads(raw_body)
+            except ValueError:
+                raise StepDefinitionError(f"Step {step.step_number}: request body is not valid JSON")
+
+        expect_status, expect_text = None, None
+        expected = _EXPECT_PATTERN.match(step.expected_result or "")
+        if expected:
+            expect_status = int(expected.group(1))
+            expect_text = expected.group(2).strip() or None
+        elif (step.expected_result or "").strip():
+            expect_text = step.expected_result.strip()
+
+        steps.append(HttpStep(
+            method=method.upper(),
+            path=path,
+            body=body,
+            expect_status=expect_status,
+            expect_body_contains=expect_text,
+        ))
+    return steps
+
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _origin(url: httpx.URL):
+    return url.scheme, url.host, url.port or _DEFAULT_PORTS.get(url.scheme)
+
+
+def resolve_step_url(base_url: str, path: str) -> str:
+    """
+    URL a step is sent to: paths are joined to the environment's base URL and
+    absolute URLs must share its origin (scheme, host and port), so requests
+    carrying the environment's variables never leave its host
+
+    Raises:
+        StepDefinitionError: If the URL is on another origin
+    """
+    base = httpx.URL(base_url)
+    if path.startswith(("http://", "https://")):
+        url = httpx.URL(path)
+    else:
+        url = httpx.URL(f"{base_url.rstrip('/')}/{path.lstrip('/')}")
+    if _origin(url) != _origin(base):
+        raise StepDefinitionError(f"{url} is outside the environment's base URL {base_url}")
+    return str(url)
+
+
+async def run_http_step(
+    client: httpx.AsyncClient,
+    base_url: str,
+    step: HttpStep,
+    variables: Dict[str, Any]
+) -> StepOutcome:
+    """Send one request and check it against the step's expectations"""
+    try:
+        url = resolve_step_url(base_url, substitute(step.path, variables))
+    except (StepDefinitionError, httpx.InvalidURL) as e:
+        return StepOutcome(False, f"{step.method} {step.path} refused: {e}", 0.0)
+    started = time.perf_counter()
+    try:
+        response = await client.request(
+            step.method,
+            url,
+            headers=substitute(step.headers, variables),
+            json=substitute(step.body, variables)
+        )
+    except httpx.HTTPError as e:
+        elapsed = (time.perf_counter() - started) * 1000
+        return StepOutcome(False, f"{step.method} {url} failed: {type(e).__name__}: {e}", elapsed)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    problems = []
+    if step.expect_status is not None and response.status_code != step.expect_status:
+        problems.append(f"expected status {step.expect_status}, got {response.status_code}")
+    if step.expect_body_contains and step.expect_body_contains not in response.text:
+        problems.append(f"response body does not contain {step.expect_body_contains!r}")
+    if step.expect_status is None and response.is_error:
+        problems.append(f"got status {response.status_code}")
+
+    detail = f"{step.method} {url} -> {response.status_code}"
+    if problems:
+        detail = f"{detail}: {'; '.join(problems)}"
+    return StepOutcome(not problems, detail, elapsed)
+
+
+UpdateCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class ExecutionEngine:
+    """
+    Queue and run pending executions on a pool of asyncio workers.
+
+    Args:
+        session_factory: Callable returning a new ``AsyncSession``
+        max_workers: Number of executions run at the same time overall
+        per_environment_limit: Number of executions run at the same time per environment
+        on_update: Awaited with the execution payload after every status change
+        clients: Pooled HTTP clients per environment; a default registry is used when omitted
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_workers: int = 8,
+        per_environment_limit: int = 4,
+        on_update: Optional[UpdateCallback] = None,
+        clients: Optional[EnvironmentClientRegistry] = None
+    ):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self.per_environment_limit = per_environment_limit
+        self.on_update = on_update
+        self.clients = clients or EnvironmentClientRegistry()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._environment_slots: Dict[Optional[str], asyncio.Semaphore] = {}
+        self._deferred: Dict[Optional[str], Deque[str]] = defaultdict(deque)
+
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self, recover_pending: bool = True) -> None:
+        """
+        Start the workers and, unless ``recover_pending`` is False, queue the
+        executions queued on the engine but left PENDING by a previous run (a
+        restart or a crash).
+        Several processes may recover the same executions: only the first to
+        move one to RUNNING runs it.
+        """
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"execution-worker-{index}")
+            for index in range(self.max_workers)
+        ]
+        logger.info(f"Execution engine started with {self.max_workers} workers")
+        if recover_pending:
+            async with self.session_factory() as db:
+                pending = (await db.execute(
+                    select(TestExecution.id)
+                    .where(
+                        TestExecution.status == ExecutionStatus.PENDING,
+                        TestExecution.engine_queued_at.is_not(None)
+                    )
+                    .order_by(TestExecution.created_at)
+                )).scalars().all()
+            for execution_id in pending:
+                self._queue.put_nowait(execution_id)
+            if pending:
+                logger.info(f"Recovered {len(pending)} pending executions")
+
+    async def stop(self) -> None:
+        """Stop the workers; queued executions stay PENDING in the database until the next start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._deferred.clear()
+        await self.clients.close()
+        logger.info("Execution engine stopped")
+
+    async def submit(self, execution_ids: List[str]) -> None:
+        """Queue already created PENDING executions (created with ``engine_queued``)"""
+        if not self.running:
+            await self.start(recover_pending=False)
+        for execution_id in execution_ids:
+            self._queue.put_nowait(execution_id)
+
+    async def join(self) -> None:
+        """Wait until every queued execution has finished"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "deferred": sum(len(ids) for ids in self._deferred.values()),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            execution_id = await self._queue.get()
+            try:
+                await self.run_execution(execution_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Execution {execution_id} crashed: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    def _slots_for(self, environment_id: Optional[str]) -> asyncio.Semaphore:
+        slots = self._environment_slots.get(environment_id)
+        if slots is None:
+            slots = self._environment_slots[environment_id] = asyncio.Semaphore(self.per_environment_limit)
+        return slots
+
+    async def run_execution(self, execution_id: str) -> None:
+        """Run one PENDING execution to completion, persisting every transition"""
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(TestExecution, TestCase)
+                .join(TestCase, TestExecution.test_case_id == TestCase.id)
+                .options(selectinload(TestCase.steps))
+                .where(TestExecution.id == execution_id)
+            )
+            row = result.first()
+            if row is None:
+                logger.warning(f"Execution {execution_id} no longer exists, skipping")
+                return
+            execution, test_case = row
+            if execution.status != ExecutionStatus.PENDING:
+                logger.info(f"Execution {execution_id} is {execution.status.value}, skipping")
+                return
+
+            environment = None
+            if execution.environment_id:
+                environment = await db.get(Environment, execution.environment_id)
+
+            # Park the execution instead of holding a worker while its
+            # environment is at its limit; it is requeued when a slot frees up
+            environment_id = execution.environment_id
+            slots = self._slots_for(environment_id)
+            if slots.locked():
+                self._deferred[environment_id].append(execution_id)
+                return
+
+            try:
+                async with slots:
+                    if not await self._transition(db, execution, test_case.project_id, ExecutionStatus.RUNNING):
+                        logger.info(f"Execution {execution_id} was picked up elsewhere, skipping")
+                        return
+                    try:
+                        status, result_value, logs, error = await self._run_test_case(test_case, environment)
+                    except Exception as e:
+                        logger.error(f"Execution {execution_id} failed unexpectedly: {str(e)}", exc_info=True)
+                        status, result_value, logs, error = ExecutionStatus.FAILED, "fail", [], f"Engine error: {e}"
+                    if not await self._transition(
+                        db, execution, test_case.project_id, status,
+                        result=result_value, logs="\n".join(logs), error_message=error
+                    ):
+                        logger.info(f"Execution {execution_id} changed status while running, result discarded")
+                        return
+            finally:
+                deferred = self._deferred.get(environment_id)
+                if deferred:
+                    self._queue.put_nowait(deferred.popleft())
+
+        if status == ExecutionStatus.COMPLETED:
+            self.completed += 1
+        elif status == ExecutionStatus.FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+
+    async def _run_test_case(self, test_case: TestCase, environment: Optional[Environment]):
+        """Return ``(status, result, log lines, error message)`` for a test case run"""
+        if test_case.test_type != TestType.API:
+            return (
+                ExecutionStatus.CANCELLED, "blocked", [],
+                f"Test type '{test_case.test_type.value}' cannot be executed automatically"
+            )
+        if environment is None:
+            return ExecutionStatus.CANCELLED, "blocked", [], "API test cases need an environment to run against"
+
+        try:
+            steps = http_steps_for(test_case)
+        except StepDefinitionError as e:
+            return ExecutionStatus.FAILED, "fail", [], str(e)
+        if not steps:
+            return ExecutionStatus.CANCELLED, "blocked", [], "Test case has no steps"
+
+        variables = environment.variables or {}
+        logs, error = [], None
+        async with self.clients.lease(environment.id, environment.base_url) as client:
+            for number, step in enumerate(steps, start=1):
+                outcome = await run_http_step(client, environment.base_url, step, variables)
+                logs.append(f"[step {number}] {'PASS' if outcome.passed else 'FAIL'} "
+                            f"{outcome.detail} ({outcome.elapsed_ms:.0f} ms)")
+                if not outcome.passed:
+                    error = f"Step {number}: {outcome.detail}"
+                    break
+
+        if error:
+            return ExecutionStatus.FAILED, "fail", logs, error
+        return ExecutionStatus.COMPLETED, "pass", logs, None
+
+    async def _transition(self, db: AsyncSession, execution: TestExecution, project_id: str, status,
+                          **changes) -> bool:
+        """Persist a status change; False when the execution's status changed elsewhere first"""
+        if not await transition_execution(db, execution, project_id, status, **changes):
+            await db.rollback()
+            return False
+        await db.commit()
+
+        if self.on_update is not None:
+            try:
+                await self.on_update({
+                    "id": execution.id,
+                    "test_case_id": execution.test_case_id,
+                    "project_id": project_id,
+                    "status": status.value,
+                    "result": execution.result,
+                    "started_at": execution.started_at.isoformat() if execution.started_at else None,
+                    "completed_at": execution.completed_at.isoformat() if execution.completed_at else None,
+                    "duration": execution.duration,
+                    "error_message": execution.error_message,
+                })
+            except Exception as e:
+                logger.error(f"Error publishing update of execution {execution.id}: {str(e)}")
+        return True
@@ -0,0 +1,180 @@
+"""
+Creation and status changes of test executions.
+
+A CI run registers its whole suite at once: every requested test case is
+resolved in a single query, all executions are written with one multi-row
+``INSERT`` and the daily rollups get one update per project.
+
+Status changes go through ``transition_execution``, which only applies when
+the row still has the status it was read with, so concurrent changes (an
+API update racing the engine, or two engine processes picking up the same
+execution) move the rollup counters once.
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.db_models import Environment, ExecutionStatus, TestCase, TestExecution, TestPlanTestCase
+from app.schemas.execution import BulkTestExecutionCreate, BulkTestExecutionError, BulkTestExecutionResult
+from app.services.dashboard import accessible_project_ids
+from app.services.rollups import record_execution_created, record_execution_status_change
+
+# Statuses that end an execution
+FINAL_STATUSES = (ExecutionStatus.COMPLETED, ExecutionStatus.FAILED, ExecutionStatus.CANCELLED)
+
+
+async def create_bulk_executions(
+    db: AsyncSession,
+    bulk: BulkTestExecutionCreate,
+    user_id: str,
+    test_plan_id: Optional[str] = None,
+    engine_queued: bool = False
+) -> Tuple[BulkTestExecutionResult, Dict[str, List[dict]]]:
+    """
+    Create one pending execution per requested test case.
+
+    Only test cases of projects the user can access are run, and only
+    against an environment of their own project. Unknown, inaccessible,
+    mismatched and repeated test case ids are reported per item; the rest are
+    created. With ``engine_queued`` they are marked as queued on the execution
+    engine, which recovers them if it stops before running them. The caller
+    commits.
+
+    Returns:
+        The bulk result and the created executions grouped by project id,
+        ready to broadcast
+
+    Raises:
+        HTTPException: 404 if ``environment_id`` does not exist or belongs to
+        a project the user cannot access
+    """
+    visible_projects = accessible_project_ids(user_id)
+    environment_project_id = None
+    if bulk.environment_id:
+        environment_project_id = await db.scalar(
+            select(Environment.project_id).where(
+                Environment.id == bulk.environment_id,
+                Environment.project_id.in_(visible_projects)
+            )
+        )
+        if environment_project_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Environment with id {bulk.environment_id} not found"
+            )
+
+    result = await db.execute(
+        select(TestCase.id, TestCase.project_id).where(
+            TestCase.id.in_(set(bulk.test_case_ids)),
+            TestCase.project_id.in_(visible_projects)
+        )
+    )
+    project_by_test_case = dict(result.all())
+
+    now = datetime.utcnow()
+    rows, errors, seen = [], [], set()
+    by_project: Dict[str, List[dict]] = defaultdict(list)
+    for test_case_id in bulk.test_case_ids:
+        if test_case_id in seen:
+            errors.append(BulkTestExecutionError(test_case_id=test_case_id, error="Duplicate test case id"))
+            continue
+        seen.add(test_case_id)
+        project_id = project_by_test_case.get(test_case_id)
+        if project_id is None:
+            errors.append(BulkTestExecutionError(test_case_id=test_case_id, error="Test case not found"))
+            continue
+        if environment_project_id is not None and project_id != environment_project_id:
+            errors.append(BulkTestExecutionError(
+                test_case_id=test_case_id, error="Environment belongs to another project"
+            ))
+            continue
+
+        row = {
+            "id": str(uuid.uuid4()),
+            "test_case_id": test_case_id,
+            "environment_id": bulk.environment_id,
+            "test_plan_id": test_plan_id,
+            "executed_by": user_id,
+            "status": ExecutionStatus.PENDING,
+            "screenshots": [],
+            "engine_queued_at": now if engine_queued else None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        rows.append(row)
+        by_project[project_id].append({
+            "id": row["id"],
+            "test_case_id": test_case_id,
+            "status": ExecutionStatus.PENDING.value,
+            "created_at": now.isoformat(),
+        })
+
+    if rows:
+        await db.execute(insert(TestExecution), rows)
+        for project_id, executions in by_project.items():
+            await record_execution_created(db, project_id, now, ExecutionStatus.PENDING, count=len(executions))
+
+    return BulkTestExecutionResult(
+        created_count=len(rows),
+        execution_ids=[row["id"] for row in rows],
+        failed_count=len(errors),
+        errors=errors
+    ), dict(by_project)
+
+
+async def transition_execution(
+    db: AsyncSession,
+    execution: TestExecution,
+    project_id: str,
+    new_status: ExecutionStatus,
+    **changes
+) -> bool:
+    """
+    Move an execution to a new status, with its timestamps and rollup counters.
+
+    The row is updated with ``UPDATE ... WHERE status = <status it was read
+    with>``: when another transaction changed the status in between, nothing
+    is written, the rollups are left alone and False is returned. The caller
+    commits (or rolls back on False).
+
+    Args:
+        changes: Other columns to write in the same guarded update
+            (``result``, ``logs``, ...)
+    """
+    previous, previous_duration = execution.status, execution.duration
+    now = datetime.utcnow()
+    values = {**changes, "status": new_status, "updated_at": now}
+    if new_status == ExecutionStatus.RUNNING:
+        values["started_at"] = now
+    elif new_status in FINAL_STATUSES:
+        values["completed_at"] = now
+        if execution.started_at and values.get("duration", execution.duration) is None:
+            values["duration"] = int((now - execution.started_at).total_seconds())
+
+    unchanged = TestExecution.status.is_(None) if previous is None else TestExecution.status == previous
+    result = await db.execute(
+        update(TestExecution).where(TestExecution.id == execution.id, unchanged).values(**values)
+    )
+    if result.rowcount != 1:
+        return False
+
+    await record_execution_status_change(
+        db, project_id, execution.created_at, previous, new_status,
+        values.get("duration", previous_duration), previous_duration
+    )
+    return True
+
+
+async def test_plan_case_ids(db: AsyncSession, test_plan_id: str) -> List[str]:
+    """Test case ids of a test plan in plan order"""
+    result = await db.execute(
+        select(TestPlanTestCase.test_case_id)
+        .where(TestPlanTestCase.test_plan_id == test_plan_id)
+        .order_by(TestPlanTestCase.order, TestPlanTestCase.created_at)
+    )
+    return list(result.scalars().all())
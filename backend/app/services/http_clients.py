@@ -0,0 +1,161 @@
+"""
+Pooled HTTP clients for API test steps, one per environment.
+
+Every environment gets a long-lived ``httpx.AsyncClient`` with keep-alive
+(and HTTP/2 when the optional ``h2`` package is installed), so consecutive
+steps against the same base URL reuse connections instead of paying a
+TCP/TLS handshake each. Runs hold a client through ``lease``: a client
+replaced because its environment was repointed is closed when its last
+lease ends, so steps still running on it are not cut off. Clients unused
+for ``idle_timeout`` seconds are closed on the next lookup. Connection reuse is measured through httpcore's
+``trace`` extension and reported per environment.
+"""
+import importlib.util
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class _ClientEntry:
+    client: httpx.AsyncClient
+    base_url: str
+    last_used: float = field(default_factory=time.monotonic)
+    requests: int = 0
+    connections_opened: int = 0
+    # Leases not yet released; a retired client is closed when this drops to 0
+    in_use: int = 0
+
+
+class EnvironmentClientRegistry:
+    """
+    Args:
+        max_connections: Connection limit of each environment's pool
+        max_keepalive_connections: Idle connections kept open per environment
+        keepalive_expiry: Seconds an idle connection is kept open
+        idle_timeout: Seconds after which an unused client is closed
+        timeout: Timeout in seconds of every request
+        http2: Negotiate HTTP/2 when the ``h2`` package is installed
+        transport_factory: Optional callable returning the transport of a new client, e.g. for tests
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        idle_timeout: float = 300.0,
+        timeout: float = 30.0,
+        http2: bool = True,
+        transport_factory: Optional[Callable[[], httpx.AsyncBaseTransport]] = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.transport_factory = transport_factory
+        self._clients: Dict[str, _ClientEntry] = {}
+        # Replaced clients still leased by running steps
+        self._retiring: List[_ClientEntry] = []
+        self.evicted = 0
+
+    @asynccontextmanager
+    async def lease(self, environment_id: str, base_url: str) -> AsyncIterator[httpx.AsyncClient]:
+        """The pooled client of an environment, created on first use, held for the block"""
+        await self.evict_idle()
+        entry = self._clients.get(environment_id)
+        if entry is not None and entry.base_url != base_url:
+            # The environment was repointed; its connections are useless now
+            del self._clients[environment_id]
+            await self._retire(entry)
+            entry = None
+        if entry is None:
+            entry = self._clients[environment_id] = self._new_entry(environment_id, base_url)
+        entry.last_used = time.monotonic()
+        entry.in_use += 1
+        try:
+            yield entry.client
+        finally:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            if not entry.in_use and entry in self._retiring:
+                self._retiring.remove(entry)
+                await entry.client.aclose()
+
+    async def _retire(self, entry: _ClientEntry) -> None:
+        """Close a client that left the registry, or once its last lease ends"""
+        if entry.in_use:
+            self._retiring.append(entry)
+        else:
+            await entry.client.aclose()
+
+    def _new_entry(self, environment_id: str, base_url: str) -> _ClientEntry:
+        entry: Optional[_ClientEntry] = None
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                entry.connections_opened += 1
+
+        async def on_request(request: httpx.Request) -> None:
+            entry.requests += 1
+            entry.last_used = time.monotonic()
+            request.extensions["trace"] = trace
+
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            limits=self.limits,
+            timeout=self.timeout,
+            http2=self.http2,
+            transport=self.transport_factory() if self.transport_factory else None,
+            event_hooks={"request": [on_request]}
+        )
+        entry = _ClientEntry(client=client, base_url=base_url)
+        logger.debug(f"Created HTTP client for environment {environment_id} ({base_url})")
+        return entry
+
+    async def evict_idle(self) -> None:
+        """Close clients that have not been used for ``idle_timeout`` seconds"""
+        cutoff = time.monotonic() - self.idle_timeout
+        for environment_id, entry in list(self._clients.items()):
+            if entry.last_used < cutoff and not entry.in_use:
+                del self._clients[environment_id]
+                await entry.client.aclose()
+                self.evicted += 1
+
+    async def close(self) -> None:
+        for entry in [*self._clients.values(), *self._retiring]:
+            await entry.client.aclose()
+        self._clients.clear()
+        self._retiring.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        environments = {}
+        for environment_id, entry in self._clients.items():
+            environments[environment_id] = {
+                "base_url": entry.base_url,
+                "requests": entry.requests,
+                "connections_opened": entry.connections_opened,
+                "connections_reused": max(entry.requests - entry.connections_opened, 0),
+                "idle_seconds": round(time.monotonic() - entry.last_used, 1),
+                "in_use": entry.in_use,
+            }
+        return {
+            "clients": len(self._clients),
+            "retiring": len(self._retiring),
+            "http2": self.http2,
+            "evicted": self.evicted,
+            "environments": environments,
+        }
@@ -0,0 +1,250 @@
+"""
+Cached index of the users who can see a project.
+
+Real-time dashboard events are routed only to a project's subscribers: its
+creator and the members of the team that owns it (the same rule as
+``dashboard.accessible_project_ids``). Sets are loaded on first use and
+kept for a TTL in an LRU. When a ``TeamMember`` of the owning team or the
+project itself changes, the set is dropped at flush and again once the
+change is committed, so a miss loading the old membership in between is
+not kept; a load that started before an invalidation is not cached at all.
+
+Each worker process holds its own index. With a backplane (see
+``app.websocket.backplane``) committed invalidations are applied by all
+the other workers too; without one, the TTL bounds their staleness.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.core.metrics import register_metrics_source
+from app.db.session import AsyncSessionLocal
+from app.models.db_models import Project, TeamMember
+from app.websocket.backplane import Backplane, Envelope, create_backplane
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectSubscriberIndex:
+    """
+    Args:
+        session_factory: Returns a new AsyncSession, used to load misses
+        max_size: Projects kept in the cache
+        ttl_seconds: Seconds a subscriber set is trusted
+        backplane: Pub/sub channel to the indexes of other workers (None:
+            this worker only)
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_size: int = 10000,
+        ttl_seconds: float = 300,
+        backplane: Optional[Backplane] = None
+    ):
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.backplane = backplane
+        self.node_id = uuid.uuid4().hex
+        self._publishing: Set[asyncio.Task] = set()
+        # Bumped by every invalidation; a load that raced one is not cached
+        self._generation = 0
+        # project_id -> (expires_at, team_id, subscribers), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Optional[str], FrozenSet[str]]]" = OrderedDict()
+        # team_id -> cached projects owned by that team, for invalidation
+        self._projects_by_team: Dict[str, Set[str]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.invalidations_published = 0
+        self.invalidations_received = 0
+
+    async def get(self, project_id: str) -> FrozenSet[str]:
+        """Ids of the users who can see a project (empty if it does not exist)"""
+        entry = self._entries.get(project_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(project_id)
+            self.hits += 1
+            return entry[2]
+
+        self.misses += 1
+        generation = self._generation
+        team_id, subscribers = await self._load(project_id)
+        if generation == self._generation:
+            self._store(project_id, team_id, subscribers)
+        return subscribers
+
+    async def _load(self, project_id: str) -> Tuple[Optional[str], FrozenSet[str]]:
+        async with self.session_factory() as db:
+            row = (await db.execute(
+                select(Project.created_by, Project.team_id).where(Project.id == project_id)
+            )).first()
+            if row is None:
+                return None, frozenset()
+
+            created_by, team_id = row
+            subscribers = {created_by}
+            if team_id is not None:
+                members = await db.scalars(select(TeamMember.user_id).where(TeamMember.team_id == team_id))
+                subscribers.update(members)
+            return team_id, frozenset(subscribers)
+
+    def _store(self, project_id: str, team_id: Optional[str], subscribers: FrozenSet[str]) -> None:
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        self.invalidate_project(project_id, count=False)
+        self._entries[project_id] = (time.monotonic() + self.ttl_seconds, team_id, subscribers)
+        if team_id is not None:
+            self._projects_by_team.setdefault(team_id, set()).add(project_id)
+        while len(self._entries) > self.max_size:
+            self.invalidate_project(next(iter(self._entries)), count=False)
+
+    def invalidate_project(self, project_id: str, count: bool = True) -> None:
+        entry = self._entries.pop(project_id, None)
+        if count:
+            self._generation += 1
+        if entry is None:
+            return
+        if count:
+            self.invalidations += 1
+        team_id = entry[1]
+        projects = self._projects_by_team.get(team_id)
+        if projects is not None:
+            projects.discard(project_id)
+            if not projects:
+                del self._projects_by_team[team_id]
+
+    def invalidate_team(self, team_id: str) -> None:
+        """Drop the cached subscribers of every project owned by a team"""
+        self._generation += 1
+        for project_id in list(self._projects_by_team.get(team_id, ())):
+            self.invalidate_project(project_id)
+
+    def invalidate(self, team_ids: Iterable[str] = (), project_ids: Iterable[str] = (),
+                   publish: bool = False) -> None:
+        """
+        Drop the cached subscribers of teams' projects and of projects
+
+        Args:
+            publish: Also have the other workers drop them, through the
+                backplane (call once the change is committed)
+        """
+        team_ids, project_ids = sorted(team_ids), sorted(project_ids)
+        for team_id in team_ids:
+            self.invalidate_team(team_id)
+        for project_id in project_ids:
+            self.invalidate_project(project_id)
+        if publish and self.backplane is not None and (team_ids or project_ids):
+            self._publish({"origin": self.node_id, "team_ids": team_ids, "project_ids": project_ids})
+
+    async def start(self) -> None:
+        """Subscribe to the backplane, if any"""
+        if self.backplane is not None:
+            await self.backplane.start(self._on_backplane_message)
+
+    async def stop(self) -> None:
+        if self.backplane is not None:
+            await asyncio.gather(*self._publishing, return_exceptions=True)
+            await self.backplane.stop()
+
+    def _publish(self, envelope: Envelope) -> None:
+        # Invalidations come from synchronous ORM events: publish in the background
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning("No event loop to publish a project subscriber invalidation")
+            return
+        task = loop.create_task(self.backplane.publish(envelope))
+        self._publishing.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task) -> None:
+        self._publishing.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error(f"Error publishing project subscriber invalidation: {str(task.exception())}")
+        else:
+            self.invalidations_published += 1
+
+    async def _on_backplane_message(self, envelope: Envelope) -> None:
+        if envelope.get("origin") == self.node_id:
+            return
+        self.invalidations_received += 1
+        self.invalidate(envelope.get("team_ids", ()), envelope.get("project_ids", ()))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._projects_by_team.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "invalidations_published": self.invalidations_published,
+            "invalidations_received": self.invalidations_received,
+        }
+
+
+project_subscribers = ProjectSubscriberIndex(
+    AsyncSessionLocal,
+    max_size=settings.PROJECT_SUBSCRIBER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PROJECT_SUBSCRIBER_CACHE_TTL_SECONDS,
+    backplane=create_backplane(settings.WS_BACKPLANE, settings.REDIS_URL, channel="project_subscriber_invalidations")
+)
+register_metrics_source("project_subscribers", project_subscribers.stats)
+
+
+def _record_change(target, key: str, value: str) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(key, set()).add(value)
+
+
+@event.listens_for(TeamMember, "after_insert")
+@event.listens_for(TeamMember, "after_update")
+@event.listens_for(TeamMember, "after_delete")
+def _invalidate_team_subscribers(mapper, connection, target):
+    """A team's membership changed: its projects have new subscribers"""
+    project_subscribers.invalidate_team(str(target.team_id))
+    _record_change(target, "changed_subscriber_team_ids", str(target.team_id))
+
+
+@event.listens_for(Project, "after_update")
+@event.listens_for(Project, "after_delete")
+def _invalidate_project_subscribers(mapper, connection, target):
+    """A project may have changed owner or team"""
+    project_subscribers.invalidate_project(str(target.id))
+    _record_change(target, "changed_subscriber_project_ids", str(target.id))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_subscriber_invalidations(session):
+    """Once the change is committed, drop the subscribers again here and on every worker"""
+    team_ids = session.info.pop("changed_subscriber_team_ids", ())
+    project_ids = session.info.pop("changed_subscriber_project_ids", ())
+    if team_ids or project_ids:
+        project_subscribers.invalidate(team_ids, project_ids, publish=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_subscriber_invalidations(session):
+    session.info.pop("changed_subscriber_team_ids", None)
+    session.info.pop("changed_subscriber_project_ids", None)
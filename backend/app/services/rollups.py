@@ -0,0 +1,389 @@
+"""
+Incrementally maintained per-project/per-day execution rollups.
+
+Every execution is attributed to the day it was created. Creating an
+execution increments the counter of its initial status; a status change
+moves one unit from the old status counter to the new one. The duration
+statistics hold the executions currently in a finished status: a duration
+is folded in when an execution finishes and retracted if it is re-opened
+or cancelled afterwards. Dashboards then read O(projects x days) rollup rows instead of scanning
+``test_executions``.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, delete, func, select, literal_column, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.db_models import (
+    DURATION_BUCKET_BOUNDS,
+    ExecutionDailyRollup,
+    ExecutionStatus,
+    TestCase,
+    TestExecution,
+)
+from app.schemas.execution import TestExecutionSummary
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which an execution has a final duration
+FINISHED_STATUSES = (ExecutionStatus.COMPLETED, ExecutionStatus.FAILED)
+
+BUCKET_COLUMNS = [f"duration_bucket_{i}" for i in range(len(DURATION_BUCKET_BOUNDS) + 1)]
+
+
+def status_column(execution_status) -> str:
+    """Name of the rollup counter column for an execution status"""
+    return f"{ExecutionStatus(execution_status).value}_count"
+
+
+def duration_bucket(duration: int) -> str:
+    """Name of the histogram bucket column a duration falls into"""
+    for index, bound in enumerate(DURATION_BUCKET_BOUNDS):
+        if duration <= bound:
+            return BUCKET_COLUMNS[index]
+    return BUCKET_COLUMNS[-1]
+
+
+def _duration_counters(duration: int) -> Dict[str, int]:
+    """Duration statistics counters of one finished execution"""
+    return {"duration_count": 1, "duration_sum": duration, duration_bucket(duration): 1}
+
+
+def _insert_for(db: AsyncSession):
+    """Return the dialect specific INSERT construct supporting ON CONFLICT"""
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def _least(db: AsyncSession, left, right):
+    if db.bind.dialect.name == "postgresql":
+        return func.least(left, right)
+    return func.min(left, right)
+
+
+def _greatest(db: AsyncSession, left, right):
+    if db.bind.dialect.name == "postgresql":
+        return func.greatest(left, right)
+    return func.max(left, right)
+
+
+async def _apply_delta(
+    db: AsyncSession,
+    project_id: str,
+    day: date,
+    counters: Dict[str, int],
+    duration: Optional[int] = None
+) -> None:
+    """
+    Add counter deltas (and optionally one finished duration) to a rollup row,
+    creating the row if it does not exist yet.
+    """
+    table = ExecutionDailyRollup.__table__
+    values = dict(counters)
+    if duration is not None:
+        for column, delta in _duration_counters(duration).items():
+            values[column] = values.get(column, 0) + delta
+        values["duration_min"] = duration
+        values["duration_max"] = duration
+
+    insert = _insert_for(db)
+    stmt = insert(table).values(
+        project_id=project_id,
+        day=day,
+        updated_at=datetime.utcnow(),
+        **values
+    )
+
+    set_ = {"updated_at": stmt.excluded.updated_at}
+    for column, delta in values.items():
+        if column == "duration_min":
+            set_[column] = func.coalesce(
+                _least(db, table.c.duration_min, stmt.excluded.duration_min),
+                stmt.excluded.duration_min
+            )
+        elif column == "duration_max":
+            set_[column] = func.coalesce(
+                _greatest(db, table.c.duration_max, stmt.excluded.duration_max),
+                stmt.excluded.duration_max
+            )
+        else:
+            set_[column] = table.c[column] + delta
+
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.project_id, table.c.day],
+            set_=set_
+        )
+    )
+
+
+async def record_execution_created(
+    db: AsyncSession,
+    project_id: str,
+    created_at: datetime,
+    execution_status=ExecutionStatus.PENDING,
+    count: int = 1
+) -> None:
+    """Account for ``count`` newly created executions in their project's daily rollup"""
+    await _apply_delta(db, project_id, created_at.date(), {status_column(execution_status): count})
+
+
+async def record_execution_status_change(
+    db: AsyncSession,
+    project_id: str,
+    created_at: datetime,
+    old_status,
+    new_status,
+    duration: Optional[int] = None,
+    old_duration: Optional[int] = None
+) -> None:
+    """
+    Move an execution between status counters in its daily rollup.
+
+    As in ``backfill_rollups``, an execution counts in the duration
+    statistics while it is in a finished status with a duration:
+    ``old_duration`` is retracted when it leaves one (re-opened, cancelled)
+    and ``duration`` folded in when it reaches one. Call it once the
+    execution row holds its new status, as a retraction recomputes the day's
+    ``duration_min``/``duration_max`` from ``test_executions``.
+    """
+    old_status = ExecutionStatus(old_status) if old_status else ExecutionStatus.PENDING
+    new_status = ExecutionStatus(new_status)
+    retracted = old_duration if old_status in FINISHED_STATUSES else None
+    added = duration if new_status in FINISHED_STATUSES else None
+    if old_status == new_status and retracted == added:
+        return
+
+    counters = {}
+    if old_status != new_status:
+        counters = {status_column(old_status): -1, status_column(new_status): 1}
+    if retracted is not None:
+        for column, delta in _duration_counters(retracted).items():
+            counters[column] = counters.get(column, 0) - delta
+    day = created_at.date()
+    await _apply_delta(db, project_id, day, counters, added)
+    if retracted is not None:
+        await _recompute_duration_extremes(db, project_id, day)
+
+
+async def _recompute_duration_extremes(db: AsyncSession, project_id: str, day: date) -> None:
+    """Set a rollup row's ``duration_min``/``duration_max`` from its finished executions"""
+    start = datetime.combine(day, datetime.min.time())
+    lowest, highest = (await db.execute(
+        select(func.min(TestExecution.duration), func.max(TestExecution.duration))
+        .join(TestCase, TestExecution.test_case_id == TestCase.id)
+        .where(
+            TestCase.project_id == project_id,
+            TestExecution.created_at >= start,
+            TestExecution.created_at < start + timedelta(days=1),
+            TestExecution.duration.isnot(None),
+            TestExecution.status.in_(FINISHED_STATUSES)
+        )
+    )).one()
+    table = ExecutionDailyRollup.__table__
+    await db.execute(
+        update(table)
+        .where(table.c.project_id == project_id, table.c.day == day)
+        .values(duration_min=lowest, duration_max=highest)
+    )
+
+
+async def backfill_rollups(db: AsyncSession, project_id: Optional[str] = None) -> int:
+    """
+    Rebuild rollups from ``test_executions`` with a single INSERT ... SELECT.
+
+    Args:
+        db: Async database session
+        project_id: Only rebuild this project's rollups when given
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    table = ExecutionDailyRollup.__table__
+    source = _rollup_source(with_extremes=True).add_columns(
+        literal_column("CURRENT_TIMESTAMP").label("updated_at")
+    )
+    clear = delete(table)
+    if project_id:
+        source = source.where(TestCase.project_id == project_id)
+        clear = clear.where(table.c.project_id == project_id)
+
+    await db.execute(clear)
+    result = await db.execute(
+        table.insert().from_select([column.name for column in source.selected_columns], source)
+    )
+    logger.info(f"Backfilled {result.rowcount} execution rollup rows")
+    return result.rowcount
+
+
+async def record_executions_deleted(db: AsyncSession, *where) -> None:
+    """
+    Take the executions matching ``where`` out of their daily rollups; call
+    it before deleting them.
+
+    Status counters, duration counts/sums and histogram buckets are
+    decremented. ``duration_min``/``duration_max`` cannot be retracted
+    incrementally and keep the extremes seen (``backfill_rollups`` recomputes
+    them exactly).
+    """
+    result = await db.execute(_rollup_source(with_extremes=False).where(*where))
+    for row in result.mappings():
+        counters = {
+            column: -count
+            for column, count in row.items()
+            if column not in ("project_id", "day") and count
+        }
+        if counters:
+            day = row["day"] if isinstance(row["day"], date) else date.fromisoformat(row["day"])
+            await _apply_delta(db, row["project_id"], day, counters)
+
+
+def _rollup_source(with_extremes: bool):
+    """Rollup counters aggregated from ``test_executions`` per project and day"""
+    day = func.date(TestExecution.created_at)
+    finished = and_(
+        TestExecution.duration.isnot(None),
+        TestExecution.status.in_(FINISHED_STATUSES)
+    )
+
+    columns = [TestCase.project_id.label("project_id"), day.label("day")]
+    for execution_status in ExecutionStatus:
+        columns.append(
+            func.count(TestExecution.id)
+            .filter(TestExecution.status == execution_status)
+            .label(status_column(execution_status))
+        )
+    columns += [
+        func.count(TestExecution.id).filter(finished).label("duration_count"),
+        func.coalesce(func.sum(TestExecution.duration).filter(finished), 0).label("duration_sum"),
+    ]
+    if with_extremes:
+        columns += [
+            func.min(TestExecution.duration).filter(finished).label("duration_min"),
+            func.max(TestExecution.duration).filter(finished).label("duration_max"),
+        ]
+    lower = None
+    for index, column in enumerate(BUCKET_COLUMNS):
+        condition = [finished]
+        if lower is not None:
+            condition.append(TestExecution.duration > lower)
+        if index < len(DURATION_BUCKET_BOUNDS):
+            condition.append(TestExecution.duration <= DURATION_BUCKET_BOUNDS[index])
+            lower = DURATION_BUCKET_BOUNDS[index]
+        columns.append(func.count(TestExecution.id).filter(and_(*condition)).label(column))
+
+    return (
+        select(*columns)
+        .select_from(TestExecution)
+        .join(TestCase, TestExecution.test_case_id == TestCase.id)
+        .group_by(TestCase.project_id, day)
+    )
+
+
+@dataclass
+class RollupTotals:
+    """Execution rollup counters summed over a set of projects and days"""
+    by_status: Dict[str, int] = field(default_factory=dict)
+    duration_count: int = 0
+    duration_sum: int = 0
+    duration_max: Optional[int] = None
+    buckets: List[int] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_status.values())
+
+    @property
+    def average_duration(self) -> Optional[float]:
+        if not self.duration_count:
+            return None
+        return self.duration_sum / self.duration_count
+
+    def duration_percentile(self, quantile: float) -> Optional[float]:
+        """
+        Estimate a duration percentile from the histogram buckets.
+
+        Returns the upper bound of the bucket containing the percentile (the
+        maximum observed duration for the open-ended last bucket).
+        """
+        if not self.duration_count:
+            return None
+        rank = quantile * self.duration_count
+        cumulative = 0
+        for index, count in enumerate(self.buckets):
+            cumulative += count
+            if count and cumulative >= rank:
+                if index < len(DURATION_BUCKET_BOUNDS):
+                    return float(min(DURATION_BUCKET_BOUNDS[index], self.duration_max or 0))
+                break
+        return float(self.duration_max) if self.duration_max is not None else None
+
+
+async def sum_rollups(
+    db: AsyncSession,
+    project_ids,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> RollupTotals:
+    """
+    Sum rollup rows for the given projects and day range.
+
+    Args:
+        db: Async database session
+        project_ids: Iterable or subquery of project ids to include
+        date_from: First day to include
+        date_to: Last day to include
+    """
+    rollup = ExecutionDailyRollup
+    status_names = [status_column(execution_status) for execution_status in ExecutionStatus]
+    columns = [func.coalesce(func.sum(getattr(rollup, name)), 0).label(name) for name in status_names]
+    columns += [
+        func.coalesce(func.sum(rollup.duration_count), 0).label("duration_count"),
+        func.coalesce(func.sum(rollup.duration_sum), 0).label("duration_sum"),
+        func.max(rollup.duration_max).label("duration_max"),
+    ]
+    columns += [func.coalesce(func.sum(getattr(rollup, name)), 0).label(name) for name in BUCKET_COLUMNS]
+
+    stmt = select(*columns).where(rollup.project_id.in_(project_ids))
+    if date_from:
+        stmt = stmt.where(rollup.day >= date_from)
+    if date_to:
+        stmt = stmt.where(rollup.day <= date_to)
+
+    row = (await db.execute(stmt)).mappings().one()
+    return RollupTotals(
+        by_status={
+            execution_status.value: int(row[status_column(execution_status)])
+            for execution_status in ExecutionStatus
+        },
+        duration_count=int(row["duration_count"]),
+        duration_sum=int(row["duration_sum"]),
+        duration_max=row["duration_max"],
+        buckets=[int(row[name]) for name in BUCKET_COLUMNS]
+    )
+
+
+async def compute_execution_summary(
+    db: AsyncSession,
+    project_ids,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> TestExecutionSummary:
+    """Build a TestExecutionSummary from the daily rollups"""
+    totals = await sum_rollups(db, project_ids, date_from, date_to)
+    total = totals.total
+    passed = totals.by_status[ExecutionStatus.COMPLETED.value]
+    return TestExecutionSummary(
+        total_executions=total,
+        passed=passed,
+        failed=totals.by_status[ExecutionStatus.FAILED.value],
+        blocked=totals.by_status[ExecutionStatus.CANCELLED.value],
+        not_executed=totals.by_status[ExecutionStatus.PENDING.value],
+        pass_rate=(passed / total * 100) if total > 0 else 0.0,
+        average_duration=totals.average_duration
+    )
@@ -0,0 +1,282 @@
+"""
+Streaming bulk import/export of test cases and their steps.
+
+Import consumes the request body incrementally (NDJSON: one test case per
+line; CSV: one test case per record with ``test_steps`` as a JSON array),
+validates every record against ``TestCaseCreate`` and writes valid ones in
+multi-row ``INSERT`` batches, committing once per batch. A bad record
+(including a line that is not valid UTF-8) is reported with its line number
+and does not abort the import.
+
+Export streams a ``test_cases LEFT JOIN test_steps`` query through a
+server-side cursor and groups the steps of each test case on the fly, so a
+project of any size is written out in constant memory.
+"""
+import csv
+import io
+import json
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import db_models as models
+from app.schemas.test_case import TestCaseCreate
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+CSV_COLUMNS = ("id", "project_id", "title", "description", "test_type", "priority", "status", "test_steps")
+
+# Errors reported back to the client; the counts always cover every record
+MAX_REPORTED_ERRORS = 100
+
+
+def _decode(line: bytes) -> Union[str, ValueError]:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        return ValueError(f"Line is not valid UTF-8 (byte {e.start}: {line[e.start:e.start + 1]!r})")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Union[str, ValueError]]]:
+    """
+    Split a byte stream into ``(line_number, line)`` pairs without buffering it whole
+
+    A line that is not valid UTF-8 is yielded as a ValueError instead.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, _decode(line)
+    if buffer:
+        yield line_number + 1, _decode(buffer)
+
+
+async def parse_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield ``(line_number, record)``; unparsable lines yield the ValueError as the record"""
+    async for line_number, line in iter_lines(chunks):
+        if isinstance(line, ValueError):
+            yield line_number, line
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+
+async def parse_csv(chunks: AsyncIterable[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yield ``(line_number, record)`` for a CSV upload with a header row.
+
+    Quoted fields may span lines; a record is parsed once its quotes balance.
+    """
+    header = None
+    pending, start = "", 0
+    async for line_number, line in iter_lines(chunks):
+        if isinstance(line, ValueError):
+            # Drops the record the line belongs to
+            yield (start if pending else line_number), line
+            pending = ""
+            continue
+        if not pending:
+            start = line_number
+            if not line.strip():
+                continue
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        values = next(csv.reader(io.StringIO(pending)))
+        pending = ""
+        if header is None:
+            header = values
+            continue
+        record = {key: value for key, value in zip(header, values) if value != ""}
+        if "test_steps" in record:
+            try:
+                record["test_steps"] = json.loads(record["test_steps"])
+            except ValueError as e:
+                yield start, e
+                continue
+        yield start, record
+    if pending:
+        yield start, ValueError("Unterminated quoted field")
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+
+class _Batch:
+    def __init__(self):
+        self.test_cases: List[Dict[str, Any]] = []
+        self.steps: List[Dict[str, Any]] = []
+
+    def add(self, test_case: TestCaseCreate, user_id: str) -> None:
+        now = datetime.utcnow()
+        test_case_id = str(uuid.uuid4())
+        self.test_cases.append({
+            "id": test_case_id,
+            "project_id": test_case.project_id,
+            "title": test_case.title,
+            "description": test_case.description,
+            "test_type": models.TestType(test_case.test_type.value),
+            "priority": models.Priority(test_case.priority.value),
+            "status": models.Status(test_case.status.value),
+            "created_by": user_id,
+            "created_at": now,
+            "updated_at": now,
+        })
+        for step in test_case.test_steps:
+            self.steps.append({"id": str(uuid.uuid4()), "test_case_id": test_case_id, **step.model_dump()})
+
+    def __len__(self):
+        return len(self.test_cases)
+
+
+async def import_test_cases(
+    db: AsyncSession,
+    records: AsyncIterable[Tuple[int, Any]],
+    project_id: str,
+    user_id: str,
+    batch_size: int = 500
+) -> Dict[str, Any]:
+    """
+    Validate and insert parsed records into a project.
+
+    Records are forced into ``project_id``; each full batch is inserted with
+    two multi-row statements (test cases, then steps) and committed.
+
+    Returns:
+        Dict with ``imported``/``failed`` counts and the first errors as
+        ``{"line": ..., "error": ...}``
+    """
+    imported, failed = 0, 0
+    errors: List[Dict[str, Any]] = []
+    batch = _Batch()
+
+    async def flush():
+        nonlocal batch, imported
+        if not batch:
+            return
+        await db.execute(insert(models.TestCase), batch.test_cases)
+        if batch.steps:
+            await db.execute(insert(models.TestStep), batch.steps)
+        await db.commit()
+        imported += len(batch)
+        batch = _Batch()
+
+    async for line_number, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError("Expected a JSON object")
+            batch.add(TestCaseCreate.model_validate({**record, "project_id": project_id}), user_id)
+        except (ValueError, ValidationError) as e:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "error": _error_message(e)})
+            continue
+        if len(batch) >= batch_size:
+            await flush()
+    await flush()
+
+    logger.info(f"Imported {imported} test cases into project {project_id} ({failed} rejected)")
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+
+def _export_statement(project_id: str):
+    return (
+        select(
+            models.TestCase.id,
+            models.TestCase.project_id,
+            models.TestCase.title,
+            models.TestCase.description,
+            models.TestCase.test_type,
+            models.TestCase.priority,
+            models.TestCase.status,
+            models.TestStep.step_number,
+            models.TestStep.description.label("step_description"),
+            models.TestStep.expected_result.label("step_expected_result"),
+        )
+        .outerjoin(models.TestStep, models.TestStep.test_case_id == models.TestCase.id)
+        .where(models.TestCase.project_id == project_id)
+        .order_by(models.TestCase.created_at, models.TestCase.id, models.TestStep.step_number)
+    )
+
+
+def _enum_value(value):
+    return getattr(value, "value", value)
+
+
+async def iter_export_records(
+    db: AsyncSession,
+    project_id: str,
+    batch_size: int = 1000
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield each test case of a project with its steps, in creation order"""
+    result = await db.stream(_export_statement(project_id).execution_options(yield_per=batch_size))
+    current: Optional[Dict[str, Any]] = None
+    async for row in result:
+        if current is None or current["id"] != row.id:
+            if current is not None:
+                yield current
+            current = {
+                "id": row.id,
+                "project_id": row.project_id,
+                "title": row.title,
+                "description": row.description,
+                "test_type": _enum_value(row.test_type),
+                "priority": _enum_value(row.priority),
+                "status": _enum_value(row.status),
+                "test_steps": [],
+            }
+        if row.step_number is not None:
+            current["test_steps"].append({
+                "step_number": row.step_number,
+                "description": row.step_description,
+                "expected_result": row.step_expected_result,
+            })
+    if current is not None:
+        yield current
+
+
+async def export_test_cases(
+    db: AsyncSession,
+    project_id: str,
+    fmt: str = NDJSON,
+    batch_size: int = 1000
+) -> AsyncIterator[str]:
+    """Stream a project's test cases as NDJSON lines or CSV records"""
+    if fmt == CSV:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        async for record in iter_export_records(db, project_id, batch_size):
+            writer.writerow({**record, "test_steps": json.dumps(record["test_steps"])})
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+
+    async for record in iter_export_records(db, project_id, batch_size):
+        yield json.dumps(record) + "\n"
@@ -0,0 +1,167 @@
+"""
+Pub/sub backplane connecting the WebSocket managers of several workers.
+
+Each worker delivers an event to its own clients directly and publishes an
+envelope on the backplane; every other worker subscribed to the same
+channel delivers it to the clients it holds. Envelopes carry the publishing
+manager's ``node_id`` so a worker ignores its own messages.
+
+Implementations:
+
+* ``RedisBackplane``     -- Redis pub/sub, for multiple processes or hosts
+  (needs the optional ``redis`` package);
+* ``InProcessBackplane`` -- managers in one process sharing an
+  ``InProcessHub``, for tests and single-process setups.
+"""
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Envelope = Dict[str, Any]
+EnvelopeHandler = Callable[[Envelope], Awaitable[None]]
+
+
+class Backplane(ABC):
+    """Interface of a backplane; ``start`` subscribes ``handler`` to all envelopes"""
+
+    @abstractmethod
+    async def start(self, handler: EnvelopeHandler) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, envelope: Envelope) -> None:
+        ...
+
+    @abstractmethod
+    async def stop(self) -> None:
+        ...
+
+
+class InProcessHub:
+    """Channel shared by the ``InProcessBackplane`` instances attached to it"""
+
+    def __init__(self):
+        self.subscribers: List["InProcessBackplane"] = []
+
+
+class InProcessBackplane(Backplane):
+    def __init__(self, hub: Optional[InProcessHub] = None):
+        self.hub = hub or InProcessHub()
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._handler: Optional[EnvelopeHandler] = None
+
+    async def start(self, handler: EnvelopeHandler) -> None:
+        self._handler = handler
+        self.hub.subscribers.append(self)
+        self._task = asyncio.ensure_future(self._listen())
+
+    async def publish(self, envelope: Envelope) -> None:
+        # Round-trip through JSON like a real transport would
+        data = json.dumps(envelope)
+        for subscriber in list(self.hub.subscribers):
+            subscriber._inbox.put_nowait(data)
+
+    async def _listen(self) -> None:
+        while True:
+            data = await self._inbox.get()
+            try:
+                await self._handler(json.loads(data))
+            except Exception as e:
+                logger.error(f"Error handling backplane message: {str(e)}")
+            finally:
+                self._inbox.task_done()
+
+    async def join(self) -> None:
+        """Wait until every envelope received so far has been handled"""
+        await self._inbox.join()
+
+    async def stop(self) -> None:
+        if self in self.hub.subscribers:
+            self.hub.subscribers.remove(self)
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class RedisBackplane(Backplane):
+    """
+    Args:
+        url: Redis URL, e.g. ``redis://redis:6379/0``
+        channel: Pub/sub channel shared by all workers
+    """
+
+    def __init__(self, url: str, channel: str = "websocket_events"):
+        self.url = url
+        self.channel = channel
+        self._redis = None
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, handler: EnvelopeHandler) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for the Redis WebSocket backplane") from e
+
+        self._redis = redis.from_url(self.url)
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.ensure_future(self._listen(handler))
+        logger.info(f"WebSocket backplane subscribed to {self.channel} on {self.url}")
+
+    async def publish(self, envelope: Envelope) -> None:
+        await self._redis.publish(self.channel, json.dumps(envelope))
+
+    async def _listen(self, handler: EnvelopeHandler) -> None:
+        while True:
+            try:
+                async for message in self._pubsub.listen():
+                    if message.get("type") == "message":
+                        await handler(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the worker alive through Redis restarts
+                logger.error(f"WebSocket backplane connection error: {str(e)}")
+                await asyncio.sleep(1)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+def create_backplane(
+    kind: str,
+    redis_url: Optional[str] = None,
+    channel: str = "websocket_events"
+) -> Optional[Backplane]:
+    """
+    Build the backplane named in settings.
+
+    Args:
+        kind: ``none``, ``memory`` or ``redis``
+        redis_url: Required for ``redis``
+        channel: Redis channel, one per kind of message relayed
+    """
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return None
+    if kind == "memory":
+        return InProcessBackplane()
+    if kind == "redis":
+        if not redis_url:
+            raise ValueError("REDIS_URL must be set to use the Redis WebSocket backplane")
+        return RedisBackplane(redis_url, channel)
+    raise ValueError(f"Unknown WebSocket backplane: {kind}")
@@ -0,0 +1,109 @@
+"""
+Coalescing of high-rate per-entity updates into batch frames.
+
+Updates added for a room are held for that room type's window (or until
+``max_batch`` distinct entities are pending). Only the latest state of each
+entity id is kept, and the whole window is then flushed as one batch, so a
+2,000-case suite run produces a few frames per second per room instead of
+one frame per status change.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Called with (room_id, latest states) when a room's window closes
+FlushCallback = Callable[[str, List[dict]], Awaitable[None]]
+
+
+def room_type(room_id: str) -> str:
+    """``project_<id>`` -> ``project``"""
+    return room_id.split("_", 1)[0]
+
+
+class UpdateCoalescer:
+    """
+    Args:
+        flush: Coroutine emitting one batch for a room
+        windows: Seconds to hold updates, per room type; a room type without
+            a window (or with 0) is flushed immediately
+        max_batch: Distinct entities after which a room is flushed early
+        key: Field identifying the entity of an update
+    """
+
+    def __init__(
+        self,
+        flush: FlushCallback,
+        windows: Dict[str, float],
+        max_batch: int = 200,
+        key: str = "id"
+    ):
+        self.flush = flush
+        self.windows = windows
+        self.max_batch = max_batch
+        self.key = key
+        self._pending: Dict[str, Dict[str, dict]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._flushing: Set[asyncio.Task] = set()
+
+        self.updates = 0
+        self.batches = 0
+        self.superseded = 0
+
+    def window_for(self, room_id: str) -> float:
+        return self.windows.get(room_type(room_id), 0)
+
+    async def add(self, room_id: str, update: dict) -> None:
+        """Hold an update for the room's window, replacing older state of the same entity"""
+        self.updates += 1
+        window = self.window_for(room_id)
+        if window <= 0:
+            await self._emit(room_id, [update])
+            return
+
+        pending = self._pending.setdefault(room_id, {})
+        entity_id = str(update.get(self.key))
+        if pending.pop(entity_id, None) is not None:
+            self.superseded += 1
+        pending[entity_id] = update
+
+        if len(pending) >= self.max_batch:
+            await self.flush_room(room_id)
+        elif room_id not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[room_id] = loop.call_later(window, self._on_window_closed, room_id)
+
+    def _on_window_closed(self, room_id: str) -> None:
+        task = asyncio.ensure_future(self.flush_room(room_id))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def flush_room(self, room_id: str) -> None:
+        timer = self._timers.pop(room_id, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending.pop(room_id, None)
+        if pending:
+            await self._emit(room_id, list(pending.values()))
+
+    async def flush_all(self) -> None:
+        """Emit everything still pending (e.g. at shutdown)"""
+        for room_id in list(self._pending):
+            await self.flush_room(room_id)
+        await asyncio.gather(*self._flushing, return_exceptions=True)
+
+    async def _emit(self, room_id: str, updates: List[dict]) -> None:
+        self.batches += 1
+        try:
+            await self.flush(room_id, updates)
+        except Exception as e:
+            logger.error(f"Error flushing coalesced updates for {room_id}: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "updates": self.updates,
+            "batches": self.batches,
+            "superseded": self.superseded,
+            "pending_rooms": len(self._pending),
+        }
@@ -0,0 +1,178 @@
+"""
+Outbound side of a single WebSocket connection.
+
+Senders never touch the socket: they append a pre-encoded frame to the
+connection's bounded queue (O(1)) and return, and a per-connection writer
+task drains the queue onto the network. When the queue is full the
+configured overflow policy decides what gives:
+
+* ``drop_oldest`` -- discard the oldest queued frame;
+* ``coalesce``    -- replace the oldest queued frame of the same message
+  type (only the latest state of e.g. a dashboard update matters), falling
+  back to ``drop_oldest`` when there is none;
+* ``disconnect``  -- give up on the client and close the connection.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Optional, Set
+
+from fastapi import WebSocket
+
+from .frames import JSON, Frame
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+# Called with (connection, reason, slow) when the writer gives up on a connection
+FailureCallback = Callable[["Connection", str, bool], None]
+
+
+class Connection:
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        max_queue: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        send_timeout: float = 5.0,
+        on_failure: Optional[FailureCallback] = None,
+        encoding: str = JSON,
+        send_latencies: Optional[Deque[float]] = None
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.max_queue = max_queue
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self.send_timeout = send_timeout
+        self.on_failure = on_failure
+        # Wire encoding negotiated by the client (see frames.py)
+        self.encoding = encoding
+        # Shared window of recent send durations (seconds) for latency percentiles
+        self.send_latencies = send_latencies
+        # Rooms joined through this connection
+        self.rooms: Set[str] = set()
+
+        self._frames: Deque[Frame] = deque()
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._task: Optional[asyncio.Task] = None
+        self._timed_out = False
+        self.closed = False
+
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._frames)
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._write_loop())
+
+    def enqueue(self, frame: Frame) -> bool:
+        """
+        Queue a frame for delivery without waiting for the network.
+
+        Returns:
+            bool: False if the frame was not queued (connection closed or
+            disconnected by the overflow policy)
+        """
+        if self.closed:
+            return False
+
+        if len(self._frames) >= self.max_queue:
+            if self.overflow_policy == OverflowPolicy.DISCONNECT:
+                self._fail("outbound queue overflow", slow=True)
+                return False
+            if self.overflow_policy == OverflowPolicy.COALESCE and self._replace_same_type(frame):
+                self.coalesced += 1
+                return True
+            self._frames.popleft()
+            self.dropped += 1
+
+        self._frames.append(frame)
+        self._drained.clear()
+        self._wakeup.set()
+        return True
+
+    def _replace_same_type(self, frame: Frame) -> bool:
+        for index, queued in enumerate(self._frames):
+            if queued.message_type == frame.message_type:
+                del self._frames[index]
+                self._frames.append(frame)
+                return True
+        return False
+
+    async def drain(self) -> None:
+        """Wait until every queued frame has been written (or the connection closed)"""
+        await self._drained.wait()
+
+    def stop(self) -> None:
+        """Stop the writer; queued frames are discarded"""
+        self.closed = True
+        self._frames.clear()
+        self._drained.set()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    async def wait_closed(self) -> None:
+        """Wait for the writer task to exit after ``stop``"""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def _fail(self, reason: str, slow: bool) -> None:
+        if self.closed:
+            return
+        if self.on_failure is not None:
+            self.on_failure(self, reason, slow)
+        self.stop()
+
+    def _send_deadline_missed(self) -> None:
+        self._timed_out = True
+        self._task.cancel()
+
+    async def _write_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while not self.closed:
+                if not self._frames:
+                    self._drained.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                frame = self._frames.popleft()
+                # A timer cancelling this task is much cheaper than wait_for,
+                # which wraps every single send in a task of its own
+                deadline = loop.call_later(self.send_timeout, self._send_deadline_missed)
+                started = time.perf_counter()
+                try:
+                    if frame.binary:
+                        await self.websocket.send_bytes(frame.payload)
+                    else:
+                        await self.websocket.send_text(frame.payload)
+                except asyncio.CancelledError:
+                    if self._timed_out:
+                        self._fail("missed the send deadline", slow=True)
+                    return
+                except Exception as e:
+                    self._fail(f"send failed: {e}", slow=False)
+                    return
+                finally:
+                    deadline.cancel()
+                self.sent += 1
+                if self.send_latencies is not None:
+                    self.send_latencies.append(time.perf_counter() - started)
+        except asyncio.CancelledError:
+            pass
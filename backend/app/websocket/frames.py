@@ -0,0 +1,123 @@
+"""
+Pre-encoded WebSocket frames.
+
+A message is serialized once per wire encoding into a ``Frame`` and that
+same object is queued on every recipient's connection using the encoding,
+so fanning an event out to thousands of clients costs one serialization per
+encoding in use instead of one per client.
+
+Encodings, negotiated per connection through the WebSocket subprotocol:
+
+* ``json``    -- text frames, always available and the fallback;
+* ``msgpack`` -- binary MessagePack frames (needs the ``msgpack`` package);
+* ``cbor``    -- binary CBOR frames (needs the ``cbor2`` package).
+
+Compression is orthogonal: permessage-deflate is negotiated by the ASGI
+server (uvicorn's ``--ws-per-message-deflate``, on by default) for every
+encoding.
+"""
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional, Union
+
+from ..schemas.websocket import WebSocketMessage
+
+JSON = "json"
+MSGPACK = "msgpack"
+CBOR = "cbor"
+
+# Sec-WebSocket-Protocol value a client offers to ask for an encoding
+SUBPROTOCOL_PREFIX = "intellitest."
+
+
+def _encode_json(websocket_message: WebSocketMessage, exclude) -> str:
+    return websocket_message.model_dump_json(exclude=exclude)
+
+
+def _encode_msgpack(websocket_message: WebSocketMessage, exclude) -> bytes:
+    import msgpack
+    return msgpack.packb(websocket_message.model_dump(mode="json", exclude=exclude))
+
+
+def _encode_cbor(websocket_message: WebSocketMessage, exclude) -> bytes:
+    import cbor2
+    return cbor2.dumps(websocket_message.model_dump(mode="json", exclude=exclude))
+
+
+_ENCODERS: Dict[str, Callable[[WebSocketMessage, Optional[set]], Union[str, bytes]]] = {JSON: _encode_json}
+if importlib.util.find_spec("msgpack") is not None:
+    _ENCODERS[MSGPACK] = _encode_msgpack
+if importlib.util.find_spec("cbor2") is not None:
+    _ENCODERS[CBOR] = _encode_cbor
+
+AVAILABLE_ENCODINGS = tuple(_ENCODERS)
+
+
+@dataclass(frozen=True)
+class Frame:
+    message_type: str
+    payload: Union[str, bytes]
+    # Size on the wire, computed once at encoding time
+    nbytes: int = field(default=0, compare=False)
+
+    @property
+    def binary(self) -> bool:
+        return isinstance(self.payload, bytes)
+
+
+def encode_frame(message: dict, encoding: str = JSON) -> Frame:
+    """
+    Serialize a ``{"type": ..., "data": ...}`` message into a shareable frame.
+
+    Args:
+        message: Message with ``type`` and ``data`` keys, and ``room_id``
+            and ``seq`` for room events
+        encoding: One of ``AVAILABLE_ENCODINGS``
+    """
+    return _encode(_to_model(message), encoding)
+
+
+def _to_model(message: dict) -> WebSocketMessage:
+    return WebSocketMessage(
+        type=message["type"],
+        data=message["data"],
+        room_id=message.get("room_id"),
+        seq=message.get("seq")
+    )
+
+
+def _encode(websocket_message: WebSocketMessage, encoding: str) -> Frame:
+    # Only room events carry a room and sequence number
+    exclude = {"room_id", "seq"} if websocket_message.seq is None else None
+    payload = _ENCODERS[encoding](websocket_message, exclude)
+    nbytes = len(payload) if isinstance(payload, bytes) else len(payload.encode("utf-8"))
+    return Frame(websocket_message.type, payload, nbytes)
+
+
+class EncodedMessage:
+    """A message with its frames, encoded on first use for each encoding"""
+
+    def __init__(self, message: dict):
+        self.message = message
+        self.frames: Dict[str, Frame] = {}
+        # One model, and so one timestamp, shared by every encoding
+        self._model = _to_model(message)
+
+    def frame(self, encoding: str = JSON) -> Frame:
+        frame = self.frames.get(encoding)
+        if frame is None:
+            frame = self.frames[encoding] = _encode(self._model, encoding)
+        return frame
+
+
+def negotiate_encoding(offered_subprotocols: Iterable[str]) -> Optional[str]:
+    """
+    Pick the first encoding offered as ``intellitest.<encoding>`` that this
+    server supports; None means plain JSON without a subprotocol.
+    """
+    for subprotocol in offered_subprotocols:
+        if subprotocol.startswith(SUBPROTOCOL_PREFIX):
+            encoding = subprotocol[len(SUBPROTOCOL_PREFIX):]
+            if encoding in _ENCODERS:
+                return encoding
+    return None
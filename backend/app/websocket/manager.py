@@ -1,39 +1,167 @@
 from fastapi import WebSocket, WebSocketDisconnect
-from typing import Dict, List, Set
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncio
+import heapq
 import json
 import logging
+import uuid
+from collections import Counter, deque
 from datetime import datetime
-from ..schemas.websocket import WebSocketMessage, NotificationMessage
+from ..core.config import settings
+from ..schemas.websocket import NotificationMessage
+from .backplane import Backplane, Envelope, create_backplane
+from .coalescer import UpdateCoalescer
+from .room_log import RoomLogs
+from .connection import Connection, OverflowPolicy
+from .frames import JSON, EncodedMessage
 
 
 logger = logging.getLogger(__name__)
 
+# Close code sent to a connection evicted for not keeping up with sends
+CLOSE_SLOW_CONSUMER = 4008
+# Close codes of connections refused by admission control: the user already
+# has too many connections, or this worker is full (RFC 6455 "try again later")
+CLOSE_TOO_MANY_CONNECTIONS = 4029
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# Send durations kept for the latency percentiles
+SEND_LATENCY_WINDOW = 4096
+
 class WebSocketManager:
-    def __init__(self):
+    def __init__(
+        self,
+        send_timeout: float = 5.0,
+        max_queue: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        backplane: Optional[Backplane] = None,
+        execution_update_windows: Optional[Dict[str, float]] = None,
+        execution_update_max_batch: int = 200,
+        room_log_size: int = 200,
+        room_log_max_rooms: int = 10000,
+        max_connections_per_user: int = 0,
+        max_connections: int = 0
+    ):
+        # Deadline for delivering one frame to a connection before it is evicted
+        self.send_timeout = send_timeout
+        # Outbound queue bound and what to do when a client falls that far behind
+        self.max_queue = max_queue
+        self.overflow_policy = OverflowPolicy(overflow_policy)
         # Store active connections by user_id
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
         # Store user sessions
         self.user_sessions: Dict[WebSocket, str] = {}
+        # Outbound queue and writer task of every connection
+        self.connections: Dict[WebSocket, Connection] = {}
         # Store room memberships (for project-based updates)
         self.room_memberships: Dict[str, Set[str]] = {}
+        # Reverse index: rooms of each user. Each Connection also tracks the
+        # rooms it joined; a user stays in a room while any of its
+        # connections is in it, so nothing ever scans all rooms.
+        self.user_rooms: Dict[str, Set[str]] = {}
+        # Recent events of each room, replayed to clients resuming after a
+        # reconnect (room_log_size 0 disables)
+        self.room_logs: Optional[RoomLogs] = None
+        if room_log_size > 0:
+            self.room_logs = RoomLogs(room_log_size, room_log_max_rooms)
+        self.resumes = 0
+        self.resyncs = 0
+        # Close handshakes of evicted connections still in progress
+        self._closing: Set[asyncio.Task] = set()
+        self.evictions = 0
+        # Admission control (0 disables a limit)
+        self.max_connections_per_user = max_connections_per_user
+        self.max_connections = max_connections
+        self.rejected = 0
+        self.send_latencies: deque = deque(maxlen=SEND_LATENCY_WINDOW)
+        # Outbound events, how often they were serialized, and their fan-out
+        self.events = 0
+        self.serializations = 0
+        self.frames_queued = 0
+        self.bytes_encoded = 0
+        self.bytes_queued = 0
+        # Pub/sub channel to the managers of other workers (None: this worker only)
+        self.backplane = backplane
+        self.node_id = uuid.uuid4().hex
+        self.relayed_in = 0
+        self.relayed_out = 0
+        # test_execution_update events are batched per room for the window of
+        # the room type (seconds, e.g. {"project": 0.1}); None sends each at once
+        self.execution_updates: Optional[UpdateCoalescer] = None
+        if execution_update_windows:
+            self.execution_updates = UpdateCoalescer(
+                self._flush_execution_updates,
+                execution_update_windows,
+                max_batch=execution_update_max_batch
+            )
     
-    async def connect(self, websocket: WebSocket, user_id: str):
-        """Connect a user to WebSocket"""
-        await websocket.accept()
+    async def start(self):
+        """Subscribe to the backplane, if any"""
+        if self.backplane is not None:
+            await self.backplane.start(self._on_backplane_message)
+    
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: str,
+        encoding: str = JSON,
+        subprotocol: Optional[str] = None
+    ):
+        """
+        Connect a user to WebSocket, sending frames in the negotiated encoding.
+        
+        Returns:
+            bool: False if admission control refused (and closed) the connection
+        """
+        if subprotocol:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
+        
+        refusal = self._admission_refusal(user_id)
+        if refusal is not None:
+            code, reason = refusal
+            self.rejected += 1
+            logger.warning(f"Refusing WebSocket of user {user_id}: {reason}")
+            await self._close_quietly(websocket, code, reason)
+            return False
         
         if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
+            self.active_connections[user_id] = set()
         
-        self.active_connections[user_id].append(websocket)
+        self.active_connections[user_id].add(websocket)
         self.user_sessions[websocket] = user_id
         
+        connection = Connection(
+            websocket,
+            user_id,
+            max_queue=self.max_queue,
+            overflow_policy=self.overflow_policy,
+            send_timeout=self.send_timeout,
+            on_failure=self._on_connection_failure,
+            encoding=encoding,
+            send_latencies=self.send_latencies
+        )
+        self.connections[websocket] = connection
+        connection.start()
+        
         logger.info(f"User {user_id} connected to WebSocket")
         
         # Send connection confirmation
-        await self.send_personal_message(user_id, {
+        self._deliver_to_user(user_id, {
             "type": "connection_confirmed",
-            "data": {"message": "Connected to real-time updates"}
+            "data": {"message": "Connected to real-time updates", "epoch": self.node_id}
         })
+        return True
+    
+    def _admission_refusal(self, user_id: str):
+        """(close code, reason) if a new connection of the user must be refused"""
+        if self.max_connections and len(self.connections) >= self.max_connections:
+            return CLOSE_TRY_AGAIN_LATER, "Server is at its connection limit"
+        if (self.max_connections_per_user
+                and len(self.active_connections.get(user_id, ())) >= self.max_connections_per_user):
+            return CLOSE_TOO_MANY_CONNECTIONS, "Too many connections"
+        return None
     
     def disconnect(self, websocket: WebSocket):
         """Disconnect a user from WebSocket"""
@@ -42,87 +170,249 @@ class WebSocketManager:
             
             # Remove from active connections
             if user_id in self.active_connections:
-                self.active_connections[user_id].remove(websocket)
+                self.active_connections[user_id].discard(websocket)
                 if not self.active_connections[user_id]:
                     del self.active_connections[user_id]
             
             # Remove from user sessions
             del self.user_sessions[websocket]
             
-            # Remove from all rooms
-            for room_id, members in self.room_memberships.items():
-                members.discard(user_id)
+            # Stop the writer
+            connection = self.connections.pop(websocket, None)
+            if connection is not None:
+                connection.stop()
+                
+                # Leave the rooms this connection was the user's last one in
+                for room_id in connection.rooms:
+                    self._drop_membership_if_unused(user_id, room_id)
             
             logger.info(f"User {user_id} disconnected from WebSocket")
     
+    def _user_connections(self, user_id: str, websocket: Optional[WebSocket] = None) -> List[Connection]:
+        """The given connection of a user, or all of them when none is given"""
+        websockets = [websocket] if websocket is not None else self.active_connections.get(user_id, ())
+        return [self.connections[ws] for ws in websockets if ws in self.connections]
+    
+    def _drop_membership_if_unused(self, user_id: str, room_id: str):
+        if any(room_id in connection.rooms for connection in self._user_connections(user_id)):
+            return
+        
+        members = self.room_memberships.get(room_id)
+        if members is not None:
+            members.discard(user_id)
+            # Clean up empty rooms
+            if not members:
+                del self.room_memberships[room_id]
+        
+        rooms = self.user_rooms.get(user_id)
+        if rooms is not None:
+            rooms.discard(room_id)
+            if not rooms:
+                del self.user_rooms[user_id]
+    
     async def send_personal_message(self, user_id: str, message: dict):
         """Send message to specific user"""
-        if user_id in self.active_connections:
-            websocket_message = WebSocketMessage(
-                type=message["type"],
-                data=message["data"]
-            )
-            
-            # Send to all connections for this user
-            disconnected_connections = []
-            for websocket in self.active_connections[user_id]:
-                try:
-                    await websocket.send_text(websocket_message.json())
-                except:
-                    disconnected_connections.append(websocket)
-            
-            # Clean up disconnected connections
-            for websocket in disconnected_connections:
-                self.disconnect(websocket)
+        self._deliver_to_user(user_id, message)
+        await self._relay({"scope": "user", "target": user_id, "message": message})
     
     async def broadcast_to_room(self, room_id: str, message: dict, exclude_user: str = None):
         """Broadcast message to all users in a room"""
-        if room_id in self.room_memberships:
-            websocket_message = WebSocketMessage(
-                type=message["type"],
-                data=message["data"]
+        self._deliver_to_room(room_id, message, exclude_user)
+        await self._relay({"scope": "room", "target": room_id, "message": message, "exclude_user": exclude_user})
+    
+    def _deliver_to_user(self, user_id: str, message: dict):
+        if user_id in self.active_connections:
+            # Send to all connections for this user
+            self._publish(self.active_connections[user_id], message)
+    
+    def _deliver_to_room(self, room_id: str, message: dict, exclude_user: str = None):
+        log = None
+        if self.room_logs is not None:
+            # Log the event even if nobody is in the room right now: its
+            # members may be about to reconnect
+            log = self.room_logs.for_room(room_id)
+            message = {**message, "room_id": room_id, "seq": self.room_logs.next_seq()}
+        
+        targets = []
+        for user_id in self.room_memberships.get(room_id, ()):
+            if exclude_user and user_id == exclude_user:
+                continue
+            targets.extend(self.active_connections.get(user_id, ()))
+        
+        if targets or log is not None:
+            encoded = self._publish(targets, message)
+            if log is not None:
+                log.append(message["seq"], encoded)
+    
+    def _publish(self, websockets: Iterable[WebSocket], message: dict) -> EncodedMessage:
+        """
+        Serialize a message once per encoding and queue the frames on many connections.
+        
+        Only appends to the per-connection queues; each connection's writer
+        task delivers concurrently with the others under the send deadline,
+        so callers never wait on the network.
+        """
+        encoded = EncodedMessage(message)
+        self.events += 1
+        
+        for websocket in list(websockets):
+            connection = self.connections.get(websocket)
+            if connection is None:
+                continue
+            frame = encoded.frame(connection.encoding)
+            if connection.enqueue(frame):
+                self.frames_queued += 1
+                self.bytes_queued += frame.nbytes
+        
+        self.serializations += len(encoded.frames)
+        self.bytes_encoded += sum(frame.nbytes for frame in encoded.frames.values())
+        return encoded
+    
+    async def _relay(self, envelope: Envelope):
+        """Hand an event to the other workers; clients of this one already have it"""
+        if self.backplane is None:
+            return
+        envelope["origin"] = self.node_id
+        try:
+            await self.backplane.publish(envelope)
+            self.relayed_out += 1
+        except Exception as e:
+            logger.error(f"Error publishing WebSocket event to the backplane: {str(e)}")
+    
+    async def _on_backplane_message(self, envelope: Envelope):
+        """Deliver an event published by another worker to this worker's clients"""
+        if envelope.get("origin") == self.node_id:
+            return
+        self.relayed_in += 1
+        scope, message = envelope.get("scope"), envelope["message"]
+        if scope == "room":
+            self._deliver_to_room(envelope["target"], message, envelope.get("exclude_user"))
+        elif scope == "user":
+            self._deliver_to_user(envelope["target"], message)
+        elif scope == "users":
+            self._deliver_to_users(envelope["target"], message)
+        elif scope == "all":
+            self._publish(list(self.connections), message)
+        else:
+            logger.warning(f"Ignoring backplane message with unknown scope {scope}")
+    
+    def _on_connection_failure(self, connection: Connection, reason: str, slow: bool):
+        if slow:
+            self._evict(connection.websocket, reason)
+        else:
+            self.disconnect(connection.websocket)
+    
+    async def drain(self):
+        """Wait until every queued frame has been written (used by tests and shutdown)"""
+        await asyncio.gather(*(connection.drain() for connection in list(self.connections.values())))
+    
+    async def shutdown(self):
+        """Leave the backplane, stop every writer and wait for pending close handshakes"""
+        if self.execution_updates is not None:
+            await self.execution_updates.flush_all()
+        if self.backplane is not None:
+            await self.backplane.stop()
+        connections = list(self.connections.values())
+        for connection in connections:
+            connection.stop()
+        await asyncio.gather(
+            *(connection.wait_closed() for connection in connections),
+            *self._closing,
+            return_exceptions=True
+        )
+    
+    def _evict(self, websocket: WebSocket, reason: str):
+        """Drop a connection and close it in the background"""
+        user_id = self.user_sessions.get(websocket)
+        logger.warning(f"Evicting WebSocket of user {user_id}: {reason}")
+        self.evictions += 1
+        self.disconnect(websocket)
+        
+        task = asyncio.ensure_future(self._close_quietly(websocket, CLOSE_SLOW_CONSUMER, "Too slow"))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    async def _close_quietly(self, websocket: WebSocket, code: int, reason: str):
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=code, reason=reason),
+                timeout=self.send_timeout
             )
-            
-            for user_id in self.room_memberships[room_id]:
-                if exclude_user and user_id == exclude_user:
-                    continue
-                
-                if user_id in self.active_connections:
-                    disconnected_connections = []
-                    for websocket in self.active_connections[user_id]:
-                        try:
-                            await websocket.send_text(websocket_message.json())
-                        except:
-                            disconnected_connections.append(websocket)
-                    
-                    # Clean up disconnected connections
-                    for websocket in disconnected_connections:
-                        self.disconnect(websocket)
-    
-    async def join_room(self, user_id: str, room_id: str):
-        """Add user to a room"""
-        if room_id not in self.room_memberships:
-            self.room_memberships[room_id] = set()
-        
-        self.room_memberships[room_id].add(user_id)
-        
-        # Notify user they joined the room
-        await self.send_personal_message(user_id, {
+        except Exception:
+            pass
+    
+    async def join_room(self, user_id: str, room_id: str, websocket: Optional[WebSocket] = None):
+        """Add a connection of a user (all of its connections by default) to a room"""
+        self._add_membership(user_id, room_id, self._user_connections(user_id, websocket))
+        
+        # Notify user they joined the room, with the sequence number to resume from
+        self._deliver_to_user(user_id, {
             "type": "room_joined",
-            "data": {"room_id": room_id}
+            "data": {"room_id": room_id, "seq": self._room_seq(room_id), "epoch": self.node_id}
         })
     
-    async def leave_room(self, user_id: str, room_id: str):
-        """Remove user from a room"""
-        if room_id in self.room_memberships:
-            self.room_memberships[room_id].discard(user_id)
+    def _add_membership(self, user_id: str, room_id: str, connections: List[Connection]):
+        if connections:
+            for connection in connections:
+                connection.rooms.add(room_id)
             
-            # Clean up empty rooms
-            if not self.room_memberships[room_id]:
-                del self.room_memberships[room_id]
+            if room_id not in self.room_memberships:
+                self.room_memberships[room_id] = set()
+            
+            self.room_memberships[room_id].add(user_id)
+            self.user_rooms.setdefault(user_id, set()).add(room_id)
+    
+    def _room_seq(self, room_id: str) -> Optional[int]:
+        """Sequence number of the latest event of a room"""
+        if self.room_logs is None:
+            return None
+        return self.room_logs.for_room(room_id).last_seq
+    
+    async def resume(
+        self,
+        user_id: str,
+        room_id: str,
+        last_seq: Optional[int],
+        epoch: Optional[str],
+        websocket: Optional[WebSocket] = None
+    ):
+        """
+        Rejoin a room after a reconnect and replay the events missed since ``last_seq``.
+        
+        The client gets the missed frames followed by ``room_resumed``, or
+        ``resync_required`` when they are no longer buffered (or were
+        numbered by another worker, i.e. ``epoch`` differs) and it has to
+        refetch.
+        """
+        connections = self._user_connections(user_id, websocket)
+        self._add_membership(user_id, room_id, connections)
+        
+        missed = None
+        log = self.room_logs.get(room_id) if self.room_logs is not None else None
+        if log is not None and epoch == self.node_id and isinstance(last_seq, int):
+            missed = log.since(last_seq)
+        
+        websockets = [connection.websocket for connection in connections]
+        data = {"room_id": room_id, "seq": self._room_seq(room_id), "epoch": self.node_id}
+        if missed is None:
+            self.resyncs += 1
+            self._publish(websockets, {"type": "resync_required", "data": data})
+            return
+        
+        self.resumes += 1
+        for connection in connections:
+            for encoded in missed:
+                connection.enqueue(encoded.frame(connection.encoding))
+        self._publish(websockets, {"type": "room_resumed", "data": {**data, "replayed": len(missed)}})
+    
+    async def leave_room(self, user_id: str, room_id: str, websocket: Optional[WebSocket] = None):
+        """Remove a connection of a user (all of its connections by default) from a room"""
+        for connection in self._user_connections(user_id, websocket):
+            connection.rooms.discard(room_id)
+        self._drop_membership_if_unused(user_id, room_id)
         
         # Notify user they left the room
-        await self.send_personal_message(user_id, {
+        self._deliver_to_user(user_id, {
             "type": "room_left",
             "data": {"room_id": room_id}
         })
@@ -137,7 +427,35 @@ class WebSocketManager:
         # Broadcast to project room
         project_id = execution_data.get("project_id")
         if project_id:
-            await self.broadcast_to_room(f"project_{project_id}", message)
+            room_id = f"project_{project_id}"
+            if self.execution_updates is not None and self.execution_updates.window_for(room_id) > 0:
+                await self.execution_updates.add(room_id, execution_data)
+            else:
+                await self.broadcast_to_room(room_id, message)
+    
+    async def _flush_execution_updates(self, room_id: str, executions: List[dict]):
+        """Send the latest state of every execution updated during a window as one frame"""
+        message = {
+            "type": "test_execution_batch_update",
+            "data": {
+                "room_id": room_id,
+                "count": len(executions),
+                "executions": executions
+            }
+        }
+        await self.broadcast_to_room(room_id, message)
+    
+    async def broadcast_bulk_test_execution_update(self, project_id: str, executions: List[dict]):
+        """Broadcast many new executions of a project as a single message"""
+        message = {
+            "type": "test_execution_bulk_update",
+            "data": {
+                "project_id": project_id,
+                "count": len(executions),
+                "executions": executions
+            }
+        }
+        await self.broadcast_to_room(f"project_{project_id}", message)
     
     async def broadcast_comment_update(self, comment_data: dict):
         """Broadcast new comment updates"""
@@ -151,16 +469,29 @@ class WebSocketManager:
         if test_case_id:
             await self.broadcast_to_room(f"testcase_{test_case_id}", message)
     
-    async def broadcast_dashboard_update(self, dashboard_data: dict):
-        """Broadcast dashboard updates"""
+    async def broadcast_dashboard_update(self, dashboard_data: dict, user_ids: Optional[Iterable[str]] = None):
+        """Broadcast dashboard updates to the given users (all connected users by default)"""
         message = {
             "type": "dashboard_update",
             "data": dashboard_data
         }
         
-        # Broadcast to all connected users
-        for user_id in self.active_connections:
-            await self.send_personal_message(user_id, message)
+        if user_ids is None:
+            # Broadcast to all connected users
+            self._publish(list(self.connections), message)
+            await self._relay({"scope": "all", "message": message})
+            return
+        
+        user_ids = list(user_ids)
+        self._deliver_to_users(user_ids, message)
+        await self._relay({"scope": "users", "target": user_ids, "message": message})
+    
+    def _deliver_to_users(self, user_ids: Iterable[str], message: dict):
+        targets = []
+        for user_id in user_ids:
+            targets.extend(self.active_connections.get(user_id, ()))
+        if targets:
+            self._publish(targets, message)
     
     async def send_notification(self, user_id: str, notification: NotificationMessage):
         """Send notification to specific user"""
@@ -171,6 +502,44 @@ class WebSocketManager:
         
         await self.send_personal_message(user_id, message)
     
+    def stats(self) -> Dict[str, Any]:
+        """Counters and live gauges for the metrics endpoint"""
+        events = self.events or 1
+        queue_depths = [connection.queue_depth for connection in self.connections.values()]
+        largest_rooms = heapq.nlargest(
+            10, ((len(members), room_id) for room_id, members in self.room_memberships.items())
+        )
+        latencies = sorted(self.send_latencies)
+        return {
+            "connections": len(self.connections),
+            "users": len(self.active_connections),
+            "max_connections": self.max_connections,
+            "max_connections_per_user": self.max_connections_per_user,
+            "rejected": self.rejected,
+            "rooms": len(self.room_memberships),
+            "largest_rooms": {room_id: members for members, room_id in largest_rooms},
+            "queue_depth_total": sum(queue_depths),
+            "queue_depth_max": max(queue_depths, default=0),
+            "send_p50_ms": _percentile_ms(latencies, 0.5),
+            "send_p99_ms": _percentile_ms(latencies, 0.99),
+            "evictions": self.evictions,
+            "events": self.events,
+            "serializations": self.serializations,
+            "frames_queued": self.frames_queued,
+            "bytes_encoded": self.bytes_encoded,
+            "bytes_queued": self.bytes_queued,
+            "serializations_per_event": round(self.serializations / events, 3),
+            "bytes_queued_per_event": round(self.bytes_queued / events, 1),
+            "backplane": type(self.backplane).__name__ if self.backplane else None,
+            "relayed_in": self.relayed_in,
+            "relayed_out": self.relayed_out,
+            "execution_updates": self.execution_updates.stats() if self.execution_updates else None,
+            "encodings": dict(Counter(connection.encoding for connection in self.connections.values())),
+            "room_logs": len(self.room_logs) if self.room_logs is not None else None,
+            "resumes": self.resumes,
+            "resyncs": self.resyncs,
+        }
+    
     def get_connected_users(self) -> List[str]:
         """Get list of currently connected users"""
         return list(self.active_connections.keys())
@@ -178,6 +547,30 @@ class WebSocketManager:
     def get_room_members(self, room_id: str) -> List[str]:
         """Get list of users in a specific room"""
         return list(self.room_memberships.get(room_id, set()))
+    
+    def get_user_rooms(self, user_id: str) -> List[str]:
+        """Get list of rooms a user is in"""
+        return list(self.user_rooms.get(user_id, set()))
+
+def _percentile_ms(sorted_seconds: List[float], quantile: float) -> Optional[float]:
+    if not sorted_seconds:
+        return None
+    index = min(int(quantile * len(sorted_seconds)), len(sorted_seconds) - 1)
+    return round(sorted_seconds[index] * 1000, 3)
 
 # Global WebSocket manager instance
-websocket_manager = WebSocketManager()
\ No newline at end of file
+websocket_manager = WebSocketManager(
+    send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+    max_queue=settings.WS_OUTBOUND_QUEUE_SIZE,
+    overflow_policy=settings.WS_OVERFLOW_POLICY,
+    backplane=create_backplane(settings.WS_BACKPLANE, settings.REDIS_URL),
+    execution_update_windows={
+        room_type: window_ms / 1000
+        for room_type, window_ms in settings.WS_EXECUTION_UPDATE_WINDOWS_MS.items()
+    },
+    execution_update_max_batch=settings.WS_EXECUTION_UPDATE_MAX_BATCH,
+    room_log_size=settings.WS_ROOM_LOG_SIZE,
+    room_log_max_rooms=settings.WS_ROOM_LOG_MAX_ROOMS,
+    max_connections_per_user=settings.WS_MAX_CONNECTIONS_PER_USER,
+    max_connections=settings.WS_MAX_CONNECTIONS_PER_WORKER
+)
\ No newline at end of file
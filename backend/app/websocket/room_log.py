@@ -0,0 +1,83 @@
+"""
+Replayable per-room event logs.
+
+Every room event gets a sequence number, increasing across all rooms (so
+numbers are never reused when a room's log is dropped and recreated), and
+the encoded message is kept in the room's bounded ring buffer. A reconnecting
+client sends the last sequence number it saw and is replayed just the
+frames it missed, or told to refetch when they have already rotated out of
+the buffer.
+
+Sequence numbers are local to one manager (worker) and one process
+lifetime, identified by the manager's ``node_id``; a client resuming
+against another worker has to refetch.
+"""
+from collections import OrderedDict, deque
+from typing import Deque, List, Optional, Tuple
+
+from .frames import EncodedMessage
+
+
+class RoomLog:
+    def __init__(self, size: int, floor: int):
+        self.events: Deque[Tuple[int, EncodedMessage]] = deque(maxlen=size)
+        # Events up to this sequence number are not (or no longer) buffered
+        self.floor = floor
+        self.last_seq = floor
+
+    def append(self, seq: int, event: EncodedMessage) -> None:
+        if len(self.events) == self.events.maxlen:
+            self.floor = self.events[0][0]
+        self.events.append((seq, event))
+        self.last_seq = seq
+
+    def since(self, seq: int) -> Optional[List[EncodedMessage]]:
+        """
+        Events after ``seq``.
+
+        Returns:
+            Optional[List[EncodedMessage]]: None when some of them are no longer
+            buffered (or ``seq`` is not from this log), so the client has
+            to refetch
+        """
+        if seq < self.floor or seq > self.last_seq:
+            return None
+        return [event for event_seq, event in self.events if event_seq > seq]
+
+
+class RoomLogs:
+    """
+    Logs of the most recently active rooms.
+
+    Args:
+        size: Events buffered per room
+        max_rooms: Rooms with a log; the least recently active one is
+            dropped beyond that
+    """
+
+    def __init__(self, size: int = 200, max_rooms: int = 10000):
+        self.size = size
+        self.max_rooms = max_rooms
+        self._logs: "OrderedDict[str, RoomLog]" = OrderedDict()
+        self.last_seq = 0
+
+    def next_seq(self) -> int:
+        self.last_seq += 1
+        return self.last_seq
+
+    def get(self, room_id: str) -> Optional[RoomLog]:
+        return self._logs.get(room_id)
+
+    def for_room(self, room_id: str) -> RoomLog:
+        """The log of a room, created (and marked most recently active) on demand"""
+        log = self._logs.get(room_id)
+        if log is None:
+            log = self._logs[room_id] = RoomLog(self.size, floor=self.last_seq)
+            if len(self._logs) > self.max_rooms:
+                self._logs.popitem(last=False)
+        else:
+            self._logs.move_to_end(room_id)
+        return log
+
+    def __len__(self) -> int:
+        return len(self._logs)
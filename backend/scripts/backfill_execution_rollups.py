@@ -0,0 +1,31 @@
+"""
+Rebuild the execution_daily_rollups table from test_executions.
+
+Usage:
+    python scripts/backfill_execution_rollups.py [--project-id PROJECT_ID]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import AsyncSessionLocal, async_engine
+from app.services.rollups import backfill_rollups
+
+
+async def main(project_id=None):
+    async with AsyncSessionLocal() as session:
+        rows = await backfill_rollups(session, project_id)
+        await session.commit()
+    await async_engine.dispose()
+    print(f"Wrote {rows} rollup rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill execution daily rollups")
+    parser.add_argument("--project-id", help="Only rebuild rollups for this project")
+    args = parser.parse_args()
+    asyncio.run(main(args.project_id))
@@ -0,0 +1,173 @@
+"""
+Load test the project list endpoint on a blocking vs an async session.
+
+Serves ``GET /projects/`` from a SQLite file database in two
+ways: ``sync`` replays the old handler (``db.query`` on a synchronous
+Session inside an ``async def`` route, i.e. on the event loop) and ``async``
+mounts the real router on an ``AsyncSession`` (aiosqlite). ``--latency-ms``
+adds a per-statement delay on the database connection to stand in for the
+network round trip to PostgreSQL. Prints requests/s and the latency of a
+trivial ``/ping`` route served alongside.
+
+Usage:
+    python scripts/benchmark_async_db.py [--requests 400] [--concurrency 50] [--latency-ms 2]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.pagination import paginate
+from app.api.v1.routes import projects
+from app.core.security import get_current_user
+from app.db.base import Base
+from app.db.session import get_db
+from app.models import db_models as models
+
+USER_ID = "bench-user"
+
+
+def add_latency(engine, latency_ms: float) -> None:
+    """
+    Sleep on every statement in the thread running it (the event loop for a
+    sync session, aiosqlite's worker for an async one), like a network round trip
+    """
+    def round_trip(statement):
+        time.sleep(latency_ms / 1000)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if hasattr(dbapi_connection, "run_async"):
+            dbapi_connection.run_async(lambda connection: connection.set_trace_callback(round_trip))
+        else:
+            dbapi_connection.set_trace_callback(round_trip)
+
+
+def seed(path: str, project_count: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(models.User(id=USER_ID, email="bench@example.com", full_name="Bench", hashed_password="x"))
+        for index in range(project_count):
+            db.add(models.Project(name=f"project-{index}", created_by=USER_ID))
+        db.commit()
+    engine.dispose()
+
+
+def build_sync_app(path: str, latency_ms: float) -> FastAPI:
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    add_latency(engine, latency_ms)
+    session_factory = sessionmaker(bind=engine)
+    app = FastAPI()
+
+    async def get_sync_db():
+        with session_factory() as db:
+            yield db
+
+    # The previous implementation of the route, run on the event loop
+    @app.get("/projects/")
+    async def read_projects(limit: int = 100, db: Session = Depends(get_sync_db)):
+        user = db.query(models.User).filter(models.User.id == USER_ID).first()
+        query = db.query(models.Project).filter(models.Project.created_by == user.id)
+        return [
+            {"id": project.id, "name": project.name}
+            for project in paginate(query, models.Project, limit).all()
+        ]
+
+    return app
+
+
+def build_async_app(path: str, latency_ms: float) -> FastAPI:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    add_latency(engine.sync_engine, latency_ms)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    app = FastAPI()
+
+    async def get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app.include_router(projects.router, prefix="/projects")
+    app.dependency_overrides[get_db] = get_async_db
+    # Stands in for the token check, which also loads the user
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=USER_ID)
+    return app
+
+
+def add_ping(app: FastAPI) -> FastAPI:
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+    return app
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_load(app: FastAPI, requests: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+        done = asyncio.Event()
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/projects/")
+                response.raise_for_status()
+
+        async def pinger():
+            samples = []
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/ping")
+                samples.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.005)
+            return samples
+
+        ping_task = asyncio.ensure_future(pinger())
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            done.set()
+        elapsed = time.perf_counter() - started
+        return requests / elapsed, await ping_task
+
+
+async def main(requests: int, concurrency: int, latency_ms: float, project_count: int):
+    # Importing the app turns on SQL and pool logging
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        seed(path, project_count)
+        for label, app in (("sync", build_sync_app(path, latency_ms)),
+                           ("async", build_async_app(path, latency_ms))):
+            throughput, pings = await run_load(add_ping(app), requests, concurrency)
+            print(f"{label:>5}: {throughput:8.1f} req/s  ping p50={statistics.median(pings):8.2f} ms  "
+                  f"p99={percentile(pings, 99):8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark a list endpoint on sync vs async sessions")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--projects", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency_ms, args.projects))
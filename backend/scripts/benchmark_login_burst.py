@@ -0,0 +1,93 @@
+"""
+Measure latency of an unrelated endpoint while a burst of logins is hashing.
+
+Runs a minimal app in-process (no database) with a ``/login`` route that
+verifies a bcrypt hash either inline on the event loop or on the password
+hash pool, and a trivial ``/ping`` route. Prints ping p50/p99 for both modes.
+
+Usage:
+    python scripts/benchmark_login_burst.py [--logins 50] [--pings 200] [--rounds 12]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from passlib.context import CryptContext
+
+from app.auth.hashing import PasswordHashPool
+
+
+def build_app(context: CryptContext, stored_hash: str, pool: PasswordHashPool = None) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login")
+    async def login():
+        if pool is None:
+            valid = context.verify("password", stored_hash)
+        else:
+            valid = await pool.run(context.verify, "password", stored_hash)
+        return {"ok": valid}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_burst(app: FastAPI, logins: int, pings: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def timed_ping():
+            started = time.perf_counter()
+            await client.get("/ping")
+            return (time.perf_counter() - started) * 1000
+
+        async def pinger():
+            samples = []
+            for _ in range(pings):
+                samples.append(await timed_ping())
+                await asyncio.sleep(0.005)
+            return samples
+
+        burst = [client.post("/login") for _ in range(logins)]
+        results = await asyncio.gather(pinger(), *burst)
+        return results[0]
+
+
+async def main(logins: int, pings: int, rounds: int, workers: int):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    stored_hash = context.hash("password")
+
+    pool = PasswordHashPool(max_workers=workers, max_pending=logins)
+    for label, app in (("inline", build_app(context, stored_hash)),
+                       ("pool", build_app(context, stored_hash, pool))):
+        samples = await run_burst(app, logins, pings)
+        print(f"{label:>6}: ping p50={statistics.median(samples):8.2f} ms  "
+              f"p99={percentile(samples, 99):8.2f} ms  max={max(samples):8.2f} ms")
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark endpoint latency during a login burst")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--pings", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.pings, args.rounds, args.workers))
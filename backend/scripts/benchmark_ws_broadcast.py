@@ -0,0 +1,101 @@
+"""
+Measure room broadcast latency with a few deliberately slow consumers.
+
+Builds a room of in-memory fake WebSockets (no network) in which a handful of
+members take ``--slow-delay`` seconds per send, then times how long it takes
+until every healthy member has the frame: once with the old one-by-one
+delivery and once through WebSocketManager's per-connection outbound
+queues, whose writers deliver concurrently under a send deadline.
+
+Usage:
+    python scripts/benchmark_ws_broadcast.py [--members 5000] [--slow 5] [--slow-delay 0.5] [--send-timeout 0.2]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.websocket.manager import WebSocketManager
+
+MESSAGE = {"type": "test_execution_update", "data": {"id": "execution-1", "status": "running"}}
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received_at = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        else:
+            await asyncio.sleep(0)
+        self.received_at = time.perf_counter()
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+async def build_room(members: int, slow: int, slow_delay: float, send_timeout: float):
+    manager = WebSocketManager(send_timeout=send_timeout)
+    sockets = []
+    for index in range(members):
+        user_id = f"user-{index}"
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, user_id)
+        await manager.join_room(user_id, "project_bench")
+        sockets.append(websocket)
+    await manager.drain()
+    # Spread the slow consumers through the room
+    step = max(members // max(slow, 1), 1)
+    for websocket in sockets[::step][:slow]:
+        websocket.delay = slow_delay
+    return manager, sockets
+
+
+async def sequential_broadcast(manager: WebSocketManager, room_id: str, message: dict):
+    """The previous delivery loop: one awaited send after another"""
+    text = str(message)
+    for user_id in manager.room_memberships[room_id]:
+        for websocket in manager.active_connections.get(user_id, []):
+            await websocket.send_text(text)
+
+
+async def measure(label, broadcast, members, slow, slow_delay, send_timeout):
+    manager, sockets = await build_room(members, slow, slow_delay, send_timeout)
+    started = time.perf_counter()
+    await broadcast(manager)
+    total = time.perf_counter() - started
+    # Let the writers finish before looking at who got the frame
+    await manager.drain()
+    healthy = [s.received_at for s in sockets if not s.delay and s.received_at]
+    last_healthy = max(healthy) - started if healthy else float("nan")
+    await manager.shutdown()
+    print(f"{label:>10}: all healthy members served after {last_healthy * 1000:8.1f} ms, "
+          f"broadcast returned after {total * 1000:8.1f} ms, evicted {manager.evictions}")
+
+
+async def main(members: int, slow: int, slow_delay: float, send_timeout: float):
+    logging.getLogger("app.websocket.manager").setLevel(logging.ERROR)
+    await measure("sequential", lambda m: sequential_broadcast(m, "project_bench", MESSAGE),
+                  members, slow, slow_delay, send_timeout)
+    await measure("queued", lambda m: m.broadcast_to_room("project_bench", MESSAGE),
+                  members, slow, slow_delay, send_timeout)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket room broadcast latency")
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--slow", type=int, default=5)
+    parser.add_argument("--slow-delay", type=float, default=0.5)
+    parser.add_argument("--send-timeout", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(main(args.members, args.slow, args.slow_delay, args.send_timeout))
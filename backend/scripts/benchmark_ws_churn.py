@@ -0,0 +1,99 @@
+"""
+Measure WebSocketManager connect/join/disconnect cost under connection churn.
+
+Connects ``--connections`` in-memory fake WebSockets, each joining
+``--rooms-per-connection`` rooms out of ``--rooms`` (one per project and test
+case in a real deployment), then disconnects and reconnects all of them,
+timing each phase. For comparison the disconnect phase is repeated with the
+previous algorithm, which scanned every room on every disconnect.
+
+Usage:
+    python scripts/benchmark_ws_churn.py [--connections 50000] [--rooms 20000] [--rooms-per-connection 3] [--legacy-sample 500]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.websocket.manager import WebSocketManager
+
+
+class FakeWebSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+async def connect_all(manager, websockets, rooms, rooms_per_connection, rng):
+    for index, websocket in enumerate(websockets):
+        user_id = f"user-{index % (len(websockets) // 2 or 1)}"
+        await manager.connect(websocket, user_id)
+        for room_id in rng.sample(rooms, rooms_per_connection):
+            await manager.join_room(user_id, room_id, websocket)
+
+
+def legacy_disconnect(manager: WebSocketManager, websocket):
+    """The previous disconnect: discard the user from every room there is"""
+    user_id = manager.user_sessions.pop(websocket)
+    manager.active_connections[user_id].discard(websocket)
+    for members in manager.room_memberships.values():
+        members.discard(user_id)
+
+
+def timed(label, count, started):
+    elapsed = time.perf_counter() - started
+    print(f"{label:>22}: {elapsed * 1000:9.1f} ms total, {elapsed / count * 1e6:8.2f} us per connection")
+
+
+async def main(connections: int, rooms: int, rooms_per_connection: int, legacy_sample: int):
+    logging.getLogger("app.websocket.manager").setLevel(logging.ERROR)
+    rng = random.Random(42)
+    room_ids = [f"project_{i}" if i % 10 == 0 else f"testcase_{i}" for i in range(rooms)]
+    manager = WebSocketManager()
+    websockets = [FakeWebSocket() for _ in range(connections)]
+
+    started = time.perf_counter()
+    await connect_all(manager, websockets, room_ids, rooms_per_connection, rng)
+    timed("connect + join", connections, started)
+    await manager.drain()
+
+    started = time.perf_counter()
+    for websocket in websockets:
+        manager.disconnect(websocket)
+    timed("disconnect", connections, started)
+    assert not manager.room_memberships and not manager.user_rooms
+
+    started = time.perf_counter()
+    await connect_all(manager, websockets, room_ids, rooms_per_connection, rng)
+    timed("reconnect + join", connections, started)
+    await manager.drain()
+
+    # The old full scan is far too slow to run for every connection
+    sample = websockets[:legacy_sample]
+    started = time.perf_counter()
+    for websocket in sample:
+        legacy_disconnect(manager, websocket)
+    timed("legacy disconnect", len(sample), started)
+
+    await manager.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket connection churn")
+    parser.add_argument("--connections", type=int, default=50000)
+    parser.add_argument("--rooms", type=int, default=20000)
+    parser.add_argument("--rooms-per-connection", type=int, default=3)
+    parser.add_argument("--legacy-sample", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.connections, args.rooms, args.rooms_per_connection, args.legacy_sample))
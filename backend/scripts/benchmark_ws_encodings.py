@@ -0,0 +1,105 @@
+"""
+Compare WebSocket wire encodings for real-time messages.
+
+For a single test_execution_update carrying ``result``/``logs`` payloads and
+for a coalesced batch of them, reports per encoding (JSON, MessagePack,
+CBOR) the frame size, the size after permessage-deflate (raw DEFLATE as the
+extension applies it, with and without context takeover across messages),
+and the CPU time to encode and to compress one message.
+
+Usage:
+    python scripts/benchmark_ws_encodings.py [--iterations 2000] [--log-lines 40] [--batch 50]
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+import zlib
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.websocket.frames import AVAILABLE_ENCODINGS, encode_frame
+
+
+def execution_update(log_lines: int) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "project_id": str(uuid.uuid4()),
+        "test_case_id": str(uuid.uuid4()),
+        "status": "completed",
+        "duration": 1834,
+        "result": {
+            "outcome": "pass",
+            "steps": [
+                {"step": i, "passed": True, "detail": f"GET /api/items/{i} -> 200", "elapsed_ms": 12.5 + i}
+                for i in range(8)
+            ],
+        },
+        "logs": "\n".join(
+            f"2026-10-17T04:56:{i % 60:02d}Z INFO step {i % 8} request completed in {10 + i % 7} ms"
+            for i in range(log_lines)
+        ),
+    }
+
+
+def deflate_sizes(payloads):
+    """Compressed sizes without and with context takeover across messages"""
+    fresh = 0
+    shared = zlib.compressobj(wbits=-15)
+    takeover = 0
+    for payload in payloads:
+        data = payload.encode() if isinstance(payload, str) else payload
+        compressor = zlib.compressobj(wbits=-15)
+        fresh += len(compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+        takeover += len(shared.compress(data) + shared.flush(zlib.Z_SYNC_FLUSH)) - 4
+    return fresh / len(payloads), takeover / len(payloads)
+
+
+def measure(label: str, messages, iterations: int):
+    print(f"\n{label}")
+    print(f"{'encoding':>10} {'bytes':>9} {'deflate':>9} {'deflate+ctx':>12} {'encode us':>10} {'deflate us':>11}")
+    for encoding in AVAILABLE_ENCODINGS:
+        payloads = [encode_frame(message, encoding).payload for message in messages]
+        size = sum(len(p.encode() if isinstance(p, str) else p) for p in payloads) / len(payloads)
+        fresh, takeover = deflate_sizes(payloads)
+
+        started = time.perf_counter()
+        for index in range(iterations):
+            encode_frame(messages[index % len(messages)], encoding)
+        encode_us = (time.perf_counter() - started) / iterations * 1e6
+
+        data = [p.encode() if isinstance(p, str) else p for p in payloads]
+        started = time.perf_counter()
+        for index in range(iterations):
+            compressor = zlib.compressobj(wbits=-15)
+            compressor.compress(data[index % len(data)])
+            compressor.flush(zlib.Z_SYNC_FLUSH)
+        deflate_us = (time.perf_counter() - started) / iterations * 1e6
+
+        print(f"{encoding:>10} {size:9.0f} {fresh:9.0f} {takeover:12.0f} {encode_us:10.1f} {deflate_us:11.1f}")
+
+
+def main(iterations: int, log_lines: int, batch: int):
+    updates = [{"type": "test_execution_update", "data": execution_update(log_lines)} for _ in range(20)]
+    batches = [
+        {
+            "type": "test_execution_batch_update",
+            "data": {"room_id": "project_1", "count": batch, "executions": [execution_update(log_lines) for _ in range(batch)]},
+            "room_id": "project_1",
+            "seq": seq,
+        }
+        for seq in range(3)
+    ]
+    measure("test_execution_update", updates, iterations)
+    measure(f"test_execution_batch_update ({batch} executions)", batches, max(iterations // batch, 10))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WebSocket message encodings")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--log-lines", type=int, default=40)
+    parser.add_argument("--batch", type=int, default=50)
+    args = parser.parse_args()
+    main(args.iterations, args.log_lines, args.batch)
@@ -0,0 +1,63 @@
+"""
+Check that the hot path queries are served by indexes.
+
+Creates the tables on ``--url`` (a scratch database: a temporary SQLite file
+by default, or an empty PostgreSQL database migrated with ``alembic upgrade
+head``), seeds it with ``--projects`` x ``--test-cases`` x ``--executions``
+rows, then runs ``EXPLAIN`` on every statement of
+``app.db.query_plans.HOT_PATHS``. Prints each path's verdict and exits with
+status 1 if any of them does a sequential scan.
+
+Usage:
+    python scripts/check_query_plans.py [--url postgresql+asyncpg://.../scratch] [--projects 20] [--test-cases 500] [--executions 20]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+
+# Add the project root to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.query_plans import HOT_PATHS, check_hot_paths, seed
+
+
+async def main(url: str, projects: int, test_cases: int, executions: int) -> int:
+    # Importing the models pulls in the app's logging setup
+    logging.disable(logging.INFO)
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(bind=engine, class_=AsyncSession)() as db:
+            keys = await seed(db, projects=projects, test_cases=test_cases, executions=executions)
+        async with engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                await conn.exec_driver_sql("ANALYZE")
+                await conn.commit()
+            failures = await check_hot_paths(conn, keys)
+    finally:
+        await engine.dispose()
+
+    for name in HOT_PATHS:
+        verdict = f"sequential scan on {', '.join(failures[name])}" if name in failures else "ok"
+        print(f"{name:40} {verdict}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if a hot path query does a sequential scan")
+    parser.add_argument("--url", help="Async database URL of a scratch database (default: temporary SQLite file)")
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--test-cases", type=int, default=500)
+    parser.add_argument("--executions", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.url or f"sqlite+aiosqlite:///{os.path.join(directory, 'query_plans.db')}"
+        sys.exit(asyncio.run(main(url, args.projects, args.test_cases, args.executions)))
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.models.db_models import (
+    Environment, ExecutionDailyRollup, Project, TestCase, TestExecution, TestType, Priority, User
+)
+from app.schemas.execution import BulkTestExecutionCreate
+from app.services.executions import create_bulk_executions
+
+
+def test_bulk_create_reports_per_item_errors(async_db):
+    async def scenario():
+        async with async_db() as db:
+            user = User(email="ci@example.com", full_name="CI", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            project = Project(name="Suite", created_by=user.id)
+            db.add(project)
+            await db.flush()
+            cases = [
+                TestCase(title=f"Case {i}", project_id=project.id, test_type=TestType.API,
+                         priority=Priority.LOW, created_by=user.id)
+                for i in range(3)
+            ]
+            db.add_all(cases)
+            await db.commit()
+
+            ids = [case.id for case in cases]
+            bulk = BulkTestExecutionCreate(test_case_ids=ids + ["missing", ids[0]])
+            result, by_project = await create_bulk_executions(db, bulk, user.id)
+            await db.commit()
+
+            stored = await db.scalar(select(func.count()).select_from(TestExecution))
+            rollup = (await db.execute(select(ExecutionDailyRollup))).scalars().one()
+            return result, by_project, stored, rollup.pending_count, project.id
+
+    result, by_project, stored, pending, project_id = asyncio.run(scenario())
+
+    assert result.created_count == stored == pending == 3
+    assert result.failed_count == 2
+    assert [e.error for e in result.errors] == ["Test case not found", "Duplicate test case id"]
+    assert [e["id"] for e in by_project[project_id]] == result.execution_ids
+
+
+def test_bulk_create_is_limited_to_accessible_projects(async_db):
+    async def scenario():
+        async with async_db() as db:
+            owner = User(email="owner@example.com", full_name="Owner", hashed_password="x")
+            outsider = User(email="outsider@example.com", full_name="Outsider", hashed_password="x")
+            db.add_all([owner, outsider])
+            await db.flush()
+            # The owner's project, another of the owner's projects, the outsider's project
+            projects = [
+                Project(name="Mine", created_by=owner.id),
+                Project(name="Also mine", created_by=owner.id),
+                Project(name="Theirs", created_by=outsider.id),
+            ]
+            db.add_all(projects)
+            await db.flush()
+            cases = [
+                TestCase(title=f"Case {project.name}", project_id=project.id, test_type=TestType.API,
+                         priority=Priority.LOW, created_by=project.created_by)
+                for project in projects
+            ]
+            environments = [
+                Environment(name=project.name, base_url="http://localhost", project_id=project.id)
+                for project in projects
+            ]
+            db.add_all(cases + environments)
+            await db.commit()
+
+            bulk = BulkTestExecutionCreate(
+                test_case_ids=[cases[0].id, cases[2].id, cases[1].id],
+                environment_id=environments[0].id
+            )
+            result, _ = await create_bulk_executions(db, bulk, owner.id)
+
+            foreign_environment = BulkTestExecutionCreate(
+                test_case_ids=[cases[0].id], environment_id=environments[2].id
+            )
+            with pytest.raises(HTTPException) as error:
+                await create_bulk_executions(db, foreign_environment, owner.id)
+            return result, error.value.status_code
+
+    result, foreign_status = asyncio.run(scenario())
+
+    assert result.created_count == 1
+    assert [e.error for e in result.errors] == [
+        "Test case not found", "Environment belongs to another project"
+    ]
+    assert foreign_status == 404
+
+
+def test_run_accepts_test_plans_over_the_bulk_request_limit(async_db, monkeypatch):
+    import httpx
+    from app import main
+    from app.auth.security import get_current_user
+    from app.db.session import get_db
+    from app.models.db_models import TestPlan, TestPlanTestCase
+
+    async def scenario():
+        async with async_db() as db:
+            user = User(email="planner@example.com", full_name="Planner", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            project = Project(name="Regression", created_by=user.id)
+            db.add(project)
+            await db.flush()
+            environment = Environment(name="staging", base_url="http://staging.test", project_id=project.id)
+            plan = TestPlan(name="Full regression", project_id=project.id, created_by=user.id)
+            cases = [
+                TestCase(title=f"Case {i}", project_id=project.id, test_type=TestType.API,
+                         priority=Priority.LOW, created_by=user.id)
+                for i in range(1200)
+            ]
+            db.add_all([environment, plan, *cases])
+            await db.flush()
+            db.add_all([
+                TestPlanTestCase(test_plan_id=plan.id, test_case_id=case.id, order=i)
+                for i, case in enumerate(cases)
+            ])
+            await db.commit()
+
+            submitted = []
+
+            async def submit(execution_ids):
+                submitted.extend(execution_ids)
+
+            monkeypatch.setattr(main.execution_engine, "submit", submit)
+            main.app.dependency_overrides[get_db] = lambda: db
+            main.app.dependency_overrides[get_current_user] = lambda: {"id": user.id}
+            try:
+                transport = httpx.ASGITransport(app=main.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    response = await client.post(
+                        "/api/executions/run",
+                        json={"environment_id": environment.id, "test_plan_id": plan.id}
+                    )
+            finally:
+                main.app.dependency_overrides = {}
+            stored = await db.scalar(select(func.count()).select_from(TestExecution))
+            return response, submitted, stored
+
+    response, submitted, stored = asyncio.run(scenario())
+
+    assert response.status_code == 202, response.text
+    assert response.json()["created_count"] == len(submitted) == stored == 1200
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime
+
+from app.models.db_models import (
+    User, Project, TestCase, TestExecution, ExecutionStatus, TestType, Priority
+)
+from app.services.dashboard import compute_dashboard_stats
+from app.services.rollups import backfill_rollups
+
+
+async def seed_project(db, user_id, name):
+    project = Project(name=name, created_by=user_id)
+    db.add(project)
+    await db.flush()
+    test_case = TestCase(
+        title=f"{name} case",
+        project_id=project.id,
+        test_type=TestType.API,
+        priority=Priority.HIGH,
+        created_by=user_id
+    )
+    db.add(test_case)
+    await db.flush()
+    return project, test_case
+
+
+async def _aggregated_per_user(async_db):
+    owner = User(email="owner@example.com", full_name="Owner", hashed_password="x")
+    other = User(email="other@example.com", full_name="Other", hashed_password="x")
+    async_db.add_all([owner, other])
+    await async_db.flush()
+
+    _, own_case = await seed_project(async_db, owner.id, "Mine")
+    _, other_case = await seed_project(async_db, other.id, "Theirs")
+
+    statuses = [
+        (ExecutionStatus.COMPLETED, 10),
+        (ExecutionStatus.COMPLETED, 20),
+        (ExecutionStatus.FAILED, 30),
+        (ExecutionStatus.RUNNING, None),
+    ]
+    for execution_status, duration in statuses:
+        async_db.add(TestExecution(
+            test_case_id=own_case.id,
+            executed_by=owner.id,
+            status=execution_status,
+            duration=duration,
+            created_at=datetime.utcnow()
+        ))
+    async_db.add(TestExecution(
+        test_case_id=other_case.id,
+        executed_by=other.id,
+        status=ExecutionStatus.RUNNING
+    ))
+    await async_db.commit()
+    await backfill_rollups(async_db)
+
+    stats = await compute_dashboard_stats(async_db, owner.id)
+
+    assert stats.total_test_cases == 1
+    assert stats.total_executions == 4
+    assert stats.pass_rate == 50.0
+    assert stats.average_execution_time == 20.0
+    assert stats.active_test_runs == 1
+    assert stats.executions_today == 4
+    assert stats.execution_stats.by_status["completed"] == 2
+    assert stats.execution_stats.failed == 1
+
+
+def test_dashboard_stats_are_aggregated_per_user(async_db):
+    async def scenario():
+        async with async_db() as db:
+            await _aggregated_per_user(db)
+
+    asyncio.run(scenario())
+
+
+def test_dashboard_stats_without_projects(async_db):
+    async def scenario():
+        async with async_db() as db:
+            return await compute_dashboard_stats(db, "missing-user")
+
+    stats = asyncio.run(scenario())
+
+    assert stats.total_executions == 0
+    assert stats.pass_rate == 0.0
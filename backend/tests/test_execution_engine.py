@@ -0,0 +1,201 @@
+import asyncio
+
+import httpx
+import pytest
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.db_models import (
+    Environment, ExecutionDailyRollup, ExecutionStatus, Priority, Project, TestCase,
+    TestExecution, TestStep, TestType, User
+)
+from app.schemas.execution import BulkTestExecutionCreate
+from app.services.execution_engine import ExecutionEngine, StepDefinitionError, resolve_step_url
+from app.services.executions import create_bulk_executions
+
+
+def test_engine_runs_api_cases_against_environment(stub_server, tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'engine.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with session_factory() as db:
+            user = User(email="runner@example.com", full_name="Runner", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            project = Project(name="Run", created_by=user.id)
+            db.add(project)
+            await db.flush()
+            environment = Environment(name="stub", base_url=stub_server, project_id=project.id,
+                                      variables={"user": "ada", "token": "secret"})
+            passing = TestCase(title="health", project_id=project.id, test_type=TestType.API,
+                               priority=Priority.HIGH, created_by=user.id)
+            failing = TestCase(title="missing", project_id=project.id, test_type=TestType.API,
+                               priority=Priority.HIGH, created_by=user.id)
+            configured = TestCase(title="create", project_id=project.id, test_type=TestType.API,
+                                  priority=Priority.HIGH, created_by=user.id,
+                                  automation_config={"requests": [{
+                                      "method": "POST", "path": "/users",
+                                      "headers": {"X-Token": "{{token}}"},
+                                      "json": {"name": "{{user}}"},
+                                      "expect_status": 201,
+                                      "expect_body_contains": "secret",
+                                  }]})
+            manual = TestCase(title="look", project_id=project.id, test_type=TestType.VISUAL,
+                              priority=Priority.LOW, created_by=user.id)
+            db.add_all([environment, passing, failing, configured, manual])
+            await db.flush()
+            db.add_all([
+                TestStep(test_case_id=passing.id, step_number=1, description="GET /health", expected_result="200 ok"),
+                TestStep(test_case_id=failing.id, step_number=1, description="GET /health", expected_result="200"),
+                TestStep(test_case_id=failing.id, step_number=2, description="GET /nope", expected_result="200"),
+            ])
+            await db.commit()
+
+            ids = [passing.id, failing.id, configured.id, manual.id]
+            bulk = BulkTestExecutionCreate(test_case_ids=ids, environment_id=environment.id)
+            result, _ = await create_bulk_executions(db, bulk, user.id, engine_queued=True)
+            await db.commit()
+
+        updates = []
+
+        async def on_update(payload):
+            updates.append((payload["test_case_id"], payload["status"]))
+
+        runner = ExecutionEngine(session_factory, max_workers=3, per_environment_limit=2, on_update=on_update)
+        await runner.submit(result.execution_ids)
+        await asyncio.wait_for(runner.join(), timeout=20)
+        await runner.stop()
+
+        async with session_factory() as db:
+            executions = {
+                execution.test_case_id: execution
+                for execution in (await db.execute(select(TestExecution))).scalars()
+            }
+            rollup = (await db.execute(select(ExecutionDailyRollup))).scalars().one()
+        await engine.dispose()
+        return ids, executions, rollup, updates, runner.stats()
+
+    ids, executions, rollup, updates, stats = asyncio.run(scenario())
+    passing, failing, configured, manual = (executions[i] for i in ids)
+
+    assert passing.status == ExecutionStatus.COMPLETED and passing.result == "pass"
+    assert configured.status == ExecutionStatus.COMPLETED
+    assert failing.status == ExecutionStatus.FAILED
+    assert "Step 2" in failing.error_message and "404" in failing.error_message
+    assert manual.status == ExecutionStatus.CANCELLED and manual.result == "blocked"
+    assert (rollup.pending_count, rollup.running_count) == (0, 0)
+    assert (rollup.completed_count, rollup.failed_count, rollup.cancelled_count) == (2, 1, 1)
+    assert updates.count((ids[0], "running")) == 1 and (ids[0], "completed") in updates
+    assert stats["completed"] == 2 and stats["deferred"] == 0
+
+
+def test_step_urls_stay_on_the_environment_origin():
+    assert resolve_step_url("http://api.test:8080/v1", "/users") == "http://api.test:8080/v1/users"
+    assert resolve_step_url("https://api.test", "https://api.test:443/health") == "https://api.test/health"
+    for path in ("http://evil.test/collect", "https://api.test/health", "http://api.test:9090/"):
+        with pytest.raises(StepDefinitionError):
+            resolve_step_url("http://api.test", path)
+
+
+def test_start_recovers_pending_executions(tmp_path):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'recover.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with session_factory() as db:
+            user = User(email="restart@example.com", full_name="Restart", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            project = Project(name="Restart", created_by=user.id)
+            db.add(project)
+            await db.flush()
+            manual = TestCase(title="look", project_id=project.id, test_type=TestType.VISUAL,
+                              priority=Priority.LOW, created_by=user.id)
+            db.add(manual)
+            await db.commit()
+            # Queued by a process that stopped before running them
+            result, _ = await create_bulk_executions(
+                db, BulkTestExecutionCreate(test_case_ids=[manual.id]), user.id, engine_queued=True
+            )
+            await db.commit()
+
+        runner = ExecutionEngine(session_factory, max_workers=2)
+        await runner.start()
+        await asyncio.wait_for(runner.join(), timeout=20)
+        await runner.stop()
+
+        async with session_factory() as db:
+            statuses = (await db.execute(select(TestExecution.status))).scalars().all()
+            rollup = (await db.execute(select(ExecutionDailyRollup))).scalars().one()
+        await engine.dispose()
+        return statuses, rollup
+
+    statuses, rollup = asyncio.run(scenario())
+
+    assert statuses == [ExecutionStatus.CANCELLED]
+    assert (rollup.pending_count, rollup.cancelled_count) == (0, 1)
+
+
+def test_restart_leaves_executions_registered_outside_the_engine(tmp_path):
+    from app.auth.security import get_current_user
+    from app.db.session import get_db
+    from app.main import app
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'registered.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+        async with session_factory() as db:
+            user = User(email="ci@example.com", full_name="CI", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            project = Project(name="CI", created_by=user.id)
+            db.add(project)
+            await db.flush()
+            manual = TestCase(title="look", project_id=project.id, test_type=TestType.VISUAL,
+                              priority=Priority.LOW, created_by=user.id)
+            db.add(manual)
+            await db.commit()
+            user_id, test_case_id = user.id, manual.id
+
+        async def override_get_db():
+            async with session_factory() as db:
+                yield db
+
+        # A CI run registers its execution through the plain create endpoint
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = lambda: {"id": user_id}
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/executions", json={"test_case_id": test_case_id})
+        finally:
+            app.dependency_overrides = {}
+        assert response.status_code == 200, response.text
+
+        runner = ExecutionEngine(session_factory, max_workers=2)
+        await runner.start()
+        await asyncio.wait_for(runner.join(), timeout=20)
+        await runner.stop()
+
+        async with session_factory() as db:
+            execution = (await db.execute(select(TestExecution))).scalar_one()
+        await engine.dispose()
+        return response.json(), execution, runner.stats()
+
+    created, execution, stats = asyncio.run(scenario())
+
+    assert execution.status == ExecutionStatus.PENDING
+    assert execution.engine_queued_at is None
+    assert (execution.started_at, execution.result, execution.error_message) == (None, None, None)
+    assert execution.updated_at.isoformat() == created["updated_at"]
+    assert stats["cancelled"] == 0
@@ -0,0 +1,195 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app.models.db_models import (
+    User, Project, TestCase, TestExecution, ExecutionDailyRollup,
+    ExecutionStatus, TestType, Priority
+)
+from app.services.executions import transition_execution
+from app.services.rollups import (
+    backfill_rollups,
+    compute_execution_summary,
+    record_execution_created,
+    record_execution_status_change,
+    record_executions_deleted,
+)
+
+TRANSITIONS = [
+    [ExecutionStatus.RUNNING, ExecutionStatus.COMPLETED],
+    [ExecutionStatus.RUNNING, ExecutionStatus.FAILED],
+    [ExecutionStatus.RUNNING],
+    [],
+]
+DURATIONS = [4, 120, None, None]
+
+
+async def _seed_through_hooks(db):
+    user = User(email="rollup@example.com", full_name="Rollup", hashed_password="x")
+    db.add(user)
+    await db.flush()
+    project = Project(name="Rollups", created_by=user.id)
+    db.add(project)
+    await db.flush()
+    test_case = TestCase(
+        title="Case", project_id=project.id, test_type=TestType.API,
+        priority=Priority.LOW, created_by=user.id
+    )
+    db.add(test_case)
+    await db.flush()
+
+    for transitions, duration in zip(TRANSITIONS, DURATIONS):
+        execution = TestExecution(
+            test_case_id=test_case.id,
+            executed_by=user.id,
+            status=ExecutionStatus.PENDING,
+            created_at=datetime.utcnow()
+        )
+        db.add(execution)
+        await record_execution_created(db, project.id, execution.created_at)
+        for new_status in transitions:
+            finished = new_status in (ExecutionStatus.COMPLETED, ExecutionStatus.FAILED)
+            execution.duration = duration if finished else None
+            await record_execution_status_change(
+                db, project.id, execution.created_at, execution.status, new_status, execution.duration
+            )
+            execution.status = new_status
+    await db.commit()
+    return project
+
+
+def _snapshot(row):
+    return {
+        column.name: getattr(row, column.name)
+        for column in ExecutionDailyRollup.__table__.columns
+        if column.name != "updated_at"
+    }
+
+
+def test_incremental_rollups_match_backfill(async_db):
+    async def scenario():
+        async with async_db() as db:
+            project = await _seed_through_hooks(db)
+            project_id = project.id
+            incremental = _snapshot((await db.execute(select(ExecutionDailyRollup))).scalar_one())
+
+            await backfill_rollups(db)
+            db.expire_all()
+            rebuilt = _snapshot((await db.execute(select(ExecutionDailyRollup))).scalar_one())
+
+            summary = await compute_execution_summary(db, [project_id])
+            return incremental, rebuilt, summary
+
+    incremental, rebuilt, summary = asyncio.run(scenario())
+
+    assert incremental == rebuilt
+    assert incremental["completed_count"] == 1
+    assert incremental["running_count"] == 1
+    assert incremental["pending_count"] == 1
+    assert incremental["duration_min"] == 4
+    assert incremental["duration_max"] == 120
+    assert incremental["duration_bucket_1"] == 1
+    assert incremental["duration_bucket_4"] == 1
+    assert summary.total_executions == 4
+    assert summary.pass_rate == 25.0
+    assert summary.average_duration == 62.0
+
+
+def test_stale_transitions_and_deletes_keep_rollups_consistent(async_db):
+    async def scenario():
+        async with async_db() as db:
+            project = await _seed_through_hooks(db)
+            project_id = project.id
+            pending = (await db.execute(
+                select(TestExecution).where(TestExecution.status == ExecutionStatus.PENDING)
+            )).scalar_one()
+
+            # Another worker claims the execution after it was read here
+            await db.execute(
+                update(TestExecution).where(TestExecution.id == pending.id)
+                .values(status=ExecutionStatus.CANCELLED)
+                .execution_options(synchronize_session=False)
+            )
+            stale = await transition_execution(db, pending, project_id, ExecutionStatus.RUNNING)
+            await db.rollback()
+
+            running = (await db.execute(
+                select(TestExecution).where(TestExecution.status == ExecutionStatus.RUNNING)
+            )).scalar_one()
+            applied = await transition_execution(db, running, project_id, ExecutionStatus.FAILED)
+            await db.commit()
+
+            await record_executions_deleted(db, TestExecution.duration == 120)
+            after_delete = _snapshot((await db.execute(select(ExecutionDailyRollup))).scalar_one())
+            return stale, applied, after_delete
+
+    stale, applied, rollup = asyncio.run(scenario())
+
+    assert (stale, applied) == (False, True)
+    assert rollup["pending_count"] == 1
+    assert rollup["running_count"] == 0
+    assert rollup["completed_count"] == 1
+    # One of the two failed executions was retracted
+    assert rollup["failed_count"] == 1
+    assert rollup["duration_count"] == 1
+    assert rollup["duration_sum"] == 4
+    assert rollup["duration_bucket_4"] == 0
+
+
+REPLAYS = [
+    # Re-opened, then cancelled after finishing again
+    [(ExecutionStatus.RUNNING, None), (ExecutionStatus.COMPLETED, 5), (ExecutionStatus.RUNNING, None),
+     (ExecutionStatus.COMPLETED, 5), (ExecutionStatus.CANCELLED, None)],
+    # Re-opened and finished with another duration
+    [(ExecutionStatus.RUNNING, None), (ExecutionStatus.FAILED, 2), (ExecutionStatus.RUNNING, None),
+     (ExecutionStatus.COMPLETED, 70)],
+    # Cancelled after finishing with the day's longest duration
+    [(ExecutionStatus.RUNNING, None), (ExecutionStatus.COMPLETED, 900), (ExecutionStatus.CANCELLED, None)],
+    [(ExecutionStatus.RUNNING, None), (ExecutionStatus.COMPLETED, 40)],
+]
+
+
+def test_reopened_and_cancelled_executions_match_backfill(async_db):
+    async def scenario():
+        async with async_db() as db:
+            user = User(email="replay@example.com", full_name="Replay", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            project = Project(name="Replays", created_by=user.id)
+            db.add(project)
+            await db.flush()
+            test_case = TestCase(
+                title="Case", project_id=project.id, test_type=TestType.API,
+                priority=Priority.LOW, created_by=user.id
+            )
+            db.add(test_case)
+            await db.flush()
+            project_id = project.id
+
+            for replay in REPLAYS:
+                execution = TestExecution(
+                    test_case_id=test_case.id, executed_by=user.id,
+                    status=ExecutionStatus.PENDING, created_at=datetime.utcnow()
+                )
+                db.add(execution)
+                await record_execution_created(db, project_id, execution.created_at)
+                await db.flush()
+                for new_status, duration in replay:
+                    changes = {"duration": duration} if duration is not None else {}
+                    assert await transition_execution(db, execution, project_id, new_status, **changes)
+                    await db.refresh(execution)
+            await db.commit()
+
+            incremental = _snapshot((await db.execute(select(ExecutionDailyRollup))).scalar_one())
+            await backfill_rollups(db)
+            db.expire_all()
+            rebuilt = _snapshot((await db.execute(select(ExecutionDailyRollup))).scalar_one())
+            return incremental, rebuilt
+
+    incremental, rebuilt = asyncio.run(scenario())
+
+    assert incremental == rebuilt
+    assert (incremental["duration_count"], incremental["duration_sum"]) == (2, 110)
+    assert (incremental["duration_min"], incremental["duration_max"]) == (40, 70)
+    assert (incremental["completed_count"], incremental["cancelled_count"]) == (2, 2)
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.services.http_clients import EnvironmentClientRegistry
+
+
+def test_steps_against_one_environment_reuse_connections(stub_server):
+    async def scenario():
+        registry = EnvironmentClientRegistry(http2=False)
+        try:
+            async with registry.lease("env-1", stub_server) as client:
+                for _ in range(5):
+                    response = await client.get("/health")
+                    assert response.status_code == 200
+            async with registry.lease("env-1", stub_server) as again:
+                assert again is client
+            return registry.stats()["environments"]["env-1"]
+        finally:
+            await registry.close()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
+
+
+def test_idle_and_repointed_clients_are_replaced(stub_server):
+    async def scenario():
+        registry = EnvironmentClientRegistry(idle_timeout=60)
+        try:
+            async with registry.lease("env-1", stub_server) as first:
+                async with registry.lease("env-1", stub_server + "/v2") as repointed:
+                    assert repointed is not first
+                    # Steps already running on the old client carry on
+                    assert (await first.get("/health")).status_code == 200
+                    retiring = registry.stats()["retiring"]
+                assert not repointed.is_closed
+            assert first.is_closed
+
+            registry.idle_timeout = 0
+            async with registry.lease("env-2", stub_server):
+                # A leased client is not idle, however long its steps take
+                await registry.evict_idle()
+            async with registry.lease("env-3", stub_server):
+                pass
+            return retiring, registry.stats()
+        finally:
+            await registry.close()
+
+    retiring, stats = asyncio.run(scenario())
+
+    assert retiring == 1 and stats["retiring"] == 0
+    assert stats["evicted"] == 2
+    assert list(stats["environments"]) == ["env-3"]
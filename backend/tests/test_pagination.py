@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Response
+from sqlalchemy import select
+
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, paginate, set_next_cursor
+from app.api.v1.routes import comments as comment_routes
+from app.core.security import get_current_user
+from app.db.session import get_db
+from app.models.db_models import ActivityLog, Comment, Priority, Project, TestCase, TestType, User
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(created_at, "abc")
+
+    assert decode_cursor(cursor) == (created_at, "abc")
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+
+    assert exc_info.value.status_code == 400
+
+
+def test_cursor_pages_cover_all_rows_once(async_db):
+    base = datetime(2024, 1, 1)
+
+    async def scenario():
+        async with async_db() as db:
+            user = User(email="pager@example.com", full_name="Pager", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            # Pairs of rows share a timestamp so the id tie-breaker is exercised
+            for index in range(7):
+                db.add(ActivityLog(
+                    user_id=user.id,
+                    user_name=user.full_name,
+                    action="created",
+                    target_type="project",
+                    target_id=str(index),
+                    created_at=base + timedelta(minutes=index // 2)
+                ))
+            await db.commit()
+
+            seen, cursor, pages = [], None, 0
+            while True:
+                response = Response()
+                stmt = paginate(select(ActivityLog), ActivityLog, 3, cursor)
+                rows = (await db.execute(stmt)).scalars().all()
+                seen.extend(rows)
+                pages += 1
+                cursor = set_next_cursor(response, rows, 3)
+                if not cursor:
+                    return seen, pages
+
+    seen, pages = asyncio.run(scenario())
+
+    assert pages == 3
+    assert len({row.id for row in seen}) == 7
+    keys = [(row.created_at, row.id) for row in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_comment_list_is_paged_by_cursor(async_db):
+    base = datetime(2024, 1, 1)
+
+    async def scenario():
+        async with async_db() as db:
+            user = User(email="commenter@example.com", full_name="Commenter", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            project = Project(name="Comments", created_by=user.id)
+            db.add(project)
+            await db.flush()
+            test_case = TestCase(title="Case", project_id=project.id, test_type=TestType.API,
+                                 priority=Priority.LOW, created_by=user.id)
+            db.add(test_case)
+            await db.flush()
+            for index in range(5):
+                db.add(Comment(test_case_id=test_case.id, user_id=user.id, user_name=user.full_name,
+                               content=f"Comment {index}", created_at=base + timedelta(minutes=index)))
+            await db.commit()
+
+            app = FastAPI()
+            app.include_router(comment_routes.router)
+            app.dependency_overrides[get_db] = lambda: db
+            app.dependency_overrides[get_current_user] = lambda: user
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                pages, params = [], {"limit": 2}
+                while True:
+                    response = await client.get(f"/comments/test-case/{test_case.id}", params=params)
+                    pages.append([comment["content"] for comment in response.json()])
+                    if NEXT_CURSOR_HEADER not in response.headers:
+                        return pages
+                    params["cursor"] = response.headers[NEXT_CURSOR_HEADER]
+
+    pages = asyncio.run(scenario())
+
+    assert pages == [["Comment 4", "Comment 3"], ["Comment 2", "Comment 1"], ["Comment 0"]]
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from app.auth import security
+from app.auth.hashing import PasswordHashPool, PasswordHashPoolBusy
+from app.auth.security import AuthService
+from app.models.db_models import User
+
+
+def test_work_runs_off_the_event_loop_thread():
+    pool = PasswordHashPool(max_workers=2)
+
+    async def scenario():
+        return await pool.run(lambda: threading.current_thread().name)
+
+    try:
+        assert asyncio.run(scenario()).startswith("password-hash")
+        assert pool.stats()["completed"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_saturated_pool_rejects_after_queue_timeout():
+    pool = PasswordHashPool(max_workers=1, max_pending=1, queue_timeout=0.05)
+
+    async def scenario():
+        blocker = asyncio.ensure_future(pool.run(time.sleep, 0.3))
+        await asyncio.sleep(0.01)
+        with pytest.raises(PasswordHashPoolBusy):
+            await pool.run(time.sleep, 0)
+        await blocker
+
+    try:
+        asyncio.run(scenario())
+        assert pool.stats()["rejected"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_hash_with_old_cost_is_upgraded_on_verify():
+    old_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    new_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5)
+    stored = old_context.hash("secret")
+
+    valid, new_hash = new_context.verify_and_update("secret", stored)
+
+    assert valid
+    assert new_hash is not None and new_hash.startswith("$2b$05$")
+    assert new_context.verify_and_update("secret", new_hash) == (True, None)
+
+
+def test_login_saves_a_rehashed_password_with_the_current_cost(async_db, monkeypatch):
+    pool = PasswordHashPool(max_workers=1)
+    monkeypatch.setattr(security, "password_hash_pool", pool)
+    monkeypatch.setattr(security, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5))
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret-password")
+
+    async def scenario():
+        async with async_db() as db:
+            db.add(User(email="rehash@example.com", full_name="Rehash", hashed_password=old_hash))
+            await db.commit()
+
+            await AuthService(db).authenticate_user("rehash@example.com", "secret-password")
+            db.expunge_all()
+            return await db.scalar(select(User.hashed_password).where(User.email == "rehash@example.com"))
+
+    try:
+        stored = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert stored.startswith("$2b$05$")
+    assert security.pwd_context.verify("secret-password", stored)
+
+
+def test_login_answers_503_when_the_hash_pool_is_full(async_db, monkeypatch):
+    pool = PasswordHashPool(max_workers=1, max_pending=1, queue_timeout=0.05)
+    monkeypatch.setattr(security, "password_hash_pool", pool)
+    stored = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret-password")
+
+    async def scenario():
+        async with async_db() as db:
+            db.add(User(email="busy@example.com", full_name="Busy", hashed_password=stored))
+            await db.commit()
+
+            blocker = asyncio.ensure_future(pool.run(time.sleep, 0.3))
+            await asyncio.sleep(0.01)
+            with pytest.raises(HTTPException) as exc_info:
+                await AuthService(db).authenticate_user("busy@example.com", "secret-password")
+            await blocker
+            return exc_info.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from app.auth.principal_cache import PrincipalCache
+from app.auth.security import principal_cache
+from app.models.db_models import User
+from app.websocket.backplane import InProcessBackplane, InProcessHub
+
+
+def principal(user_id):
+    return {"id": user_id, "email": f"{user_id}@example.com"}
+
+
+def test_hit_and_miss_counters():
+    cache = PrincipalCache(max_size=10, ttl_seconds=60)
+
+    assert cache.get("token-a") is None
+    cache.set("token-a", principal("u1"))
+
+    assert cache.get("token-a") == principal("u1")
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entry_never_outlives_token_expiry():
+    cache = PrincipalCache(max_size=10, ttl_seconds=60)
+
+    cache.set("expired", principal("u1"), token_expires_at=time.time() - 1)
+
+    assert cache.get("expired") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PrincipalCache(max_size=2, ttl_seconds=60)
+    cache.set("a", principal("u1"))
+    cache.set("b", principal("u2"))
+    cache.get("a")
+    cache.set("c", principal("u3"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_user_drops_all_tokens():
+    cache = PrincipalCache(max_size=10, ttl_seconds=60)
+    cache.set("a", principal("u1"))
+    cache.set("b", principal("u1"))
+    cache.set("c", principal("u2"))
+
+    cache.invalidate_user("u1")
+
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_updating_user_row_invalidates_cached_principal(async_db):
+    async def scenario():
+        async with async_db() as db:
+            user = User(email="cached@example.com", full_name="Cached", hashed_password="x")
+            db.add(user)
+            await db.commit()
+
+            principal_cache.set("cached-token", principal(user.id))
+            user.is_active = False
+            await db.commit()
+
+    asyncio.run(scenario())
+
+    assert principal_cache.get("cached-token") is None
+
+
+def test_invalidations_reach_the_caches_of_other_workers():
+    async def scenario():
+        hub = InProcessHub()
+        workers = [
+            PrincipalCache(max_size=10, ttl_seconds=60, backplane=InProcessBackplane(hub))
+            for _ in range(2)
+        ]
+        for cache in workers:
+            await cache.start()
+        writer, other = workers
+        other.set("token", principal("u1"))
+        other.set("kept", principal("u2"))
+
+        writer.invalidate_user("u1", publish=True)
+        await asyncio.gather(*writer._publishing)
+        await other.backplane.join()
+        await writer.backplane.join()
+        result = other.get("token"), other.get("kept"), writer.stats(), other.stats()
+        for cache in workers:
+            await cache.stop()
+        return result
+
+    token, kept, writer_stats, other_stats = asyncio.run(scenario())
+
+    assert token is None and kept is not None
+    assert writer_stats["invalidations_published"] == 1
+    assert writer_stats["invalidations_received"] == 0
+    assert other_stats["invalidations_received"] == 1
@@ -0,0 +1,142 @@
+import asyncio
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models.db_models import Project, Team, TeamMember, User
+from app.services import project_subscribers as subscribers_module
+from app.services.project_subscribers import ProjectSubscriberIndex
+from app.websocket.backplane import InProcessBackplane, InProcessHub
+from app.websocket.manager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def test_dashboard_events_reach_only_project_subscribers(tmp_path, monkeypatch):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'subscribers.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        index = ProjectSubscriberIndex(session_factory)
+        # Route the mapper-event invalidation to this index
+        monkeypatch.setattr(subscribers_module, "project_subscribers", index)
+
+        async with session_factory() as db:
+            owner, member, newcomer, outsider = (
+                User(email=f"{name}@example.com", full_name=name, hashed_password="x")
+                for name in ("owner", "member", "newcomer", "outsider")
+            )
+            db.add_all([owner, member, newcomer, outsider])
+            await db.flush()
+            team = Team(name="QA", created_by=owner.id)
+            db.add(team)
+            await db.flush()
+            db.add(TeamMember(team_id=team.id, user_id=member.id))
+            project = Project(name="Shop", created_by=owner.id, team_id=team.id)
+            db.add(project)
+            await db.commit()
+
+        first = await index.get(project.id)
+        again = await index.get(project.id)
+
+        async with session_factory() as db:
+            db.add(TeamMember(team_id=team.id, user_id=newcomer.id))
+            await db.commit()
+        after_join = await index.get(project.id)
+        missing = await index.get("no-such-project")
+
+        manager = WebSocketManager()
+        sockets = {}
+        for user in (owner, member, newcomer, outsider):
+            sockets[user.full_name] = FakeWebSocket()
+            await manager.connect(sockets[user.full_name], user.id)
+        await manager.broadcast_dashboard_update({"type": "activity_update"}, user_ids=after_join)
+        await manager.drain()
+        await manager.shutdown()
+        await engine.dispose()
+        return (owner, member, newcomer), first, again, after_join, missing, index, sockets
+
+    users, first, again, after_join, missing, index, sockets = asyncio.run(scenario())
+    owner, member, newcomer = users
+
+    assert first == {owner.id, member.id}
+    assert again is first
+    assert after_join == {owner.id, member.id, newcomer.id}
+    assert missing == frozenset()
+    assert index.stats()["hits"] == 1
+    assert index.stats()["invalidations"] == 1
+    received = {name: any("dashboard_update" in text for text in ws.sent) for name, ws in sockets.items()}
+    assert received == {"owner": True, "member": True, "newcomer": True, "outsider": False}
+
+
+def test_committed_membership_changes_reach_every_worker(tmp_path, monkeypatch):
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'workers.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        hub = InProcessHub()
+        writer, other = (
+            ProjectSubscriberIndex(session_factory, backplane=InProcessBackplane(hub)) for _ in range(2)
+        )
+        for index in (writer, other):
+            await index.start()
+        monkeypatch.setattr(subscribers_module, "project_subscribers", writer)
+
+        async with session_factory() as db:
+            owner, member = (
+                User(email=f"{name}@example.com", full_name=name, hashed_password="x")
+                for name in ("owner", "member")
+            )
+            db.add_all([owner, member])
+            await db.flush()
+            team = Team(name="QA", created_by=owner.id)
+            db.add(team)
+            await db.flush()
+            db.add(TeamMember(team_id=team.id, user_id=member.id))
+            project = Project(name="Shop", created_by=owner.id, team_id=team.id)
+            db.add(project)
+            await db.commit()
+
+        for index in (writer, other):
+            await index.get(project.id)
+
+        async with session_factory() as db:
+            await db.execute(delete(TeamMember).where(TeamMember.user_id == member.id))
+            await db.flush()
+            db.add(TeamMember(team_id=team.id, user_id=owner.id))
+            await db.flush()
+            # A miss between the flush and the commit still sees the old membership
+            between = await writer.get(project.id)
+            await db.commit()
+
+        await asyncio.gather(*writer._publishing)
+        for index in (writer, other):
+            await index.backplane.join()
+        result = between, await writer.get(project.id), await other.get(project.id), writer.stats(), other.stats()
+        for index in (writer, other):
+            await index.stop()
+        await engine.dispose()
+        return (owner.id, member.id), result
+
+    (owner_id, member_id), (between, writer_after, other_after, writer_stats, other_stats) = asyncio.run(scenario())
+
+    assert between == {owner_id, member_id}
+    assert writer_after == other_after == {owner_id}
+    # The commits seeding the team and changing it
+    assert writer_stats["invalidations_published"] == 2
+    assert other_stats["invalidations_received"] == 2
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.instrumentation import QueryInstrumentation, fingerprint
+
+
+def test_fingerprint_ignores_values():
+    first = fingerprint("SELECT * FROM projects WHERE id = 'a1' AND created_by IN ($1, $2, $3) LIMIT 10")
+    second = fingerprint("SELECT *  FROM projects\n WHERE id = 'zz'  AND created_by IN ($1) LIMIT 50")
+
+    assert first == second == "SELECT * FROM projects WHERE id = ? AND created_by IN (...) LIMIT ?"
+    assert fingerprint("SELECT id::text FROM t2 WHERE x = :x_1") == "SELECT id::text FROM t2 WHERE x = ?"
+
+
+def test_request_queries_and_slow_log():
+    instrumentation = QueryInstrumentation(slow_query_ms=0.000001)
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        instrumentation.install(engine.sync_engine)
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                with instrumentation.track() as queries:
+                    await conn.execute(text("SELECT 2"))
+                    await conn.execute(text("SELECT 3"))
+                return queries
+        finally:
+            await engine.dispose()
+
+    queries = asyncio.run(scenario())
+    stats = instrumentation.stats()
+
+    assert queries.count == 2
+    assert queries.total_ms > 0
+    assert [key for key, _ in queries.slow] == ["SELECT ?", "SELECT ?"]
+    assert stats["statements"] == 3
+    assert stats["request_queries"]["count"] == 1
+    assert stats["slow_fingerprints"] == {"SELECT ?": 3}
+
+
+def test_failed_statements_do_not_leak_start_times():
+    instrumentation = QueryInstrumentation()
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        instrumentation.install(engine.sync_engine)
+        try:
+            async with engine.connect() as conn:
+                for _ in range(3):
+                    with pytest.raises(OperationalError):
+                        await conn.execute(text("SELECT * FROM missing_table"))
+                await conn.execute(text("SELECT 1"))
+                raw = await conn.get_raw_connection()
+                return raw.info.get("query_started_at")
+        finally:
+            await engine.dispose()
+
+    pending = asyncio.run(scenario())
+
+    assert pending == []
+    assert instrumentation.stats()["failed_statements"] == 3
+    assert instrumentation.stats()["statements"] == 1
@@ -0,0 +1,49 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.query_plans import check_hot_paths, seed, sequential_scans
+from app.models.db_models import TestExecution
+
+
+def explain_hot_paths(drop_indexes=()):
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                for name in drop_indexes:
+                    await conn.exec_driver_sql(f"DROP INDEX {name}")
+            async with async_sessionmaker(bind=engine, class_=AsyncSession)() as db:
+                keys = await seed(db)
+            async with engine.connect() as conn:
+                return await check_hot_paths(conn, keys)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(scenario())
+
+
+def test_hot_paths_use_indexes():
+    assert explain_hot_paths() == {}
+
+
+def test_missing_index_is_reported():
+    failures = explain_hot_paths(drop_indexes=["ix_comments_test_case_id_created_at"])
+
+    assert failures == {"comments.list": ["comments"]}
+
+
+def test_unfiltered_query_is_a_sequential_scan():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                return await sequential_scans(conn, select(TestExecution).where(TestExecution.duration > 5))
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(scenario()) == ["test_executions"]
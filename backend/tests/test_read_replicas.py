@@ -0,0 +1,119 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.replicas import LEAST_CONNECTIONS, ReplicaRouter
+
+
+def make_engines(tmp_path, *names):
+    engines = []
+    for name in names:
+        engines.append(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db"))
+    return engines
+
+
+async def label_databases(engines, names):
+    for engine, name in zip(engines, names):
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE node (name TEXT)"))
+            await conn.execute(text("INSERT INTO node VALUES (:name)"), {"name": name})
+
+
+async def served_by(router, client_key=None, read_after=None):
+    async with router.session(client_key, read_after) as session:
+        return await session.scalar(text("SELECT name FROM node"))
+
+
+def test_reads_go_to_replicas_until_the_client_writes(tmp_path):
+    names = ["primary", "replica-a", "replica-b"]
+    primary, *replicas = make_engines(tmp_path, *names)
+
+    async def scenario():
+        await label_databases([primary, *replicas], names)
+        primary_factory = async_sessionmaker(bind=primary, class_=AsyncSession)
+        router = ReplicaRouter(primary_factory, replicas, sticky_seconds=60, secret_key="k")
+        # Another worker process, sharing only the secret key
+        other_worker = ReplicaRouter(primary_factory, replicas, sticky_seconds=60, secret_key="k")
+        try:
+            await router.check_lag()
+            await other_worker.check_lag()
+            round_robin = [await served_by(router, "reader") for _ in range(4)]
+            token = router.read_after_token("writer")
+            deadline, _, signature = token.partition(":")
+            reads = {
+                "writer": await served_by(other_worker, "writer", token),
+                "reader": await served_by(other_worker, "reader", token),
+                "forged": await served_by(other_worker, "writer", f"{float(deadline) + 600}:{signature}"),
+                "expired": await served_by(other_worker, "writer", f"{float(deadline) - 600}:{signature}"),
+            }
+            return other_worker, round_robin, reads
+        finally:
+            await router.stop()
+            await other_worker.stop()
+            await primary.dispose()
+
+    other_worker, round_robin, reads = asyncio.run(scenario())
+
+    assert round_robin == ["replica-a", "replica-b", "replica-a", "replica-b"]
+    assert reads["writer"] == "primary"
+    # The token is bound to its client, its deadline and the key
+    assert all(reads[client] != "primary" for client in ("reader", "forged", "expired"))
+    assert other_worker.sticky_reads == 1
+
+
+def test_lagging_or_unreachable_replicas_fall_back_to_primary(tmp_path):
+    names = ["primary", "replica"]
+    primary, replica = make_engines(tmp_path, *names)
+
+    async def scenario():
+        await label_databases([primary, replica], names)
+        router = ReplicaRouter(
+            async_sessionmaker(bind=primary, class_=AsyncSession),
+            [replica],
+            max_lag_seconds=1
+        )
+        try:
+            router.replicas[0].lag_seconds = 30
+            lagging = await served_by(router)
+
+            async def unreachable():
+                raise ConnectionError("replica down")
+
+            router.replicas[0].measure_lag = unreachable
+            await router.check_lag()
+            down = await served_by(router)
+            return router, lagging, down
+        finally:
+            await router.stop()
+            await primary.dispose()
+
+    router, lagging, down = asyncio.run(scenario())
+
+    assert lagging == down == "primary"
+    assert not router.replicas[0].healthy
+    assert router.fallbacks == 2
+
+
+def test_least_connections_picks_the_idlest_replica(tmp_path):
+    names = ["primary", "replica-a", "replica-b"]
+    primary, *replicas = make_engines(tmp_path, *names)
+
+    async def scenario():
+        await label_databases([primary, *replicas], names)
+        router = ReplicaRouter(
+            async_sessionmaker(bind=primary, class_=AsyncSession),
+            replicas,
+            selection=LEAST_CONNECTIONS
+        )
+        try:
+            async with router.session() as busy:
+                await busy.scalar(text("SELECT name FROM node"))
+                return await served_by(router), await served_by(router)
+        finally:
+            await router.stop()
+            await primary.dispose()
+
+    first, second = asyncio.run(scenario())
+
+    assert first == second == "replica-b"
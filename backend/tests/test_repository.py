@@ -0,0 +1,41 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.db.repository import Repository
+from app.models.db_models import Project, User
+
+
+def test_repository_crud_and_pages(async_db):
+    base = datetime(2024, 1, 1)
+
+    async def scenario():
+        async with async_db() as db:
+            user = await Repository(db, User).add(
+                User(email="repo@example.com", full_name="Repo", hashed_password="x")
+            )
+            projects = Repository(db, Project)
+            for index in range(5):
+                await projects.add(Project(
+                    name=f"project-{index}",
+                    created_by=user.id,
+                    created_at=base + timedelta(minutes=index)
+                ))
+
+            first_page = await projects.page(Project.created_by == user.id, limit=3)
+            last = await projects.first(Project.name == "project-4")
+            assert await projects.get(last.id) is last
+
+            await projects.delete(last)
+            return (
+                [project.name for project in first_page],
+                await projects.count(Project.created_by == user.id),
+                await projects.exists(Project.name == "project-4"),
+                [project.name for project in await projects.list(order_by=[Project.name])],
+            )
+
+    first_page, count, exists, names = asyncio.run(scenario())
+
+    assert first_page == ["project-4", "project-3", "project-2"]
+    assert count == 4
+    assert not exists
+    assert names == ["project-0", "project-1", "project-2", "project-3"]
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from sqlalchemy import func, select
+
+from app.models.db_models import Project, TestCase, TestStep, User
+from app.services.test_case_io import (
+    CSV, export_test_cases, import_test_cases, parse_csv, parse_ndjson
+)
+
+
+async def chunked(data: bytes, size: int = 7):
+    # Small chunks so records straddle chunk boundaries
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def make_project(db):
+    user = User(email="bulk@example.com", full_name="Bulk", hashed_password="x")
+    db.add(user)
+    await db.flush()
+    project = Project(name="Bulk", created_by=user.id)
+    db.add(project)
+    await db.commit()
+    return user.id, project.id
+
+
+def ndjson_body(count):
+    lines = [
+        json.dumps({
+            "title": f"Case {index}",
+            "test_type": "api",
+            "test_steps": [
+                {"step_number": 1, "description": "call", "expected_result": "200"},
+                {"step_number": 2, "description": "check", "expected_result": "body"},
+            ],
+        })
+        for index in range(count)
+    ]
+    return "\n".join(lines).encode()
+
+
+def test_ndjson_import_batches_and_reports_bad_lines(async_db):
+    body = ndjson_body(5) + b'\n{"title": "no steps"}\nnot json\n{"test_type": "api"}\n'
+
+    async def scenario():
+        async with async_db() as db:
+            user_id, project_id = await make_project(db)
+            summary = await import_test_cases(db, parse_ndjson(chunked(body)), project_id, user_id, batch_size=2)
+            cases = await db.scalar(select(func.count()).select_from(TestCase))
+            steps = await db.scalar(select(func.count()).select_from(TestStep))
+            return summary, cases, steps
+
+    summary, cases, steps = asyncio.run(scenario())
+
+    assert summary["imported"] == 6
+    assert summary["failed"] == 2
+    assert [error["line"] for error in summary["errors"]] == [7, 8]
+    assert (cases, steps) == (6, 10)
+
+
+def test_lines_that_are_not_utf8_are_reported_as_row_errors(async_db):
+    ndjson = ndjson_body(2) + b'\n{"title": "caf\xe9", "test_type": "api"}\n'
+    csv_body = b'title,test_type\nfine,api\ncaf\xe9,api\nalso fine,api\n'
+
+    async def scenario():
+        async with async_db() as db:
+            user_id, project_id = await make_project(db)
+            from_ndjson = await import_test_cases(db, parse_ndjson(chunked(ndjson)), project_id, user_id)
+            from_csv = await import_test_cases(db, parse_csv(chunked(csv_body)), project_id, user_id)
+            return from_ndjson, from_csv
+
+    from_ndjson, from_csv = asyncio.run(scenario())
+
+    assert (from_ndjson["imported"], from_ndjson["failed"]) == (2, 1)
+    assert from_ndjson["errors"][0]["line"] == 3
+    assert "not valid UTF-8" in from_ndjson["errors"][0]["error"]
+    assert (from_csv["imported"], from_csv["failed"]) == (2, 1)
+    assert from_csv["errors"][0]["line"] == 3
+
+
+def test_csv_export_round_trips_through_import(async_db):
+    async def scenario():
+        async with async_db() as db:
+            user_id, project_id = await make_project(db)
+            await import_test_cases(db, parse_ndjson(chunked(ndjson_body(3))), project_id, user_id)
+
+            exported = "".join([chunk async for chunk in export_test_cases(db, project_id, CSV, batch_size=2)])
+            summary = await import_test_cases(db, parse_csv(chunked(exported.encode())), project_id, user_id)
+
+            ndjson = [json.loads(line) async for line in export_test_cases(db, project_id)]
+            return exported, summary, ndjson
+
+    exported, summary, ndjson = asyncio.run(scenario())
+
+    assert exported.splitlines()[0].startswith("id,project_id,title")
+    assert summary == {"imported": 3, "failed": 0, "errors": []}
+    assert len(ndjson) == 6
+    assert all([step["step_number"] for step in record["test_steps"]] == [1, 2] for record in ndjson)
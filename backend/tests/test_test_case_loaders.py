@@ -0,0 +1,122 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import event, select
+
+from app.api.loaders import parse_fields, serialize_test_cases, test_case_loader_options
+from app.api.v1.routes import test_cases as test_case_routes
+from app.auth.security import get_current_user
+from app.db import get_read_db
+from app.models.db_models import Priority, Project, TestCase, TestStep, TestType, User
+from app.schemas.test_case import TestCaseFields
+
+
+async def seed(db, cases=3, steps=4):
+    user = User(email="loader@example.com", full_name="Loader", hashed_password="x")
+    db.add(user)
+    await db.flush()
+    project = Project(name="Loaders", created_by=user.id)
+    db.add(project)
+    await db.flush()
+    for index in range(cases):
+        test_case = TestCase(
+            title=f"Case {index}",
+            project_id=project.id,
+            test_type=TestType.API,
+            priority=Priority.HIGH,
+            created_by=user.id,
+            test_data={"payload": "x" * 100},
+            automation_config={"runner": "http"}
+        )
+        db.add(test_case)
+        await db.flush()
+        for number in range(steps):
+            db.add(TestStep(
+                test_case_id=test_case.id,
+                step_number=number + 1,
+                description="do",
+                expected_result="done"
+            ))
+    await db.commit()
+
+
+def list_cases(async_db, view="full", fields=None):
+    async def scenario():
+        async with async_db() as db:
+            await seed(db)
+            db.expunge_all()
+
+            statements = []
+            sync_engine = db.bind.sync_engine
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(sync_engine, "before_cursor_execute", listener)
+            try:
+                field_list = parse_fields(fields)
+                stmt = select(TestCase).options(*test_case_loader_options(view, field_list))
+                rows = (await db.execute(stmt)).scalars().all()
+                return serialize_test_cases(rows, view, field_list), statements
+            finally:
+                event.remove(sync_engine, "before_cursor_execute", listener)
+
+    return asyncio.run(scenario())
+
+
+def test_full_view_loads_steps_with_one_extra_query(async_db):
+    items, statements = list_cases(async_db)
+
+    assert len(items) == 3
+    assert all(len(item["test_steps"]) == 4 for item in items)
+    assert len(statements) == 2
+
+
+def test_summary_view_skips_steps_and_json_blobs(async_db):
+    items, statements = list_cases(async_db, view="summary")
+
+    assert len(statements) == 1
+    assert "test_data" not in statements[0]
+    assert "automation_config" not in statements[0]
+    assert "test_steps" not in items[0]
+    assert items[0]["title"].startswith("Case")
+
+
+def test_fields_projection_returns_only_requested_fields(async_db):
+    items, statements = list_cases(async_db, fields="title,priority")
+
+    assert items[0] == {"title": items[0]["title"], "priority": "high"}
+    assert "description" not in statements[0]
+
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        parse_fields("title,hashed_password")
+
+    assert exc_info.value.status_code == 400
+
+
+def test_projection_model_covers_every_column():
+    assert set(TestCaseFields.model_fields) == set(TestCase.__table__.columns.keys()) | {"test_steps"}
+
+
+def test_list_endpoint_returns_each_view_in_its_shape(async_db):
+    async def scenario():
+        async with async_db() as db:
+            await seed(db, cases=1, steps=2)
+
+            app = FastAPI()
+            app.include_router(test_case_routes.router)
+            app.dependency_overrides[get_read_db] = lambda: db
+            app.dependency_overrides[get_current_user] = lambda: {"id": "reader"}
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return [
+                    (await client.get("/", params=params)).json()[0]
+                    for params in ({}, {"view": "summary"}, {"fields": "title,test_steps"})
+                ]
+
+    full, summary, projection = asyncio.run(scenario())
+
+    assert len(full["test_steps"]) == 2 and "tags" not in full
+    assert "test_steps" not in summary and summary["tags"] == []
+    assert set(projection) == {"title", "test_steps"}
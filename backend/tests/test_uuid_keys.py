@@ -0,0 +1,56 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import Uuid, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db.types import NIL_UUID, UUIDString
+from app.models.db_models import Project, User
+
+
+def test_postgres_binds_uuid_strings_natively():
+    column_type = UUIDString()
+    dialect = postgresql.dialect()
+    value = "7C9E6679-7425-40DE-944B-E07FC1F90AE7"
+
+    assert column_type.process_bind_param(value, dialect) == value.lower()
+    assert column_type.process_bind_param(uuid.UUID(value), dialect) == value.lower()
+    assert isinstance(column_type.load_dialect_impl(dialect), Uuid)
+    assert column_type.process_bind_param("p1", sqlite.dialect()) == "p1"
+
+
+def test_malformed_ids_match_nothing_but_are_never_written():
+    dialect = postgresql.dialect()
+
+    def bound(statement):
+        compiled = statement.compile(dialect=dialect)
+        return {
+            name: bind.type.process_bind_param(bind.value, dialect)
+            for name, bind in compiled.binds.items()
+            if isinstance(bind.type, UUIDString) and bind.value is not None
+        }
+
+    # Lookups by a malformed id find no row instead of failing the cast
+    assert set(bound(select(Project).where(Project.id == "not-a-uuid")).values()) == {NIL_UUID}
+    assert set(bound(select(Project).where(Project.id.in_(["not-a-uuid"]))).values()) == {NIL_UUID}
+    with pytest.raises(ValueError):
+        bound(insert(Project).values(id=str(uuid.uuid4()), name="p", created_by="not-a-uuid"))
+
+
+def test_ids_round_trip_as_strings(async_db):
+    async def scenario():
+        async with async_db() as db:
+            user = User(email="uuid@example.com", full_name="Uuid", hashed_password="x")
+            db.add(user)
+            await db.flush()
+            db.add(Project(name="keys", created_by=user.id))
+            await db.commit()
+            db.expunge_all()
+            return user.id, (await db.execute(select(Project.id, Project.created_by))).one()
+
+    user_id, (project_id, created_by) = asyncio.run(scenario())
+
+    assert created_by == user_id
+    assert isinstance(project_id, str)
+    assert str(uuid.UUID(project_id)) == project_id
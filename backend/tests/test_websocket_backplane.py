@@ -0,0 +1,62 @@
+import asyncio
+
+from app.websocket.backplane import InProcessBackplane, InProcessHub, create_backplane
+from app.websocket.manager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def test_events_reach_clients_of_other_workers_once():
+    async def scenario():
+        hub = InProcessHub()
+        workers = [WebSocketManager(backplane=InProcessBackplane(hub)) for _ in range(2)]
+        for worker in workers:
+            await worker.start()
+
+        on_a, on_b, alice_on_b = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await workers[0].connect(on_a, "u1")
+        await workers[0].join_room("u1", "project_1")
+        await workers[1].connect(on_b, "u2")
+        await workers[1].join_room("u2", "project_1")
+        await workers[1].connect(alice_on_b, "alice")
+
+        await workers[0].broadcast_to_room("project_1", {"type": "test_execution_update", "data": {"id": "e1"}})
+        await workers[0].send_personal_message("alice", {"type": "notification", "data": {"title": "hi"}})
+        for worker in workers:
+            await worker.backplane.join()
+            await worker.drain()
+        for worker in workers:
+            await worker.shutdown()
+        return workers, on_a, on_b, alice_on_b
+
+    workers, on_a, on_b, alice_on_b = asyncio.run(scenario())
+
+    assert sum("test_execution_update" in text for text in on_a.sent) == 1
+    assert sum("test_execution_update" in text for text in on_b.sent) == 1
+    assert sum("notification" in text for text in alice_on_b.sent) == 1
+    assert workers[0].stats()["relayed_out"] == 2
+    assert workers[1].stats()["relayed_in"] == 2
+    assert workers[0].stats()["relayed_in"] == 0
+
+
+def test_create_backplane():
+    assert create_backplane("none") is None
+    assert isinstance(create_backplane("memory"), InProcessBackplane)
+    try:
+        create_backplane("redis")
+    except ValueError as e:
+        assert "REDIS_URL" in str(e)
+    else:
+        raise AssertionError("redis backplane without a URL should be rejected")
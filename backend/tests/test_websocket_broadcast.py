@@ -0,0 +1,174 @@
+import asyncio
+import time
+
+from app.websocket.connection import Connection, OverflowPolicy
+from app.websocket.frames import Frame
+from app.websocket.manager import CLOSE_SLOW_CONSUMER, WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0, broken=False):
+        self.delay = delay
+        self.broken = broken
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.broken:
+            raise RuntimeError("connection reset")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self, code=1000, reason=None):
+        self.close_code = code
+
+
+def test_slow_member_does_not_delay_room_and_is_evicted():
+    async def scenario():
+        manager = WebSocketManager(send_timeout=0.1)
+        fast = [FakeWebSocket() for _ in range(20)]
+        slow, broken = FakeWebSocket(), FakeWebSocket()
+        for index, websocket in enumerate(fast + [slow, broken]):
+            await manager.connect(websocket, f"user-{index}")
+            await manager.join_room(f"user-{index}", "project_1")
+        slow.delay, broken.broken = 5, True
+
+        started = time.perf_counter()
+        await manager.broadcast_to_room("project_1", {"type": "test_execution_update", "data": {"id": "e1"}})
+        returned = time.perf_counter() - started
+        await manager.drain()
+        delivered = time.perf_counter() - started
+        await asyncio.sleep(0)
+        return manager, fast, slow, broken, returned, delivered
+
+    manager, fast, slow, broken, returned, delivered = asyncio.run(scenario())
+
+    assert returned < 0.05
+    assert delivered < 1
+    assert all("test_execution_update" in websocket.sent[-1] for websocket in fast)
+    assert slow.close_code == CLOSE_SLOW_CONSUMER
+    assert manager.evictions == 1
+    assert len(manager.get_connected_users()) == 20
+
+
+def queued(connection):
+    return [frame.payload for frame in connection._frames]
+
+
+def test_overflow_drop_oldest():
+    async def scenario():
+        connection = Connection(FakeWebSocket(), "u1", max_queue=2)
+        for index in range(3):
+            connection.enqueue(Frame("update", f"frame-{index}"))
+        return connection
+
+    connection = asyncio.run(scenario())
+
+    assert queued(connection) == ["frame-1", "frame-2"]
+    assert connection.dropped == 1
+
+
+def test_overflow_coalesces_same_message_type():
+    async def scenario():
+        connection = Connection(FakeWebSocket(), "u1", max_queue=2, overflow_policy=OverflowPolicy.COALESCE)
+        connection.enqueue(Frame("dashboard_update", "dashboard-1"))
+        connection.enqueue(Frame("comment_update", "comment-1"))
+        connection.enqueue(Frame("dashboard_update", "dashboard-2"))
+        return connection
+
+    connection = asyncio.run(scenario())
+
+    assert queued(connection) == ["comment-1", "dashboard-2"]
+    assert connection.coalesced == 1
+
+
+def test_overflow_disconnect_evicts_connection():
+    async def scenario():
+        manager = WebSocketManager(max_queue=2, overflow_policy=OverflowPolicy.DISCONNECT)
+        websocket = FakeWebSocket(delay=5)
+        await manager.connect(websocket, "u1")
+        for index in range(3):
+            await manager.send_personal_message("u1", {"type": "notification", "data": {"n": index}})
+        await asyncio.sleep(0)
+        return manager, websocket
+
+    manager, websocket = asyncio.run(scenario())
+
+    assert manager.get_connected_users() == []
+    assert websocket.close_code == CLOSE_SLOW_CONSUMER
+
+
+def test_dashboard_update_is_serialized_once_for_all_recipients():
+    async def scenario():
+        manager = WebSocketManager()
+        websockets = [FakeWebSocket() for _ in range(50)]
+        for index, websocket in enumerate(websockets):
+            await manager.connect(websocket, f"user-{index % 10}")
+        await manager.drain()
+        before = manager.stats()
+        await manager.broadcast_dashboard_update({"pass_rate": 0.9})
+        await manager.drain()
+        return manager, websockets, before
+
+    manager, websockets, before = asyncio.run(scenario())
+    stats = manager.stats()
+
+    assert stats["serializations"] - before["serializations"] == 1
+    assert stats["frames_queued"] - before["frames_queued"] == 50
+    frames = [websocket.sent[-1] for websocket in websockets]
+    assert "dashboard_update" in frames[0]
+    assert all(frame is frames[0] for frame in frames)
+
+
+def test_user_stays_in_room_until_last_connection_leaves():
+    async def scenario():
+        manager = WebSocketManager()
+        laptop, phone = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(laptop, "u1")
+        await manager.connect(phone, "u1")
+        await manager.join_room("u1", "project_1", laptop)
+        await manager.join_room("u1", "testcase_1", phone)
+        await manager.join_room("u1", "project_1", phone)
+
+        manager.disconnect(laptop)
+        after_first = (manager.get_room_members("project_1"), sorted(manager.get_user_rooms("u1")))
+        manager.disconnect(phone)
+        await manager.shutdown()
+        return manager, after_first
+
+    manager, after_first = asyncio.run(scenario())
+
+    assert after_first == (["u1"], ["project_1", "testcase_1"])
+    assert manager.room_memberships == {}
+    assert manager.user_rooms == {}
+
+
+def test_admission_control_and_gauges():
+    async def scenario():
+        manager = WebSocketManager(max_connections_per_user=2, max_connections=3)
+        tabs = [FakeWebSocket() for _ in range(3)]
+        admitted = [await manager.connect(websocket, "u1") for websocket in tabs]
+        other, late = FakeWebSocket(), FakeWebSocket()
+        admitted.append(await manager.connect(other, "u2"))
+        admitted.append(await manager.connect(late, "u3"))
+        await manager.join_room("u1", "project_1")
+        await manager.join_room("u2", "project_1")
+        await manager.drain()
+        stats = manager.stats()
+        await manager.shutdown()
+        return admitted, tabs, late, stats
+
+    admitted, tabs, late, stats = asyncio.run(scenario())
+
+    assert admitted == [True, True, False, True, False]
+    assert tabs[2].close_code == 4029
+    assert late.close_code == 1013
+    assert stats["connections"] == 3
+    assert stats["rejected"] == 2
+    assert stats["largest_rooms"] == {"project_1": 2}
+    assert stats["queue_depth_total"] == 0
+    assert stats["send_p50_ms"] is not None and stats["send_p99_ms"] >= stats["send_p50_ms"]
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from app.websocket.coalescer import UpdateCoalescer
+from app.websocket.manager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def test_execution_updates_are_batched_per_window_with_latest_state():
+    async def scenario():
+        manager = WebSocketManager(execution_update_windows={"project": 0.05})
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "u1")
+        await manager.join_room("u1", "project_p1")
+        for status in ("pending", "running", "completed"):
+            for index in range(100):
+                await manager.broadcast_test_execution_update(
+                    {"id": f"e{index}", "project_id": "p1", "status": status}
+                )
+        await asyncio.sleep(0.1)
+        await manager.drain()
+        await manager.shutdown()
+        return manager, websocket
+
+    manager, websocket = asyncio.run(scenario())
+
+    batches = [frame for frame in websocket.sent if frame["type"] == "test_execution_batch_update"]
+    assert len(batches) == 1
+    assert batches[0]["data"]["count"] == 100
+    assert {e["status"] for e in batches[0]["data"]["executions"]} == {"completed"}
+    assert not any(frame["type"] == "test_execution_update" for frame in websocket.sent)
+    assert manager.stats()["execution_updates"]["superseded"] == 200
+
+
+def test_full_batch_flushes_early_and_unwindowed_rooms_pass_through():
+    async def scenario():
+        flushed = []
+
+        async def flush(room_id, updates):
+            flushed.append((room_id, len(updates)))
+
+        coalescer = UpdateCoalescer(flush, {"project": 60}, max_batch=10)
+        for index in range(25):
+            await coalescer.add("project_p1", {"id": index})
+        await coalescer.add("testcase_t1", {"id": "x"})
+        before_shutdown = list(flushed)
+        await coalescer.flush_all()
+        return before_shutdown, flushed
+
+    before_shutdown, flushed = asyncio.run(scenario())
+
+    assert before_shutdown == [("project_p1", 10), ("project_p1", 10), ("testcase_t1", 1)]
+    assert flushed[-1] == ("project_p1", 5)
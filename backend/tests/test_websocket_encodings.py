@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+
+from app.websocket.frames import AVAILABLE_ENCODINGS, MSGPACK, negotiate_encoding
+from app.websocket.manager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.subprotocol = None
+
+    async def accept(self, subprotocol=None):
+        self.subprotocol = subprotocol
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def test_negotiate_encoding_falls_back_to_json():
+    assert negotiate_encoding([]) is None
+    assert negotiate_encoding(["graphql-ws", "intellitest.protobuf"]) is None
+    assert negotiate_encoding(["intellitest.json"]) == "json"
+
+
+@pytest.mark.skipif(MSGPACK not in AVAILABLE_ENCODINGS, reason="msgpack is not installed")
+def test_room_broadcast_encodes_once_per_encoding_in_use():
+    import msgpack
+
+    async def scenario():
+        manager = WebSocketManager()
+        json_clients = [FakeWebSocket() for _ in range(3)]
+        msgpack_clients = [FakeWebSocket() for _ in range(3)]
+        for index, websocket in enumerate(json_clients + msgpack_clients):
+            binary = websocket in msgpack_clients
+            await manager.connect(
+                websocket,
+                f"u{index}",
+                encoding=MSGPACK if binary else "json",
+                subprotocol="intellitest.msgpack" if binary else None
+            )
+            await manager.join_room(f"u{index}", "project_1", websocket)
+        await manager.drain()
+        before = manager.stats()["serializations"]
+        await manager.broadcast_to_room("project_1", {"type": "test_execution_update", "data": {"id": "e1"}})
+        await manager.drain()
+        serializations = manager.stats()["serializations"] - before
+        await manager.shutdown()
+        return json_clients, msgpack_clients, serializations
+
+    json_clients, msgpack_clients, serializations = asyncio.run(scenario())
+
+    assert serializations == 2
+    assert msgpack_clients[0].subprotocol == "intellitest.msgpack"
+    as_json = json.loads(json_clients[0].sent[-1])
+    as_msgpack = msgpack.unpackb(msgpack_clients[0].sent[-1])
+    assert as_msgpack == as_json
+    assert as_msgpack["data"] == {"id": "e1"}
@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app import main
+from app.auth.security import create_access_token, principal_cache
+
+
+def token_for(user_id):
+    token = create_access_token({"sub": user_id})
+    # Verified principals are served from the cache, without a database
+    principal_cache.set(token, {"id": user_id, "email": f"{user_id}@example.com", "role": "tester"})
+    return token
+
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager: the lifespan (database setup) does not run
+    yield TestClient(main.app)
+    principal_cache.clear()
+
+
+def test_sockets_are_released_whatever_ends_them(client):
+    token = token_for("alice")
+
+    with client.websocket_connect(f"/api/ws/alice?token={token}") as ws:
+        assert ws.receive_json()["type"] == "connection_confirmed"
+        assert "alice" in main.websocket_manager.active_connections
+    assert main.websocket_manager.connections == {}
+
+    # A binary frame makes receive_text fail instead of disconnecting
+    with pytest.raises(KeyError):
+        with client.websocket_connect(f"/api/ws/alice?token={token}") as ws:
+            ws.receive_json()
+            ws.send_bytes(b"\x00")
+            ws.receive_json()
+    assert main.websocket_manager.connections == {}
+    assert "alice" not in main.websocket_manager.active_connections
+
+
+def test_sockets_need_the_token_of_the_user_they_name(client, monkeypatch):
+    monkeypatch.setattr(main.websocket_manager, "max_connections_per_user", 1)
+    mallory = token_for("mallory")
+
+    for url in ("/api/ws/alice", f"/api/ws/alice?token={mallory}", "/api/ws/alice?token=forged"):
+        with pytest.raises(WebSocketDisconnect) as refused:
+            with client.websocket_connect(url) as ws:
+                ws.receive_json()
+        assert refused.value.code == 1008
+
+    # Mallory's attempts did not use up Alice's connection
+    with client.websocket_connect(f"/api/ws/alice?token={token_for('alice')}") as ws:
+        assert ws.receive_json()["type"] == "connection_confirmed"
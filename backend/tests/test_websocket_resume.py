@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from app.websocket.manager import WebSocketManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+
+def event(number):
+    return {"type": "comment_update", "data": {"n": number}}
+
+
+def test_reconnecting_client_receives_only_missed_events():
+    async def scenario():
+        manager = WebSocketManager(room_log_size=10)
+        first = FakeWebSocket()
+        await manager.connect(first, "u1")
+        await manager.join_room("u1", "testcase_1", first)
+        for number in range(3):
+            await manager.broadcast_to_room("testcase_1", event(number))
+        await manager.drain()
+        last_seen = first.sent[-1]["seq"]
+        epoch = first.sent[0]["data"]["epoch"]
+        manager.disconnect(first)
+
+        for number in range(3, 5):
+            await manager.broadcast_to_room("testcase_1", event(number))
+        await manager.broadcast_to_room("testcase_2", event(99))
+
+        second = FakeWebSocket()
+        await manager.connect(second, "u1")
+        await manager.resume("u1", "testcase_1", last_seen, epoch, second)
+        await manager.broadcast_to_room("testcase_1", event(5))
+        await manager.drain()
+        await manager.shutdown()
+        return manager, second
+
+    manager, second = asyncio.run(scenario())
+
+    types = [frame["type"] for frame in second.sent]
+    assert types == ["connection_confirmed", "comment_update", "comment_update", "room_resumed", "comment_update"]
+    assert [frame["data"]["n"] for frame in second.sent if frame["type"] == "comment_update"] == [3, 4, 5]
+    seqs = [frame["seq"] for frame in second.sent if frame["type"] == "comment_update"]
+    assert seqs == sorted(seqs)
+    assert second.sent[3]["data"]["replayed"] == 2
+    assert manager.resumes == 1
+
+
+def test_resume_asks_for_refetch_when_too_far_behind_or_from_another_worker():
+    async def scenario():
+        manager = WebSocketManager(room_log_size=3)
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, "u1")
+        await manager.join_room("u1", "project_1", websocket)
+        await manager.drain()
+        joined = websocket.sent[-1]["data"]
+        for number in range(5):
+            await manager.broadcast_to_room("project_1", event(number))
+
+        await manager.resume("u1", "project_1", joined["seq"], joined["epoch"], websocket)
+        await manager.resume("u1", "project_1", joined["seq"] + 4, "another-worker", websocket)
+        await manager.resume("u1", "project_1", joined["seq"] + 4, joined["epoch"], websocket)
+        await manager.drain()
+        await manager.shutdown()
+        return manager, websocket
+
+    manager, websocket = asyncio.run(scenario())
+
+    replies = [frame for frame in websocket.sent if frame["type"] in ("resync_required", "room_resumed")]
+    assert [reply["type"] for reply in replies] == ["resync_required", "resync_required", "room_resumed"]
+    assert replies[2]["data"]["replayed"] == 1
+    assert manager.resyncs == 2
@@ -493,7 +493,7 @@ class BackendTester:
                 self.log_test("WebSocket Connection", False, "No user ID available for WebSocket test")
                 return False
             
-            ws_url = f"{WS_BASE}/{self.test_user_id}"
+            ws_url = f"{WS_BASE}/{self.test_user_id}?token={self.auth_token}"
             
             async with websockets.connect(ws_url) as websocket:
                 # Test connection